@@ -0,0 +1,594 @@
+import json
+import math
+import queue
+import sys
+import threading
+
+from expression import Compiler, is_number, js_floor, js_truthy, needs_floor, strict_equals, walk
+
+# ---------------------------------------------------------------------------
+# 도달할 수 없는 내용 검사
+#
+# 자원마다 가질 수 있는 값의 범위(구간)를 구해 두고 조건식을 그 범위로 평가한다.
+# 항상 거짓 / 항상 참 이라고 확신할 수 있을 때만 알리고, 모르면 넘어간다.
+# ---------------------------------------------------------------------------
+
+INF = math.inf
+TOP = None  # 알 수 없는 값
+
+TRUE = (1, 1)
+FALSE = (0, 0)
+MAYBE = (0, 1)
+
+RANDOM = (0, math.nextafter(1, 0))
+
+WIDEN_AFTER = 4
+
+
+def interval(value):
+    if isinstance(value, bool):
+        return TRUE if value else FALSE
+    if is_number(value) and value == value:
+        return (value, value)
+    return TOP
+
+
+def checked(lo, hi):
+    if lo != lo or hi != hi:
+        return TOP
+    return (lo, hi)
+
+
+def times(x, y):
+    # 0 * 무한대 는 0 으로 본다 (구간 끝점 계산용)
+    if x == 0 or y == 0:
+        return 0
+    return x * y
+
+
+def a_floor(v):
+    if v is TOP:
+        return TOP
+    lo, hi = v
+    return (js_floor(lo), js_floor(hi))
+
+
+def a_add(a, b):
+    if a is TOP or b is TOP:
+        return TOP
+    return checked(a[0] + b[0], a[1] + b[1])
+
+
+def a_sub(a, b):
+    if a is TOP or b is TOP:
+        return TOP
+    return checked(a[0] - b[1], a[1] - b[0])
+
+
+def a_mul(a, b):
+    if a is TOP or b is TOP:
+        return TOP
+    products = [times(x, y) for x in a for y in b]
+    return checked(min(products), max(products))
+
+
+def a_div(a, b):
+    if a is TOP or b is TOP or b[0] <= 0 <= b[1]:
+        return TOP
+    quotients = []
+    for x in a:
+        for y in b:
+            if x in (INF, -INF) and y in (INF, -INF):
+                return TOP
+            quotients.append(x / y)
+    return a_floor(checked(min(quotients), max(quotients)))
+
+
+def a_mod(a, b):
+    if a is TOP or b is TOP or b[0] <= 0 <= b[1] or a[0] < 0 or a[1] == INF:
+        return TOP
+    return (0, min(a[1], max(abs(b[0]), abs(b[1]))))
+
+
+def truth(v):
+    if v is TOP:
+        return None
+    lo, hi = v
+    if lo > 0 or hi < 0:
+        return True
+    if lo == hi == 0:
+        return False
+    return None
+
+
+def from_truth(t):
+    if t is None:
+        return MAYBE
+    return TRUE if t else FALSE
+
+
+def a_compare(op, a, b):
+    if a is TOP or b is TOP:
+        return MAYBE
+    if op == '>':
+        return TRUE if a[0] > b[1] else FALSE if a[1] <= b[0] else MAYBE
+    if op == '<':
+        return TRUE if a[1] < b[0] else FALSE if a[0] >= b[1] else MAYBE
+    if op == '>=':
+        return TRUE if a[0] >= b[1] else FALSE if a[1] < b[0] else MAYBE
+    if op == '<=':
+        return TRUE if a[1] <= b[0] else FALSE if a[0] > b[1] else MAYBE
+    if a[0] == a[1] == b[0] == b[1]:
+        same = True
+    elif a[1] < b[0] or b[1] < a[0]:
+        same = False
+    else:
+        return MAYBE
+    return from_truth(same if op == '==' else not same)
+
+
+class Env:
+    def __init__(self, ranges, vocab, required):
+        self.ranges = ranges
+        self.vocab = vocab  # {'tags': set 또는 TOP, 'items': ...}
+        self.required = required
+
+    def __eq__(self, other):
+        return (self.ranges, self.vocab, self.required) == (other.ranges, other.vocab, other.required)
+
+
+def abstract(node, env):
+    kind = node[0]
+    if kind == 'const':
+        return interval(node[1])
+    if kind == 'res':
+        return env.ranges.get(node[1], TOP)
+    if kind == 'random':
+        return RANDOM
+    if kind == 'required':
+        return env.required
+    if kind == 'seq':
+        return abstract(node[1][0], env)
+    if kind != 'op':
+        return TOP
+
+    _, op, a, b = node
+    if op in ('<<', '>>'):
+        container, needle = (a, b) if op == '<<' else (b, a)
+        if container[0] in ('tags', 'items') and needle[0] == 'const':
+            vocab = env.vocab[container[0]]
+            if vocab is not TOP and not any(strict_equals(x, needle[1]) for x in vocab):
+                return FALSE
+        return MAYBE
+
+    va, vb = abstract(a, env), abstract(b, env)
+    if op == '+':
+        return a_add(va, vb)
+    if op == '-':
+        return a_sub(va, vb)
+    if op == '*':
+        return a_mul(va, vb)
+    if op == '/':
+        return a_div(va, vb)
+    if op == '%':
+        return a_mod(va, vb)
+    if op in ('>', '<', '>=', '<=', '==', '!='):
+        return a_compare(op, va, vb)
+    ta, tb = truth(va), truth(vb)
+    # && / || 는 JS 처럼 참 / 거짓 이 아니라 한쪽 값을 돌려준다 (a && b 는 a 가 참이면 b, 아니면 a)
+    if op == '&&':
+        if ta is None:
+            return union(va, vb)
+        return vb if ta else va
+    if op == '||':
+        if ta is None:
+            return union(va, vb)
+        return va if ta else vb
+    if op == '^^':
+        return MAYBE if ta is None or tb is None else from_truth(ta != tb)
+    return TOP
+
+
+def union(a, b):
+    if a is TOP or b is TOP:
+        return TOP
+    return (min(a[0], b[0]), max(a[1], b[1]))
+
+
+# ---------------------------------------------------------------------------
+# setValue 요약 (장면마다 한 번 만들어 두고 합친다)
+# ---------------------------------------------------------------------------
+
+class Effects:
+    def __init__(self):
+        self.assigned = {}  # 자원 id -> '=' 로 들어갈 수 있는 값의 구간
+        self.up = set()  # 커질 수 있는 자원
+        self.down = set()  # 작아질 수 있는 자원
+        self.unknown = set()  # 숫자가 아닐 수 있는 자원
+        self.dynamic = set()  # 다른 자원을 읽는 값: (자원 id, 연산, 식)
+        self.vocab = {'tags': set(), 'items': set()}
+        self.ending_refs = set()  # ending 분기가 직접 가리키는 엔딩
+
+    def merge(self, other):
+        for rid, v in other.assigned.items():
+            self.assigned[rid] = union(self.assigned[rid], v) if rid in self.assigned else v
+        self.up |= other.up
+        self.down |= other.down
+        self.unknown |= other.unknown
+        self.dynamic |= other.dynamic
+        for kind in ('tags', 'items'):
+            if self.vocab[kind] is not TOP:
+                self.vocab[kind] = TOP if other.vocab[kind] is TOP else self.vocab[kind] | other.vocab[kind]
+
+    def apply(self, rid, op, v):
+        if op == '=':
+            self.assigned[rid] = union(self.assigned[rid], v) if rid in self.assigned else v
+            return
+        if v is TOP or op in ('/',):
+            self.unknown.add(rid)
+            return
+        lo, hi = v
+        if op == '+':
+            if hi > 0:
+                self.up.add(rid)
+            if lo < 0:
+                self.down.add(rid)
+        elif op == '-':
+            if lo < 0:
+                self.up.add(rid)
+            if hi > 0:
+                self.down.add(rid)
+        elif op == '*' and not lo == hi == 1:
+            self.up.add(rid)
+            self.down.add(rid)
+
+    def add_events(self, events, compiler, resource_ids):
+        for e in events:
+            if e.get("type") != 'setValue':
+                continue
+            target = e.get("target")
+            tree = compiler.tree(e.get("value"))
+            if target in ('tags', 'items'):
+                if e.get("operation") == 'add' and self.vocab[target] is not TOP:
+                    if tree[0] == 'const':
+                        self.vocab[target].add(js_floor(tree[1]) if needs_floor(tree) else tree[1])
+                    else:
+                        self.vocab[target] = TOP
+                continue
+            if target not in resource_ids:
+                continue
+            if any(n[0] in ('res', 'required', 'tags', 'items') for n in walk(tree)):
+                self.dynamic.add((target, e.get("operation"), tree))
+            else:
+                v = abstract(tree, EMPTY_ENV)
+                self.apply(target, e.get("operation"), a_floor(v) if needs_floor(tree) else v)
+
+
+EMPTY_ENV = Env({}, {'tags': TOP, 'items': TOP}, MAYBE)
+
+
+def page_buttons(page):
+    for el in page.get("elements", []):
+        if el.get("type") == "choice":
+            yield from el.get("elements", [])
+        elif el.get("type") == "button":
+            yield el
+
+
+def scene_buttons(scene):
+    for page in scene.get("pages", {}).values():
+        yield from page_buttons(page)
+
+
+# ---------------------------------------------------------------------------
+# 분석기
+# ---------------------------------------------------------------------------
+
+class Analyzer:
+    def __init__(self, data):
+        # data 는 DATA_FILES 와 같은 키를 쓰는 딕셔너리 (편집기의 데이터를 그대로 넘겨도 된다)
+        self.data = data
+        self.full()
+
+    # -- 전체 / 부분 분석 -------------------------------------------------
+
+    def fingerprint(self):
+        parts = {k: self.data.get(k) for k in ("Resource", "Custom", "Endings", "Setting")}
+        return json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+
+    def full(self):
+        resources = self.data.get("Resource", {})
+        self.compiler = Compiler(resources.keys())
+        self.global_fingerprint = self.fingerprint()
+
+        base = Effects()
+        for category in self.data.get("Custom", {}).values():
+            for el in category.get("elements", []):
+                base.add_events(el.get("events", []), self.compiler, resources)
+        base.add_events(self.data.get("Setting", {}).get("events", []), self.compiler, resources)
+        self.base_effects = base
+
+        self.scene_effects = {}
+        for sid, scene in self.data.get("Scene", {}).items():
+            self.scene_effects[sid] = self.summarize(scene)
+        self.env = self.compute_env()
+        self.scene_findings = {sid: self.check_scene(sid, scene) for sid, scene in self.data.get("Scene", {}).items()}
+        self.ending_findings = self.check_endings()
+
+    def update(self, touched=()):
+        # 편집기에서 바뀐 장면만 다시 검사한다 (장면 외의 데이터가 바뀌었으면 전체 검사)
+        if self.fingerprint() != self.global_fingerprint:
+            self.full()
+            return
+        scenes = self.data.get("Scene", {})
+        touched = set(touched) | (scenes.keys() - self.scene_effects.keys())
+        for sid in self.scene_effects.keys() - scenes.keys():
+            del self.scene_effects[sid]
+            self.scene_findings.pop(sid, None)
+            touched.discard(sid)
+        for sid in touched:
+            if sid in scenes:
+                self.scene_effects[sid] = self.summarize(scenes[sid])
+
+        env = self.compute_env()
+        if env != self.env:
+            self.env = env
+            touched = set(scenes)
+        for sid in touched:
+            if sid in scenes:
+                self.scene_findings[sid] = self.check_scene(sid, scenes[sid])
+        self.ending_findings = self.check_endings()
+
+    def findings(self):
+        result = []
+        for sid in self.data.get("Scene", {}):
+            result.extend(self.scene_findings.get(sid, []))
+        result.extend(self.ending_findings)
+        return result
+
+    # -- 값 범위 ----------------------------------------------------------
+
+    def summarize(self, scene):
+        effects = Effects()
+        resources = self.data.get("Resource", {})
+        for button in scene_buttons(scene):
+            effects.add_events(button.get("events", []), self.compiler, resources)
+            for b in button.get("branch") or []:
+                if b.get("type") == "ending" and b.get("value"):
+                    effects.ending_refs.add(b["value"])
+        return effects
+
+    def compute_env(self):
+        effects = Effects()
+        effects.merge(self.base_effects)
+        for e in self.scene_effects.values():
+            effects.merge(e)
+
+        resources = self.data.get("Resource", {})
+        required = MAYBE if any(c.get("required") for c in self.data.get("Custom", {}).values()) else TRUE
+        initial = {}
+        for rid, res in resources.items():
+            initial[rid] = interval(res.get("realValue", res.get("value")))
+
+        env = Env(dict(initial), effects.vocab, required)
+        for step in range(100):
+            dynamic = Effects()
+            for rid, op, tree in effects.dynamic:
+                v = abstract(tree, env)
+                dynamic.apply(rid, op, a_floor(v) if needs_floor(tree) else v)
+            ranges = {}
+            for rid in resources:
+                r = initial[rid]
+                for source in (effects, dynamic):
+                    if rid in source.unknown:
+                        r = TOP
+                    if rid in source.assigned:
+                        r = union(r, source.assigned[rid])
+                    if r is not TOP and rid in source.up:
+                        r = (r[0], INF)
+                    if r is not TOP and rid in source.down:
+                        r = (-INF, r[1])
+                ranges[rid] = self.clamp(rid, r, env)
+            if step >= WIDEN_AFTER:
+                # 끝없이 조금씩 넓어지는 경우를 막는다
+                for rid, r in ranges.items():
+                    old = env.ranges[rid]
+                    if r is TOP or old is TOP:
+                        continue
+                    ranges[rid] = (-INF if r[0] < old[0] else r[0], INF if r[1] > old[1] else r[1])
+            ranges = {rid: union(env.ranges[rid], r) for rid, r in ranges.items()}
+            if ranges == env.ranges:
+                break
+            env = Env(ranges, effects.vocab, required)
+        return env
+
+    def clamp(self, rid, r, env):
+        res = self.data["Resource"][rid]
+        if r is TOP:
+            return TOP
+        lo, hi = r
+        if "maxValue" in res:
+            m = self.value_range(res["maxValue"], env)
+            if m is TOP:
+                return TOP
+            lo, hi = min(lo, m[0]), min(hi, m[1])
+        if "minValue" in res:
+            m = self.value_range(res["minValue"], env)
+            if m is TOP:
+                return TOP
+            lo, hi = max(lo, m[0]), max(hi, m[1])
+        return (lo, hi)
+
+    def value_range(self, expr, env):
+        tree = self.compiler.tree(expr)
+        v = abstract(tree, env)
+        return a_floor(v) if needs_floor(tree) else v
+
+    def condition(self, expr):
+        # True: 항상 참, False: 항상 거짓, None: 알 수 없음
+        tree = self.compiler.tree(expr)
+        if tree[0] == 'const':
+            return js_truthy(js_floor(tree[1]))
+        return truth(self.value_range(expr, self.env))
+
+    # -- 장면 -------------------------------------------------------------
+
+    def check_scene(self, sid, scene):
+        found = []
+        endings = self.data.get("Endings", {})
+        pages = scene.get("pages", {})
+        start = scene.get("start", "start")
+
+        if "condition" in scene and self.condition(scene["condition"]) is False:
+            found.append(("scene-never", sid, f"장면 '{sid}' 의 조건식이 항상 거짓입니다: {scene['condition']}"))
+        if start not in pages:
+            found.append(("page-missing", sid, f"장면 '{sid}' 의 시작 페이지 '{start}' 가 없습니다."))
+
+        edges = {pid: [] for pid in pages}
+        pointed = set()
+        for pid, page in pages.items():
+            for button in page_buttons(page):
+                enabled = "condition" not in button or self.condition(button["condition"]) is not False
+                if not enabled:
+                    title = button.get("title", "")
+                    found.append(("choice-never", f"{sid}/{pid}",
+                                  f"'{sid}/{pid}' 의 선택지 '{title}' 는 조건식이 항상 거짓입니다: {button['condition']}"))
+                for b in button.get("branch") or []:
+                    kind, value = b.get("type"), b.get("value")
+                    if kind == "page":
+                        if value not in pages:
+                            found.append(("page-missing", f"{sid}/{pid}",
+                                          f"'{sid}/{pid}' 에 없는 페이지 '{value}' 로 가는 분기가 있습니다."))
+                            continue
+                        pointed.add(value)
+                        if enabled and not (b.get("condition") and self.condition(b["condition"]) is False):
+                            edges[pid].append(value)
+                    elif kind == "ending" and value and value not in endings:
+                        found.append(("ending-missing", f"{sid}/{pid}",
+                                      f"'{sid}/{pid}' 에 없는 엔딩 '{value}' 로 가는 분기가 있습니다."))
+
+        reached = set()
+        stack = [start] if start in pages else []
+        while stack:
+            pid = stack.pop()
+            if pid in reached:
+                continue
+            reached.add(pid)
+            stack.extend(edges[pid])
+        for pid in pages:
+            if pid == start or pid in reached:
+                continue
+            if pid not in pointed:
+                found.append(("page-orphan", f"{sid}/{pid}", f"'{sid}/{pid}' 로 가는 page 분기가 없습니다."))
+            else:
+                found.append(("page-unreachable", f"{sid}/{pid}",
+                              f"'{sid}/{pid}' 는 시작 페이지에서 도달할 수 없습니다."))
+        return found
+
+    # -- 엔딩 -------------------------------------------------------------
+
+    def check_endings(self):
+        found = []
+        endings = self.data.get("Endings", {})
+        referenced = set()
+        for effects in self.scene_effects.values():
+            referenced |= effects.ending_refs
+
+        order = list(endings)
+        valid = {eid: True if not e.get("condition") else self.condition(e["condition"]) for eid, e in endings.items()}
+        priority = {eid: e.get("priority", 0) for eid, e in endings.items()}
+        for i, eid in enumerate(order):
+            if eid in referenced:
+                # 분기에서 직접 지정하면 우선순위와 상관없이 나온다
+                continue
+            if valid[eid] is False:
+                found.append(("ending-never", eid,
+                              f"엔딩 '{eid}' 의 조건식이 항상 거짓입니다: {endings[eid]['condition']}"))
+                continue
+            # 같은 우선순위면 목록에서 앞선 엔딩이 뽑힌다
+            blocker = next((other for j, other in enumerate(order) if other != eid and valid[other] is True
+                            and (priority[other] > priority[eid] or (priority[other] == priority[eid] and j < i))),
+                           None)
+            if blocker:
+                found.append(("ending-shadowed", eid,
+                              f"엔딩 '{eid}' 는 항상 유효한 엔딩 '{blocker}' (우선순위 {priority[blocker]}) 에 가려 "
+                              f"나올 수 없습니다."))
+        return found
+
+
+class AnalyzeWorker:
+    # 편집기에서 쓴다. 저장할 때마다 작업 스레드에서 Analyzer 를 갱신하고, 결과는 편집기가 after() 로 poll() 해 꺼낸다.
+    # get_data 는 작업 스레드에서 불리므로 편집기의 dict 가 아닌 사본을 돌려줘야 한다 (undo.thaw).
+    # 검사하는 동안 다시 넘기면 마지막 데이터만 남기고 고친 장면은 합쳐 한 번에 검사한다
+    def __init__(self):
+        self.analyzer = None
+        self.pending = None
+        self.results = queue.Queue()
+        self.busy = False
+        self.lock = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="analyzer", daemon=True)
+        self.thread.start()
+
+    def submit(self, get_data, touched=(), reset=False):
+        # reset: 데이터를 새로 불러왔으면 처음부터 검사한다
+        touched = set(touched)
+        with self.lock:
+            if self.pending is not None:
+                touched |= self.pending[1]
+                reset = reset or self.pending[2]
+            self.pending = (get_data, touched, reset)
+            self.busy = True
+            self.lock.notify()
+
+    def run(self):
+        while True:
+            with self.lock:
+                while self.pending is None:
+                    self.busy = False
+                    self.lock.wait()
+                (get_data, touched, reset), self.pending = self.pending, None
+            try:
+                data = get_data()
+                if reset or self.analyzer is None:
+                    self.analyzer = Analyzer(data)
+                else:
+                    self.analyzer.data = data
+                    self.analyzer.update(touched)
+                self.results.put((self.analyzer.findings(), None))
+            except Exception as e:
+                # 다음에는 처음부터 검사한다
+                self.analyzer = None
+                self.results.put((None, e))
+
+    def idle(self):
+        with self.lock:
+            return not self.busy
+
+    def poll(self):
+        # 마지막 (결과, 오류) 만 돌려준다. 새 결과가 없으면 None
+        result = None
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                return result
+
+
+def format_findings(findings):
+    if not findings:
+        return "문제가 발견되지 않았습니다."
+    return "\n".join(f"[{kind}] {message}" for kind, _, message in findings)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from engine import load_data
+
+    parser = argparse.ArgumentParser(description="도달할 수 없는 장면, 페이지, 엔딩과 잘못된 분기를 찾습니다.")
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    args = parser.parse_args()
+
+    findings = Analyzer(load_data(args.base)).findings()
+    print(format_findings(findings))
+    sys.exit(1 if findings else 0)
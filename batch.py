@@ -0,0 +1,586 @@
+import time
+from collections import Counter
+
+import numpy as np
+
+from engine import Game, load_project
+from expression import is_number, repeat_count
+
+ACTIVE, ENDED, STUCK = 0, 1, 2
+
+# 한 번에 같이 진행할 판 수의 상한 (장면 수에 맞춰 completed 행렬 크기를 제한한다)
+MAX_CELLS = 1 << 25
+
+
+class Unsupported(Exception):
+    pass
+
+
+def truthy(x):
+    return (x != 0) & ~np.isnan(x)
+
+
+def tag_key(value):
+    return (type(value).__name__, value)
+
+
+def number_field(entry, field, default):
+    # 문자열 / 식으로 적힌 weight, priority 는 script.js 의 형 변환을 따라야 하므로 한 판씩 진행한다
+    value = entry.get(field, default)
+    if not is_number(value):
+        raise Unsupported(f"숫자가 아닌 {field} 는 묶음 모드에서 지원하지 않습니다: {value!r}")
+    return float(value)
+
+
+class VectorCompiler:
+    # expression.parse 가 만든 트리를 판 묶음 전체에 대한 numpy 연산으로 바꾼다
+    # 자원 값은 모두 float64 로 다루며, true/false 는 1/0 으로 표현한다
+    def __init__(self, project, columns, tag_index, item_index):
+        self.tree = project.compiler.tree
+        self.columns = columns
+        self.tag_index = tag_index
+        self.item_index = item_index
+        self.values = {}
+        self.conditions = {}
+
+    def member(self, container, needle):
+        if needle[0] != 'const' or needle[1] is None:
+            raise Unsupported("tags / items 에는 상수만 검사할 수 있습니다.")
+        if container[0] == 'tags':
+            col = self.tag_index.get(tag_key(needle[1]))
+            if col is None:
+                return lambda st, rows: 0.0
+            return lambda st, rows: st.tags[rows, col].astype(float)
+        col = self.item_index.get(tag_key(needle[1]))
+        if col is None:
+            return lambda st, rows: 0.0
+        return lambda st, rows: (st.items[rows, col] > 0).astype(float)
+
+    def node(self, n):
+        kind = n[0]
+        if kind == 'const':
+            v = n[1]
+            if v is None:
+                return lambda st, rows: np.nan
+            if isinstance(v, bool) or is_number(v):
+                c = float(v)
+                return lambda st, rows: c
+            raise Unsupported(f"문자열 값은 묶음 모드에서 지원하지 않습니다: {v!r}")
+        if kind == 'res':
+            col = self.columns[n[1]]
+            return lambda st, rows: st.val[rows, col]
+        if kind == 'random':
+            return lambda st, rows: st.rng.random(len(rows))
+        if kind == 'required':
+            return lambda st, rows: st.required[rows]
+        if kind in ('tags', 'items'):
+            raise Unsupported("tags / items 는 << 또는 >> 로만 쓸 수 있습니다.")
+        if kind == 'seq':
+            parts = [self.node(child) for child in n[1]]
+            def run_all(st, rows):
+                results = [part(st, rows) for part in parts]
+                return results[0]
+            return run_all
+
+        _, op, a, b = n
+        if op in ('<<', '>>'):
+            container, needle = (a, b) if op == '<<' else (b, a)
+            if container[0] in ('tags', 'items'):
+                return self.member(container, needle)
+            if container[0] == 'res' or container[0] == 'const':
+                # 자원 값은 배열이 될 수 없으므로 항상 false
+                return lambda st, rows: 0.0
+            raise Unsupported(f"지원하지 않는 {op} 사용")
+
+        fa, fb = self.node(a), self.node(b)
+        if op == '+':
+            return lambda st, rows: fa(st, rows) + fb(st, rows)
+        if op == '-':
+            return lambda st, rows: fa(st, rows) - fb(st, rows)
+        if op == '*':
+            return lambda st, rows: fa(st, rows) * fb(st, rows)
+        if op == '/':
+            return lambda st, rows: np.floor(np.true_divide(fa(st, rows), fb(st, rows)))
+        if op == '%':
+            return lambda st, rows: np.fmod(fa(st, rows), fb(st, rows))
+        if op == '==':
+            return lambda st, rows: np.equal(fa(st, rows), fb(st, rows)).astype(float)
+        if op == '!=':
+            return lambda st, rows: np.not_equal(fa(st, rows), fb(st, rows)).astype(float)
+        if op == '>':
+            return lambda st, rows: np.greater(fa(st, rows), fb(st, rows)).astype(float)
+        if op == '<':
+            return lambda st, rows: np.less(fa(st, rows), fb(st, rows)).astype(float)
+        if op == '>=':
+            return lambda st, rows: np.greater_equal(fa(st, rows), fb(st, rows)).astype(float)
+        if op == '<=':
+            return lambda st, rows: np.less_equal(fa(st, rows), fb(st, rows)).astype(float)
+        if op == '&&':
+            def op_and(st, rows):
+                x, y = fa(st, rows), fb(st, rows)
+                return np.where(truthy(x), y, x)
+            return op_and
+        if op == '||':
+            def op_or(st, rows):
+                x, y = fa(st, rows), fb(st, rows)
+                return np.where(truthy(x), x, y)
+            return op_or
+        if op == '^^':
+            return lambda st, rows: (truthy(fa(st, rows)) != truthy(fb(st, rows))).astype(float)
+        raise Unsupported(f"Unknown operator: {op}")
+
+    def value(self, expr):
+        key = expr if type(expr) is str else repr(expr)
+        fn = self.values.get(key)
+        if fn is None:
+            inner = self.node(self.tree(expr))
+            fn = self.values[key] = lambda st, rows: np.broadcast_to(np.floor(inner(st, rows)), (len(rows),))
+        return fn
+
+    def condition(self, expr):
+        key = expr if type(expr) is str else repr(expr)
+        fn = self.conditions.get(key)
+        if fn is None:
+            inner = self.value(expr)
+            fn = self.conditions[key] = lambda st, rows: truthy(inner(st, rows))
+        return fn
+
+
+class BatchState:
+    def __init__(self, n, sim, rng):
+        self.rng = rng
+        self.real = np.full((n, len(sim.columns)), np.nan)
+        self.val = np.full((n, len(sim.columns)), np.nan)
+        self.tags = np.zeros((n, len(sim.tag_index)), dtype=bool)
+        self.items = np.zeros((n, len(sim.item_index)), dtype=np.int64)
+        self.required = np.ones(n)
+        self.completed = np.zeros((n, len(sim.scene_ids)), dtype=bool)
+        self.visited = np.zeros((n, len(sim.scene_ids)), dtype=bool)
+        self.scene = np.full(n, -1, dtype=np.int64)
+        self.page = np.full(n, -1, dtype=np.int64)
+        self.locked = np.zeros(n, dtype=np.int64)
+        self.round = np.zeros(n, dtype=np.int64)
+        self.phase = np.full(n, ACTIVE, dtype=np.int8)
+        self.ending = np.full(n, -1, dtype=np.int64)
+        self.visits = np.zeros(len(sim.scene_ids), dtype=np.int64)
+
+
+class BatchSimulator:
+    def __init__(self, project, custom_limit=100000, outcomes=None):
+        self.project = project
+        self.scene_ids = project.scene_ids
+        self.ending_ids = list(project.endings)
+        self.columns = {rid: i for i, rid in enumerate(project.resources)}
+
+        try:
+            # 커스텀 데이터가 같으면 다른 프로젝트에서 구한 결과를 넘겨 재사용할 수 있다
+            self.outcomes = outcomes if outcomes is not None else Game(project).custom_outcomes(limit=custom_limit)
+        except (ValueError, OverflowError) as e:
+            raise Unsupported(str(e))
+
+        self.live = self.read_resources()
+        self.tag_index, self.item_index = self.collect_vocabulary()
+        self.vc = VectorCompiler(project, self.columns, self.tag_index, self.item_index)
+
+        self.limited = [(self.columns[rid], project.resources[rid]) for rid in project.limited_resources]
+        self.page_index = {}
+        self.pages = []
+        for key, groups in project.page_groups.items():
+            # 누른 묶음은 int64 비트로 기억하므로 묶음 번호는 62 까지만 쓸 수 있다
+            if len(groups) >= 63:
+                raise Unsupported(f"선택지 묶음이 63개 이상인 페이지는 묶음 모드에서 지원하지 않습니다: {key[0]}/{key[1]}")
+            for group in groups:
+                for button in group:
+                    for b in button.get("branch") or []:
+                        number_field(b, "priority", 0)
+                        number_field(b, "weight", 1)
+            self.page_index[key] = len(self.pages)
+            self.pages.append(key)
+        self.scene_priority = np.array([number_field(project.scenes[s], "priority", 0) for s in self.scene_ids])
+        self.scene_weight = np.array([number_field(project.scenes[s], "weight", 1) for s in self.scene_ids])
+        self.scene_once = np.array([project.scenes[s].get("repeatable") is False for s in self.scene_ids])
+        self.scene_start = np.array([self.page_index.get((s, project.scenes[s].get("start", "start")), -1)
+                                     for s in self.scene_ids])
+        self.ending_priority = np.array([number_field(project.endings[e], "priority", 0) for e in self.ending_ids])
+
+        self.prepare_outcomes()
+        self.compile_all()
+
+    # -- 준비 -------------------------------------------------------------
+
+    def event_expressions(self, events):
+        for e in events:
+            if e.get("type") != 'setValue':
+                continue
+            if e.get("target") not in ('tags', 'items'):
+                yield e.get("value")
+            if "condition" in e:
+                yield e["condition"]
+
+    def all_expressions(self, live_only=False):
+        p = self.project
+        if live_only:
+            events_of = lambda events: self.event_expressions(
+                [e for e in events if e.get("target") in ('tags', 'items') or e.get("target") in self.live])
+        else:
+            events_of = self.event_expressions
+        for res in p.resources.values():
+            for field in ("maxValue", "minValue"):
+                if field in res:
+                    yield res[field]
+        for scene in p.scenes.values():
+            if "condition" in scene:
+                yield scene["condition"]
+        for ending in p.endings.values():
+            if ending.get("condition"):
+                yield ending["condition"]
+        for groups in p.page_groups.values():
+            for group in groups:
+                for button in group:
+                    if "condition" in button:
+                        yield button["condition"]
+                    yield from events_of(button.get("events", []))
+                    for b in button.get("branch") or []:
+                        if b.get("condition"):
+                            yield b["condition"]
+        yield from events_of(p.setting_events)
+
+    def read_resources(self):
+        return self.project.read_symbols()
+
+    def collect_vocabulary(self):
+        tags, items = {}, {}
+        p = self.project
+
+        def events_of():
+            for groups in p.page_groups.values():
+                for group in groups:
+                    for button in group:
+                        yield from button.get("events", [])
+            yield from p.setting_events
+
+        for e in events_of():
+            if e.get("type") != 'setValue' or e.get("target") not in ('tags', 'items'):
+                continue
+            node = p.compiler.tree(e.get("value"))
+            if node[0] != 'const':
+                raise Unsupported(f"tags / items 에 넣는 값은 상수여야 합니다: {e.get('value')!r}")
+            index = tags if e["target"] == 'tags' else items
+            index.setdefault(tag_key(node[1]), len(index))
+        for _, _, (real, tag_list, item_list), _ in self.outcomes:
+            for t in tag_list:
+                tags.setdefault(tag_key(t), len(tags))
+            for it in item_list:
+                items.setdefault(tag_key(it), len(items))
+        return tags, items
+
+    def prepare_outcomes(self):
+        n = len(self.outcomes)
+        self.outcome_prob = np.cumsum([o[0] for o in self.outcomes])
+        self.outcome_prob /= self.outcome_prob[-1]
+        self.outcome_real = np.full((n, len(self.columns)), np.nan)
+        self.outcome_tags = np.zeros((n, len(self.tag_index)), dtype=bool)
+        self.outcome_items = np.zeros((n, len(self.item_index)), dtype=np.int64)
+        self.outcome_required = np.zeros(n)
+        for i, (_, _, (real, tag_list, item_list), met) in enumerate(self.outcomes):
+            for rid, v in real.items():
+                if isinstance(v, bool) or is_number(v):
+                    self.outcome_real[i, self.columns[rid]] = float(v)
+                elif rid in self.live:
+                    raise Unsupported(f"숫자가 아닌 자원 값은 지원하지 않습니다: {rid} = {v!r}")
+            for t in tag_list:
+                self.outcome_tags[i, self.tag_index[tag_key(t)]] = True
+            for it in item_list:
+                self.outcome_items[i, self.item_index[tag_key(it)]] += 1
+            self.outcome_required[i] = float(met)
+
+    def compile_all(self):
+        for expr in self.all_expressions(live_only=True):
+            self.vc.value(expr)
+            self.vc.condition(expr)
+
+    # -- setValue ---------------------------------------------------------
+
+    def clamp(self, st, col, res, new, rows):
+        if "maxValue" in res:
+            new = np.minimum(new, self.vc.value(res["maxValue"])(st, rows))
+        if "minValue" in res:
+            new = np.maximum(new, self.vc.value(res["minValue"])(st, rows))
+        return new
+
+    def clamp_values(self, st, rows):
+        for col, res in self.limited:
+            st.val[rows, col] = self.clamp(st, col, res, st.real[rows, col], rows)
+
+    def set_value(self, st, e, rows):
+        target = e.get("target")
+        if target not in ('tags', 'items') and target not in self.live:
+            # 아무 식에서도 읽지 않는 자원은 결과에 영향이 없다
+            return
+        # tags / items 에 넣는 값은 상수라서 미리 계산할 필요가 없다
+        evaluated = None if target in ('tags', 'items') else self.vc.value(e.get("value"))(st, rows)
+        if "condition" in e:
+            mask = self.vc.condition(e["condition"])(st, rows)
+            rows = rows[mask]
+            if evaluated is not None:
+                evaluated = evaluated[mask]
+        if not len(rows):
+            return
+
+        operation = e.get("operation")
+        if target in ('tags', 'items'):
+            value = self.project.compiler.tree(e.get("value"))[1]
+            if target == 'tags':
+                col = self.tag_index[tag_key(value)]
+                if operation == 'add':
+                    st.tags[rows, col] = True
+                elif operation == 'remove':
+                    st.tags[rows, col] = False
+            else:
+                col = self.item_index[tag_key(value)]
+                count = e.get("count")
+                repeat = repeat_count(1 if count is None else count)
+                if operation == 'add':
+                    st.items[rows, col] += repeat
+                elif operation == 'remove':
+                    st.items[rows, col] = np.maximum(0, st.items[rows, col] - repeat)
+            return
+
+        col = self.columns[target]
+        current = st.real[rows, col]
+        if operation == '=':
+            new = evaluated
+        elif operation == '+':
+            new = current + evaluated
+        elif operation == '-':
+            new = current - evaluated
+        elif operation == '*':
+            new = current * evaluated
+        elif operation == '/':
+            new = np.true_divide(current, evaluated)
+        else:
+            new = current
+        res = self.project.resources[target]
+        if "maxValue" in res or "minValue" in res:
+            new = self.clamp(st, col, res, new, rows)
+        st.real[rows, col] = new
+        st.val[rows, col] = new
+        self.clamp_values(st, rows)
+
+    def execute_events(self, st, events, rows):
+        for e in events:
+            if e.get("type") == 'setValue' and len(rows):
+                self.set_value(st, e, rows)
+
+    # -- 진행 -------------------------------------------------------------
+
+    def pick(self, st, valid, priority, weight):
+        # newEvent / handleBranchTo 의 우선순위 + 가중치 선택을 행 단위로 한 번에 수행
+        pr = np.where(valid, priority, -np.inf)
+        top = valid & (priority == pr.max(axis=1)[:, None])
+        cum = np.where(top, weight, 0.0).cumsum(axis=1)
+        r = st.rng.random(len(valid)) * cum[:, -1]
+        hit = top & (cum >= r[:, None])
+        return np.where(hit.any(axis=1), hit.argmax(axis=1), top.argmax(axis=1))
+
+    def customize(self, st):
+        n = len(st.phase)
+        chosen = np.searchsorted(self.outcome_prob, st.rng.random(n), side='right')
+        chosen = np.minimum(chosen, len(self.outcomes) - 1)
+        st.real[:] = self.outcome_real[chosen]
+        st.val[:] = st.real
+        st.tags[:] = self.outcome_tags[chosen]
+        st.items[:] = self.outcome_items[chosen]
+        st.required[:] = self.outcome_required[chosen]
+        self.clamp_values(st, np.arange(n))
+
+    def start_ending(self, st, rows, ending_idx=None):
+        if not len(rows):
+            return
+        st.page[rows] = -1
+        if ending_idx is not None:
+            st.phase[rows] = ENDED
+            st.ending[rows] = ending_idx
+            return
+        valid = np.ones((len(rows), len(self.ending_ids)), dtype=bool)
+        for j, eid in enumerate(self.ending_ids):
+            cond = self.project.endings[eid].get("condition")
+            if cond:
+                valid[:, j] = self.vc.condition(cond)(st, rows)
+        has = valid.any(axis=1)
+        st.phase[rows[~has]] = STUCK
+        rows, valid = rows[has], valid[has]
+        if not len(rows):
+            return
+        pr = np.where(valid, self.ending_priority, -np.inf)
+        top = valid & (self.ending_priority == pr.max(axis=1)[:, None])
+        st.phase[rows] = ENDED
+        st.ending[rows] = top.argmax(axis=1)
+
+    def new_event(self, st, rows):
+        if not len(rows):
+            return
+        st.round[rows] += 1
+        max_round = self.project.max_round
+        if max_round != 0 and max_round is not None:
+            over = st.round[rows] > max_round
+            self.start_ending(st, rows[over])
+            rows = rows[~over]
+            if not len(rows):
+                return
+
+        valid = ~(st.completed[rows] & self.scene_once)
+        for j, sid in enumerate(self.scene_ids):
+            scene = self.project.scenes[sid]
+            if "condition" in scene:
+                valid[:, j] &= self.vc.condition(scene["condition"])(st, rows)
+        has = valid.any(axis=1)
+        self.start_ending(st, rows[~has])
+        rows, valid = rows[has], valid[has]
+        if not len(rows):
+            return
+
+        chosen = self.pick(st, valid, self.scene_priority, self.scene_weight)
+        st.scene[rows] = chosen
+        once = self.scene_once[chosen]
+        st.completed[rows[once], chosen[once]] = True
+        st.visits += np.bincount(chosen, minlength=len(self.scene_ids))
+        st.visited[rows, chosen] = True
+        start = self.scene_start[chosen]
+        st.page[rows] = start
+        st.locked[rows] = 0
+        st.phase[rows[start < 0]] = STUCK
+
+    def next_round(self, st, rows):
+        self.execute_events(st, self.project.setting_events, rows)
+        self.new_event(st, rows)
+
+    def handle_branch_to(self, st, sid, branches, rows):
+        valid = np.ones((len(rows), len(branches)), dtype=bool)
+        for j, b in enumerate(branches):
+            if b.get("condition"):
+                valid[:, j] = self.vc.condition(b["condition"])(st, rows)
+        has = valid.any(axis=1)
+        fallthrough = rows[~has]
+        rows, valid = rows[has], valid[has]
+
+        goto_next = [fallthrough]
+        if len(rows):
+            priority = np.array([number_field(b, "priority", 0) for b in branches])
+            weight = np.array([number_field(b, "weight", 1) for b in branches])
+            chosen = self.pick(st, valid, priority, weight)
+            for j, b in enumerate(branches):
+                sub = rows[chosen == j]
+                if not len(sub):
+                    continue
+                kind = b.get("type")
+                if kind == "page":
+                    page = self.page_index.get((sid, b.get("value")), -1)
+                    st.page[sub] = page
+                    st.locked[sub] = 0
+                    if page < 0:
+                        st.phase[sub] = STUCK
+                elif kind == "ending":
+                    if b.get("value") in self.project.endings:
+                        self.start_ending(st, sub, self.ending_ids.index(b["value"]))
+                    else:
+                        st.phase[sub] = STUCK
+                        st.page[sub] = -1
+                else:
+                    goto_next.append(sub)
+        self.next_round(st, np.concatenate(goto_next))
+
+    def step_page(self, st, page, rows):
+        sid = self.pages[page][0]
+        groups = self.project.page_groups[self.pages[page]]
+        buttons = [(gi, button) for gi, group in enumerate(groups) for button in group]
+        if not buttons:
+            st.phase[rows] = STUCK
+            return
+
+        enabled = np.empty((len(rows), len(buttons)), dtype=bool)
+        for j, (gi, button) in enumerate(buttons):
+            mask = (st.locked[rows] & (1 << gi)) == 0
+            if "condition" in button:
+                mask &= self.vc.condition(button["condition"])(st, rows)
+            enabled[:, j] = mask
+        count = enabled.sum(axis=1)
+        st.phase[rows[count == 0]] = STUCK
+        rows, enabled, count = rows[count > 0], enabled[count > 0], count[count > 0]
+        if not len(rows):
+            return
+
+        # 가능한 선택지 중 하나를 균등하게 고른다 (engine.Game.play 의 기본 정책과 같음)
+        target = (st.rng.random(len(rows)) * count).astype(np.int64) + 1
+        chosen = (enabled.cumsum(axis=1) >= target[:, None]).argmax(axis=1)
+
+        for j, (gi, button) in enumerate(buttons):
+            sub = rows[chosen == j]
+            if not len(sub):
+                continue
+            self.execute_events(st, button.get("events", []), sub)
+            st.locked[sub] |= 1 << gi
+            if button.get("branch"):
+                self.handle_branch_to(st, sid, button["branch"], sub)
+
+    def run_chunk(self, n, rng, max_steps=10000):
+        st = BatchState(n, self, rng)
+        with np.errstate(all='ignore'):
+            self.customize(st)
+            self.new_event(st, np.arange(n))
+            steps = 0
+            while True:
+                active = np.flatnonzero(st.phase == ACTIVE)
+                if not len(active):
+                    break
+                if steps >= max_steps:
+                    st.phase[active] = STUCK
+                    break
+                pages = st.page[active]
+                order = np.argsort(pages, kind='stable')
+                active, pages = active[order], pages[order]
+                bounds = np.flatnonzero(np.diff(pages)) + 1
+                for rows in np.split(active, bounds):
+                    self.step_page(st, int(st.page[rows[0]]), rows)
+                steps += 1
+        return st
+
+    def chunk_rows(self):
+        return max(1024, MAX_CELLS // max(1, len(self.scene_ids)))
+
+
+def simulate_batch(runs, seed=0, base_path=None, project=None, chunk_rows=None, outcomes=None):
+    project = project or load_project(base_path)
+    sim = BatchSimulator(project, outcomes=outcomes)
+    size = chunk_rows or sim.chunk_rows()
+
+    endings = Counter()
+    rounds = Counter()
+    scene_visits = np.zeros(len(sim.scene_ids), dtype=np.int64)
+    scene_runs = np.zeros(len(sim.scene_ids), dtype=np.int64)
+
+    started = time.perf_counter()
+    for i, start in enumerate(range(0, runs, size)):
+        rng = np.random.default_rng([seed, i])
+        st = sim.run_chunk(min(size, runs - start), rng)
+        ended = st.phase == ENDED
+        for idx, count in zip(*np.unique(st.ending[ended], return_counts=True)):
+            endings[sim.ending_ids[idx]] += int(count)
+        stuck = int((~ended).sum())
+        if stuck:
+            endings[None] += stuck
+        for day, count in zip(*np.unique(st.round, return_counts=True)):
+            rounds[int(day)] += int(count)
+        scene_visits += st.visits
+        scene_runs += st.visited.sum(axis=0)
+
+    return {
+        "runs": runs,
+        "seed": seed,
+        "workers": 1,
+        "elapsed": time.perf_counter() - started,
+        "endings": dict(endings),
+        "rounds": dict(sorted(rounds.items())),
+        "scene_visits": {sid: int(v) for sid, v in zip(sim.scene_ids, scene_visits) if v},
+        "scene_runs": {sid: int(v) for sid, v in zip(sim.scene_ids, scene_runs) if v},
+    }
@@ -0,0 +1,119 @@
+import json
+import os
+import random
+
+from engine import Game, load_project
+from simulate import simulate
+
+# ---------------------------------------------------------------------------
+# 커버리지
+#
+# 무작위 진행이나 기록된 경로를 돌리면서 장면, 페이지, 선택지, 분기, 설정 이벤트 조건이
+# 몇 번 지나갔는지 센다. 한 번도 안 지나간 것과 드물게 지나간 것을 알려 준다.
+# ---------------------------------------------------------------------------
+
+SECTIONS = [
+    ("scene", "장면"),
+    ("page", "페이지"),
+    ("button", "선택지"),
+    ("branch", "분기"),
+    ("setting", "설정 이벤트 조건"),
+]
+
+
+def from_simulation(project, runs, seed=0, workers=None, base_path=None, in_process=False):
+    report = simulate(runs, workers=workers, seed=seed, base_path=base_path, coverage=True,
+                      project=project if in_process else None)
+    return report["coverage"] or [0] * project.coverage.size, runs
+
+
+def from_traces(project, traces):
+    game = Game(project, counting=True)
+    for trace in traces:
+        game.rng = random.Random(trace["seed"])
+        game.play()
+    return game.counts, len(traces)
+
+
+def describe(label):
+    kind = label[0]
+    if kind == "scene":
+        return label[1]
+    if kind == "page":
+        return f"{label[1]}/{label[2]}"
+    if kind == "button":
+        _, sid, pid, gi, bi, title = label
+        return f"{sid}/{pid} [{gi}.{bi}] '{title}'"
+    if kind == "branch":
+        _, sid, pid, gi, bi, k, branch_type, value = label
+        target = f"{branch_type} {value}" if value is not None else branch_type
+        return f"{sid}/{pid} [{gi}.{bi}] 분기 {k} ({target})"
+    if kind == "setting":
+        return f"#{label[1]} {label[2]}"
+    return str(label)
+
+
+def summarize(project, counts):
+    # 편집기 목록에 붙일 수 있는 모양: {"scenes": {sid: n}, "pages": {sid: {pid: n}}}
+    cov = project.coverage
+    pages = {}
+    for (sid, pid), slot in cov.page.items():
+        pages.setdefault(sid, {})[pid] = counts[slot]
+    return {
+        "scenes": {sid: counts[slot] for sid, slot in cov.scene.items()},
+        "pages": pages,
+    }
+
+
+def format_coverage(project, counts, runs, rare=0.01):
+    cov = project.coverage
+    runs = runs or 1
+    setting_runs = counts[cov.setting_runs] or 1
+    lines = [f"{runs}판 기준 (드묾: 판당 {rare:g}회 미만)"]
+    for kind, title in SECTIONS:
+        entries = [(label, counts[slot]) for slot, label in enumerate(cov.labels) if label[0] == kind]
+        if not entries:
+            continue
+        never = [label for label, n in entries if n == 0]
+        scarce = [(label, n) for label, n in entries if 0 < n / runs < rare]
+        lines.append("")
+        lines.append(f"[{title}] {len(entries)}개 중 미도달 {len(never)}개, 드묾 {len(scarce)}개")
+        for label in never:
+            lines.append(f"  0회       {describe(label)}")
+        for label, n in scarce:
+            lines.append(f"  {n:<9} {describe(label)}")
+        if kind == "setting":
+            for label, n in entries:
+                lines.append(f"  통과 {n / setting_runs * 100:6.2f}%  {describe(label)}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from engine import default_base_path
+    from replay import GOLDEN_PATH, load_traces
+
+    parser = argparse.ArgumentParser(description="장면, 페이지, 선택지, 분기, 설정 이벤트 조건의 커버리지를 셉니다.")
+    parser.add_argument("-n", "--runs", type=int, default=10000)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    parser.add_argument("--traces", nargs='?', const='', default=None,
+                        help=f"무작위 진행 대신 기록된 경로를 사용 (기본 {GOLDEN_PATH})")
+    parser.add_argument("--rare", type=float, default=0.01, help="판당 이 횟수 미만이면 드묾으로 표시")
+    parser.add_argument("--json", default=None, help="카운터를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    project = load_project(args.base)
+    if args.traces is not None:
+        path = args.traces or os.path.join(args.base or default_base_path(), GOLDEN_PATH)
+        counts, runs = from_traces(project, load_traces(path))
+    else:
+        counts, runs = from_simulation(project, args.runs, seed=args.seed, workers=args.workers, base_path=args.base)
+    print(format_coverage(project, counts, runs, rare=args.rare))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"runs": runs, "counts": [[list(label), n] for label, n in zip(project.coverage.labels, counts)]},
+                      f, indent=4, ensure_ascii=False)
@@ -3,23 +3,86 @@ from tkinter import ttk, messagebox, font
 import json
 import sys
 import os
-from http.server import SimpleHTTPRequestHandler, HTTPServer
-import threading, webbrowser
-import webbrowser
+import time
 import threading
-
-DATA_FILES = {
-    "Intro": "data/intro.json",
-    "Resource": "data/resource.json",
-    "Custom": "data/custom.json",
-    "Scene": "data/scenes.json",
-    "Endings": "data/endings.json",
-    "Setting": "data/setting.json",
+import sqlite3
+from engine import DATA_FILES, Project
+from saver import Frozen, SaveWorker, snapshot
+from undo import UndoLog, thaw
+from journal import JOURNAL_PATH, Journal
+from thumbnails import CACHE_DIR as THUMBNAIL_DIR, ThumbnailCache, ThumbnailLoader
+from vlist import VirtualList
+from search import SearchIndex, describe_path, snippet
+from xref import CrossReferences
+from watcher import FileWatcher, diff_entries, merge_order
+from scenestore import SceneStore, SceneStub, is_sharded
+from loader import DataLoader, format_error
+from sqlstore import SqlStore, is_sqlite
+
+FONT_CANDIDATES = ("Pretendard",)
+FALLBACK_FONT = "맑은 고딕"
+_font_family = None
+WATCH_INTERVAL_MS = 1000
+LOAD_POLL_MS = 30
+DATABASE_KEY = "Database"
+# 장면 파일을 다 읽지 못했을 때 (ensure_all_scenes 가 False) 사용처 목록에 붙인다
+INCOMPLETE_USAGES = "읽지 못한 장면 파일이 있어 사용처가 모두 나오지 않았을 수 있습니다."
+DATA_ATTRS = {
+    "Resource": "resource_data",
+    "Custom": "custom_data",
+    "Scene": "scene_data",
+    "Endings": "endings_data",
+    "Setting": "setting_data",
 }
 
+
+def default_font_family(root):
+    # font.families() 는 설치된 글꼴을 모두 훑으므로, 후보 글꼴만 실제로 잡히는지 묻고 결과를 한 번만 찾는다
+    global _font_family
+    if _font_family is None:
+        _font_family = FALLBACK_FONT
+        for family in FONT_CANDIDATES:
+            if font.Font(root=root, family=family).actual("family") == family:
+                _font_family = family
+                break
+    return _font_family
+
+
+class StartupProfile:
+    # --profile-startup 일 때 단계별로 걸린 시간을 모아 출력한다
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.started = self.last = time.perf_counter()
+        self.phases = []
+        self.finished = False
+
+    def mark(self, name):
+        if self.finished:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        self.finished = True
+        if not self.enabled:
+            return
+        print("[시작 시간]")
+        for name, elapsed in self.phases:
+            print(f"  {name:<24} {elapsed * 1000:8.1f}ms")
+        print(f"  {'합계':<24} {(self.last - self.started) * 1000:8.1f}ms")
+
+    def once(self, name, elapsed):
+        # 시작 뒤에 따로 일어나는 일 (탭을 처음 열 때 등)
+        if self.enabled:
+            print(f"[시작 시간] {name} {elapsed * 1000:.1f}ms")
+
+
 class JSONEditor(tk.Tk):
-    def __init__(self):
+    def __init__(self, profile_startup=False):
+        self.profile = StartupProfile(profile_startup)
         super().__init__()
+        self.profile.mark("Tk 초기화")
 
         if getattr(sys, 'frozen', False):
             self.base_path = os.path.dirname(sys.executable)
@@ -34,7 +97,15 @@ class JSONEditor(tk.Tk):
         file_menu.add_command(label="저장 (Ctrl+S)", command=self.save_data_json)
         file_menu.add_command(label="로드 (Ctrl+L)", command=self.load_data_list)
         file_menu.add_command(label="빌드 및 실행 (Ctrl+R)", command=self.build_and_run)
+        file_menu.add_command(label="골든 경로 검사", command=self.check_golden_traces)
+        file_menu.add_command(label="커버리지 측정", command=self.measure_coverage)
         menubar.add_cascade(label="파일", menu=file_menu)
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu.add_command(label="되돌리기 (Ctrl+Z)", command=self.undo)
+        edit_menu.add_command(label="다시 실행 (Ctrl+Y)", command=self.redo)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="전체 검색 (Ctrl+F)", command=self.open_search_panel)
+        menubar.add_cascade(label="편집", menu=edit_menu)
         self.config(menu=menubar)
 
         self.bind_all("<Control-s>", lambda event: self.save_data_json())
@@ -43,14 +114,74 @@ class JSONEditor(tk.Tk):
         self.bind_all("<Control-L>", lambda event: self.load_data_list())
         self.bind_all("<Control-r>", lambda event: self.build_and_run())
         self.bind_all("<Control-R>", lambda event: self.build_and_run())
-
-        available_fonts = font.families()
-        default_font = "Pretendard" if "Pretendard" in available_fonts else "맑은 고딕"
+        self.bind_all("<Control-z>", lambda event: self.undo())
+        self.bind_all("<Control-Z>", lambda event: self.undo())
+        self.bind_all("<Control-y>", lambda event: self.redo())
+        self.bind_all("<Control-Y>", lambda event: self.redo())
+        self.bind_all("<Control-f>", lambda event: self.open_search_panel())
+        self.bind_all("<Control-F>", lambda event: self.open_search_panel())
+
+        self._golden_job = None
+        self._golden_last = None
+        self._golden_check = None       # (작업, 조용히 도는지)
+        self._golden_rerun = None
+
+        self.save_worker = SaveWorker()
+        self.history = UndoLog(self.current_data)
+        self.journal = Journal(os.path.join(self.base_path, JOURNAL_PATH), self.current_data)
+        self.history.listeners.append(self.journal.append)
+        self.search_index = SearchIndex()
+        self.xref = CrossReferences()
+        self.history.listeners.append(self.update_indexes)
+        self.search_window = None
+        self._search_job = None
+        self._journal_job = None
+        self._save_seq = {}
+        self._compact_pending = False
+        self._loading = False
+        self.data_loader = None
+        self.thumbnails = ThumbnailCache(os.path.join(self.base_path, THUMBNAIL_DIR))
+        self.thumbnail_loader = ThumbnailLoader(self.thumbnails, self)
+        self._save_poll_job = None
+        self.last_findings = []
+        self.watcher = None
+        self._watch_job = None
+        self.disk_data = {}
+        self.scene_store = None
+        self.sql_store = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.profile.mark("저장 / 기록 / 색인 준비")
+
+        default_font = default_font_family(self)
+        self.profile.mark("글꼴 찾기")
+
+        # 저장 상태 표시줄 (누르면 마지막 검사 결과를 보여준다)
+        self.status_var = tk.StringVar(value="")
+        self.status_label = ttk.Label(self, textvariable=self.status_var, anchor='w', relief='sunken', padding=(6, 2))
+        self.status_label.pack(side='bottom', fill='x')
+        self.status_label.bind("<Button-1>", lambda event: self.show_findings())
+        # 불러오는 동안만 상태 표시줄 위에 보인다
+        self.progress_bar = ttk.Progressbar(self, mode='determinate', maximum=100)
 
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(expand=True, fill='both')
 
+        # 데이터는 창이 뜬 뒤에 읽고, 각 탭은 처음 열 때 만든다
         self.resource_data = {}
+        self.custom_data = {}
+        self.scene_data = {}
+        self.endings_data = {}
+        self.setting_data = {}
+        self.image_files = []
+        self.current_scene_id = None
+        self.coverage = None
+        self.analyze_worker = None
+        self._analyze_reset = True
+        self._analyze_poll_job = None
+        self._status_message = ""
+        self.touched_scenes = set()
+        self.dirty_data = set()
+        self.data_loaded = False
         self._suspend_update = False
 
         intro_frame = ttk.Frame(self.notebook)
@@ -76,14 +207,19 @@ class JSONEditor(tk.Tk):
         self.setting_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.setting_frame, text="설정")
 
-        self.build_custom_tab()
-        self.build_scene_tab()
-        self.build_endings_tab()
-        self.build_resource_tab()
-        self.build_image_tab()
-        self.build_setting_tab()
-
-        self.load_data_list()
+        # 탭 틀 -> (만들기, 데이터로 채우기)
+        self.tab_builders = {
+            self.custom_frame: ("커스텀", self.build_custom_tab, lambda: self.refresh_custom_list(select_index=0)),
+            self.scene_frame: ("장면", self.build_scene_tab,
+                               lambda: self.refresh_scene_list(selected_id=next(iter(self.scene_data), None))),
+            self.endings_frame: ("엔딩", self.build_endings_tab,
+                                 lambda: self.refresh_ending_list(selected_id=next(iter(self.endings_data), None))),
+            self.resource_frame: ("변수", self.build_resource_tab, lambda: self.refresh_resource_list(select_index=0)),
+            self.image_frame: ("이미지", self.build_image_tab, self.refresh_image_list),
+            self.setting_frame: ("설정", self.build_setting_tab, self.refresh_setting_tab),
+        }
+        self.built_tabs = set()
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
         self.style = ttk.Style(self)
         self.style.configure("TFrame", background="#f4f4f4")
@@ -91,23 +227,170 @@ class JSONEditor(tk.Tk):
         self.style.configure("TCheckbutton", background="#f4f4f4", font=(default_font, 10))
         self.style.configure("TButton", font=(default_font, 10))
         self.configure(background="#f4f4f4")
+        self.profile.mark("창 틀 만들기")
 
-    def load_data_list(self):
-        self.load_resource_json()
-        self.load_custom_json()
-        self.load_scene_json()
-        self.load_endings_json()
+        # 창을 먼저 그린 다음 (idle 콜백은 등록 순서대로 돌므로 창 그리기가 먼저다) 데이터를 읽는다
+        self.after_idle(self.finish_startup)
+
+    def finish_startup(self):
+        self.profile.mark("첫 화면 그리기")
+        self.load_data_list(recover=True, on_loaded=self.profile.report)
+
+    def on_tab_changed(self, event=None):
+        self.ensure_tab(self.nametowidget(self.notebook.select()))
+
+    def ensure_tab(self, frame):
+        # 처음 보이는 탭이면 지금 만들고, 데이터가 있으면 채운다
+        if frame not in self.tab_builders or frame in self.built_tabs:
+            return
+        name, build, populate = self.tab_builders[frame]
+        started = time.perf_counter()
+        self.built_tabs.add(frame)
+        build()
+        if self.data_loaded:
+            populate()
+        self.profile.once(f"탭 만들기: {name}", time.perf_counter() - started)
+
+    def tab_built(self, frame):
+        return frame in self.built_tabs
+
+    def show_tab(self, frame):
+        self.ensure_tab(frame)
+        self.notebook.select(frame)
+
+    def dataset_frame(self, dataset):
+        return {"Resource": self.resource_frame, "Custom": self.custom_frame, "Scene": self.scene_frame,
+                "Endings": self.endings_frame, "Setting": self.setting_frame}.get(dataset)
+
+    def populate_tabs(self):
+        for frame in self.built_tabs:
+            self.tab_builders[frame][2]()
+
+    def load_data_list(self, recover=False, on_loaded=None):
+        # 파일은 작업 스레드가 읽고 (창은 계속 움직인다), 다 읽으면 finish_loading 이 이어서 편집기에 넣는다
+        if self._loading:
+            return
+        self._loading = True
+        # data/project.sqlite 가 있으면 DB 를, 아니면 데이터 파일 (장면은 나눠 저장했을 수도 있다) 을 읽는다
+        self.sql_store = SqlStore(self.base_path) if is_sqlite(self.base_path) else None
+        self.scene_store = SceneStore(self.base_path) if not self.sql_store and is_sharded(self.base_path) else None
+        if self.sql_store:
+            jobs = [(key, lambda key=key: self.sql_store.load(key)) for key in DATA_ATTRS]
+        else:
+            jobs = [(key, self.data_path(key)) for key in DATA_ATTRS]
+        self.data_loader = DataLoader(jobs, prepare=self.prepare_loaded).start()
+        self.progress_bar['value'] = 0
+        self.progress_bar.pack(side='bottom', fill='x', before=self.notebook)
+        self.status_var.set("불러오는 중...")
+        self.after(LOAD_POLL_MS, lambda: self.poll_loading(recover, on_loaded))
+
+    def poll_loading(self, recover, on_loaded):
+        progress, result = self.data_loader.poll()
+        if progress:
+            name, fraction = progress
+            self.progress_bar['value'] = fraction * 100
+            self.status_var.set(f"불러오는 중... {name} ({fraction:.0%})")
+        if result is None:
+            self.after(LOAD_POLL_MS, lambda: self.poll_loading(recover, on_loaded))
+            return
+        self.progress_bar.pack_forget()
+        prepared, self.data_loader = self.data_loader.prepared, None
+        loaded, errors, elapsed = result
+        self.finish_loading(loaded, errors, recover, elapsed, prepared)
+        if on_loaded:
+            on_loaded()
+
+    def prepare_loaded(self, loaded):
+        # DataLoader 스레드에서 불린다. Tk 와 편집기 상태는 건드리지 않고 읽은 값만 보고
+        # 기준 사본과 검색 / 참조 색인을 만들어 둔다 (큰 프로젝트에서 창이 멈추지 않게)
+        if "Scene" in loaded and self.scene_store:
+            # 목차만 읽었다. 장면 내용은 고를 때 ensure_scene 이 읽는다
+            loaded["Scene"] = {sid: SceneStub(entry) for sid, entry in loaded["Scene"].items()}
+        search_index = SearchIndex()
+        search_index.build(loaded)
+        xref = CrossReferences()
+        xref.build(loaded)
+        return snapshot(loaded), search_index, xref
+
+    def finish_loading(self, loaded, errors, recover, elapsed, prepared=None):
+        self.coverage = None
+        self._analyze_reset = True
+        self.touched_scenes = set()
+        self.dirty_data = set()
+        if prepared is None:
+            prepared = self.prepare_loaded(loaded)
+        disk, self.search_index, self.xref = prepared
+        self.apply_loaded(loaded, errors)
         self.load_image_list()
-        self.load_setting_json()
+        # 파일에 든 내용. 바깥에서 파일이 바뀌면 이것과 비교해 어느 쪽이 고쳤는지 가린다
+        # 읽지 못한 파일은 이전 값을 그대로 쓰므로 그 값으로 기준과 색인을 채운다
+        data = self.current_data()
+        self.disk_data = disk
+        for key in data:
+            if key not in loaded:
+                self.disk_data[key] = snapshot(data[key])
+                self.reindex(key, data[key])
+        self.profile.mark("데이터 읽기 / 색인")
+
+        # 켤 때는 저장하지 못하고 꺼진 편집을 되살리고, 직접 다시 불러올 때는 버린다
+        recovered = 0
+        if recover:
+            try:
+                touched, recovered = self.journal.replay(self.data_mtimes())
+            except Exception as e:
+                messagebox.showerror("편집 기록 복구 실패", str(e))
+                touched = {}
+            self.dirty_data.update(touched)
+            self.touched_scenes.update(touched.get("Scene", ()))
+            for key, entries in touched.items():
+                self.reindex(key, entries)
+        if not recovered:
+            self.journal.clear()
+        self.history.reset()
+        self.profile.mark("편집 기록 복구 / 되돌리기 기준")
+        self.data_loaded = True
+        if self.search_window is not None and self.search_window.winfo_exists():
+            self.schedule_search()
+        self.populate_tabs()
+        self.profile.mark("열린 탭 채우기")
+        self.start_watcher()
+        self.profile.mark("파일 감시 시작")
+        self._loading = False
+        self.set_status(f"불러옴 {time.strftime('%H:%M:%S')} (파일 읽기 {elapsed * 1000:.0f}ms)")
+        if recovered:
+            if "Scene" in touched:
+                self.schedule_golden_check()
+            self.set_status(f"저장되지 않은 편집 {recovered}개를 복구했습니다.")
+            messagebox.showinfo("편집 복구", f"지난번에 저장되지 않은 편집 {recovered}개를 복구했습니다.\n"
+                                "확인한 뒤 저장하세요.")
+
+    def data_path(self, key):
+        # DB 를 쓰면 모든 파일 키가 DB 파일 하나다.
+        # 장면을 나눠 저장했으면 목차 파일이 장면 데이터의 대표 파일이다 (저장할 때 항상 마지막에 쓴다)
+        if self.sql_store:
+            return self.sql_store.path
+        if key == "Scene" and self.scene_store:
+            return self.scene_store.manifest_path
+        return os.path.join(self.base_path, DATA_FILES[key])
+
+    def data_mtimes(self):
+        mtimes = {}
+        for key in self.current_data():
+            path = self.data_path(key)
+            if os.path.exists(path):
+                mtimes[key] = os.stat(path).st_mtime_ns
+        return mtimes
 
     def load_image_list(self):
         image_dir = os.path.join(os.getcwd(), "image")
         if not os.path.exists(image_dir):
             os.makedirs(image_dir)
         self.image_files = [f for f in os.listdir(image_dir) if f.lower().endswith((".png", ".jpg", ".jpeg", ".gif"))]
-        self.image_listbox.delete(0, tk.END)
-        for img in self.image_files:
-            self.image_listbox.insert(tk.END, img)
+        if self.tab_built(self.image_frame):
+            self.refresh_image_list()
+
+    def refresh_image_list(self):
+        self.image_listbox.set_items([(img, img) for img in self.image_files])
 
     def make_scrollable_listbox(parent, height=6):
         frame = ttk.Frame(parent)
@@ -128,15 +411,8 @@ class JSONEditor(tk.Tk):
         title_label = ttk.Label(self.resource_right, text="변수 속성 설정", font=("맑은 고딕", 12, "bold"))
         title_label.pack(anchor='w', pady=(0, 10))
 
-        listbox_frame = ttk.Frame(self.resource_left)
-        listbox_frame.pack(side='left', fill='both', expand=True)
-
-        scrollbar = ttk.Scrollbar(listbox_frame, orient='vertical')
-        self.resource_listbox = tk.Listbox(listbox_frame, yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.resource_listbox.yview)
-
+        self.resource_listbox = VirtualList(self.resource_left)
         self.resource_listbox.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
         self.resource_listbox.bind("<<ListboxSelect>>", self.on_resource_select)
 
         btns = ttk.Frame(self.resource_left)
@@ -158,6 +434,14 @@ class JSONEditor(tk.Tk):
         down_btn.pack(pady=2)
         self.create_tooltip(down_btn, "선택한 변수를 아래로 이동합니다. 하단에 표시될 때, 위쪽의 변수가 먼저 표시됩니다.")
 
+        rename_btn = ttk.Button(btns, text="✏", command=self.rename_resource)
+        rename_btn.pack(pady=2)
+        self.create_tooltip(rename_btn, "선택한 변수의 id 를 바꿉니다. 이 변수를 쓰는 조건식과 이벤트도 함께 바뀝니다.")
+
+        usage_btn = ttk.Button(btns, text="🔍", command=lambda: self.show_usages(("res", self.current_rid), f"변수 {self.current_rid}"))
+        usage_btn.pack(pady=2)
+        self.create_tooltip(usage_btn, "선택한 변수가 쓰인 곳을 모두 보여줍니다.")
+
         self.resource_fields = {}
 
         for field, (label_text, tooltip_text) in {
@@ -234,15 +518,8 @@ class JSONEditor(tk.Tk):
         self.custom_right.pack(side='right', expand=True, fill='both', padx=10, pady=10)
 
         # 카테고리 리스트
-        listbox_frame = ttk.Frame(self.custom_left)
-        listbox_frame.pack(side='left', fill='both', expand=True)
-
-        scrollbar = ttk.Scrollbar(listbox_frame, orient='vertical')
-        self.custom_listbox = tk.Listbox(listbox_frame, yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.custom_listbox.yview)
-
+        self.custom_listbox = VirtualList(self.custom_left)
         self.custom_listbox.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
         self.custom_listbox.bind("<<ListboxSelect>>", self.on_custom_category_select)
 
         # 버튼 영역
@@ -410,6 +687,7 @@ class JSONEditor(tk.Tk):
                         entry.pop(field, None)
                 else:
                     entry[field] = val
+        self.mark_dirty("Custom", key)
 
     def add_custom_category(self):
         def validate_id(new_id):
@@ -459,6 +737,7 @@ class JSONEditor(tk.Tk):
                 "description": "",
                 "elements": []
             }
+            self.mark_dirty("Custom", new_id)
             popup.destroy()
             self.refresh_custom_list(select_index=len(self.custom_data)-1)
 
@@ -476,6 +755,7 @@ class JSONEditor(tk.Tk):
         name = self.custom_data[key].get("name", key)
         if messagebox.askyesno("삭제 확인", f"[{key}] 카테고리를 삭제하시겠습니까?"):
             self.custom_data.pop(key, None)
+            self.mark_dirty("Custom", key)
             self.refresh_custom_list(select_index=max(0, idx - 1))
 
 
@@ -519,6 +799,7 @@ class JSONEditor(tk.Tk):
             elements = self.custom_data[key].get("elements", [])
             if 0 <= idx < len(elements):
                 elements.pop(idx)
+                self.mark_dirty("Custom", key)
                 self.refresh_element_list()
 
     def open_choice_editor(self, type, category_key, element=None, index=None, callback=None):
@@ -538,6 +819,9 @@ class JSONEditor(tk.Tk):
 
         field_vars = {}
         data = element.copy() if element else {}
+        # 얕은 복사라 이벤트 / 분기 목록은 원래 데이터와 같이 바뀐다
+        owner = "Custom" if type == "custom" else "Scene"
+        owner_entry = category_key if type == "custom" else self.current_scene_id
 
         if type == "custom" and not element:
             cat_tag = self.custom_data[category_key].get("name", category_key).replace(" ", "_")
@@ -662,19 +946,15 @@ class JSONEditor(tk.Tk):
         image_preview.pack(fill='both', expand=True, pady=(4, 10))
 
         def update_image_preview():
-            from PIL import Image, ImageTk
             fname = image_var.get()
             if not fname:
                 image_preview.config(image='', text="이미지 미리보기")
                 return
             path = os.path.join("image", fname)
             try:
-                img = Image.open(path)
                 image_preview.update_idletasks()
                 max_w, max_h = image_preview.winfo_width() or 300, image_preview.winfo_height() or 300
-                if img.width > max_w or img.height > max_h:
-                    img.thumbnail((max_w, max_h))
-                popup.tk_preview = ImageTk.PhotoImage(img)
+                popup.tk_preview = self.thumbnails.photo(path, (max_w, max_h))
                 image_preview.config(image=popup.tk_preview, text='')
             except:
                 image_preview.config(image='', text='불러오기 실패')
@@ -732,6 +1012,7 @@ class JSONEditor(tk.Tk):
             if type == "custom":
                 idx += 2
             del data["events"][idx]
+            self.mark_dirty(owner, owner_entry)
             refresh_event_list()
 
         event_listbox.bind("<Double-Button-1>", lambda e: edit_event())
@@ -769,14 +1050,14 @@ class JSONEditor(tk.Tk):
                     branch_listbox.insert(tk.END, desc)
 
             def add_branch():
-                self.open_branch_editor(popup, category_key, branch_data=None, callback=lambda b: (branch_list.append(b), refresh_branch_list()))
+                self.open_branch_editor(popup, category_key, branch_data=None, callback=lambda b: (branch_list.append(b), self.mark_dirty(owner, owner_entry), refresh_branch_list()))
 
             def edit_branch(event=None):
                 sel = branch_listbox.curselection()
                 if not sel:
                     return
                 i = sel[0]
-                self.open_branch_editor(popup, category_key, branch_data=branch_list[i], callback=lambda b: (branch_list.__setitem__(i, b), refresh_branch_list()))
+                self.open_branch_editor(popup, category_key, branch_data=branch_list[i], callback=lambda b: (branch_list.__setitem__(i, b), self.mark_dirty(owner, owner_entry), refresh_branch_list()))
 
             branch_listbox.bind("<Double-Button-1>", edit_branch)
 
@@ -790,6 +1071,7 @@ class JSONEditor(tk.Tk):
                     return
                 if messagebox.askyesno("삭제 확인", "이 분기를 삭제하시겠습니까?"):
                     branch_list.pop(i)
+                    self.mark_dirty(owner, owner_entry)
                     refresh_branch_list()
 
             ttk.Button(branch_btns, text="➕", command=add_branch).pack(pady=2)
@@ -841,6 +1123,7 @@ class JSONEditor(tk.Tk):
                     elements[index] = data
                 else:
                     elements.append(data)
+            self.mark_dirty(owner, owner_entry)
 
             if callback:
                 callback(data)
@@ -910,7 +1193,7 @@ class JSONEditor(tk.Tk):
         target_label = ttk.Label(frame, text="대상")
         target_label.pack(anchor='w')
         target_combo = ttk.Combobox(frame, textvariable=target_var, state='readonly')
-        target_values = ["태그", "소지품"] + [self.resource_data[k].get("name", k) for k in self.resource_ids]
+        target_values = ["태그", "소지품"] + [res.get("name", k) for k, res in self.resource_data.items()]
         target_combo['values'] = target_values
         target_combo.pack(fill='x', pady=2)
         tip(target_combo, "변수 또는 태그 중에 효과를 적용할 것을 고릅니다.")
@@ -966,7 +1249,7 @@ class JSONEditor(tk.Tk):
             result = {
                 "type": type_var.get(),
                 "target": "tags" if target_var.get() == "태그" else "items" if target_var.get() == "소지품" else next(
-                    (k for k in self.resource_ids if self.resource_data[k].get("name") == target_var.get()), target_var.get()),
+                    (k for k in self.resource_data if self.resource_data[k].get("name") == target_var.get()), target_var.get()),
                 "value": value_var.get(),
             }
             op = operation_var.get()
@@ -1004,6 +1287,12 @@ class JSONEditor(tk.Tk):
                 events[index] = result
             else:
                 events.append(result)
+            if type == "custom":
+                self.mark_dirty("Custom", category_key)
+            elif type == "setting":
+                self.mark_dirty("Setting")
+            else:
+                self.mark_dirty("Scene", self.current_scene_id)
             popup.destroy()
 
 
@@ -1137,8 +1426,6 @@ class JSONEditor(tk.Tk):
 
 
     def build_scene_tab(self):
-        self.scene_data = {}  # id를 key로 하는 딕셔너리
-        self.current_scene_id = None
         self.scene_fields = {}
         self.page_widgets = {}
 
@@ -1149,14 +1436,10 @@ class JSONEditor(tk.Tk):
         self.scene_right.pack(side='right', expand=True, fill='both', padx=10, pady=10)
 
         # 리스트박스 및 스크롤
-        self.scene_listbox = tk.Listbox(self.scene_left)
+        self.scene_listbox = VirtualList(self.scene_left)
         self.scene_listbox.pack(side='left', fill='both', expand=True)
         self.scene_listbox.bind("<<ListboxSelect>>", self.on_scene_select)
 
-        scrollbar = ttk.Scrollbar(self.scene_left, orient="vertical", command=self.scene_listbox.yview)
-        scrollbar.pack(side='right', fill='y')
-        self.scene_listbox.config(yscrollcommand=scrollbar.set)
-
         # 버튼 프레임
         btn_frame = ttk.Frame(self.scene_left)
         btn_frame.pack(fill='x', pady=4)
@@ -1211,14 +1494,20 @@ class JSONEditor(tk.Tk):
         ttk.Button(page_btns, text="➕", command=self.add_page).pack(pady=2)
         ttk.Button(page_btns, text="✏", command=self.edit_page).pack(pady=2)
         ttk.Button(page_btns, text="❌", command=self.delete_page).pack(pady=2)
+        ttk.Button(page_btns, text="이름", command=self.rename_page).pack(pady=2)
+        ttk.Button(page_btns, text="🔍", command=self.show_page_usages).pack(pady=2)
 
 
     def refresh_scene_list(self, selected_id=0):
-        self.scene_listbox.delete(0, tk.END)
         self.scene_keys = sorted(self.scene_data.keys(), key=lambda k: -self.scene_data[k].get("priority", 0))
+        items = []
         for k in self.scene_keys:
             p = self.scene_data[k].get("priority", 0)
-            self.scene_listbox.insert(tk.END, f"{p}: {k}")
+            line = f"{p}: {k}"
+            if self.coverage and k in self.coverage["scenes"]:
+                line += f"  ({self.coverage['scenes'][k]})"
+            items.append((k, line))
+        self.scene_listbox.set_items(items)
         if self.scene_keys:
             if selected_id and selected_id in self.scene_keys:
                 select_index = self.scene_keys.index(selected_id)
@@ -1235,8 +1524,10 @@ class JSONEditor(tk.Tk):
             return
         idx = selection[0]
         key = self.scene_keys[idx]
+        entry = self.ensure_scene(key)
+        if entry is None:
+            return
         self.current_scene_id = key
-        entry = self.scene_data[key]
 
         for k, var in self.scene_fields.items():
             val = entry.get(k, False if isinstance(var, tk.BooleanVar) else "")
@@ -1276,6 +1567,8 @@ class JSONEditor(tk.Tk):
         for key, value in updated.items():
             if key != "condition":
                 self.scene_data[self.current_scene_id][key] = value
+        self.mark_dirty("Scene", currentKey)
+        self.schedule_golden_check()
 
         if should_refresh:
             self.refresh_scene_list(selected_id=currentKey)
@@ -1319,6 +1612,7 @@ class JSONEditor(tk.Tk):
                 }
             }
         }
+        self.mark_dirty("Scene", new_id)
         self.refresh_scene_list(selected_id=new_id)
 
 
@@ -1335,8 +1629,17 @@ class JSONEditor(tk.Tk):
         idx = selection[0]
         key = self.scene_keys[idx]
 
-        if messagebox.askyesno("삭제 확인", f"장면 '{key}'을 삭제하시겠습니까?"):
+        complete = self.ensure_all_scenes()
+        message = f"장면 '{key}'을 삭제하시겠습니까?"
+        orphaned = self.xref.orphaned_endings(key)
+        if orphaned:
+            message += "\n\n이 장면에서만 분기하는 엔딩이 있습니다 (조건으로만 도달 가능해집니다):\n" + \
+                       "\n".join(f"  - {eid}" for eid in orphaned)
+        if not complete:
+            message += "\n\n" + INCOMPLETE_USAGES
+        if messagebox.askyesno("삭제 확인", message, icon='question' if complete else 'warning'):
             del self.scene_data[key]
+            self.mark_dirty("Scene", key)
             remaining_keys = sorted(self.scene_data.keys(), key=lambda k: -self.scene_data[k].get("priority", 0))
             next_key = remaining_keys[max(0, idx - 1)] if remaining_keys else None
             self.refresh_scene_list(selected_id=next_key)
@@ -1355,6 +1658,10 @@ class JSONEditor(tk.Tk):
             summary = page.get("summary", "").replace("\n", " ").strip()
             summary_preview = (summary[:30] + "...") if len(summary) > 30 else summary
             line = f"{key} | {title} | {summary_preview}"
+            if self.coverage:
+                count = self.coverage["pages"].get(self.current_scene_id, {}).get(key)
+                if count is not None:
+                    line += f" | {count}회"
             self.page_listbox.insert(tk.END, line)
 
 
@@ -1379,8 +1686,13 @@ class JSONEditor(tk.Tk):
             messagebox.showwarning("삭제 불가", "시작 페이지는 삭제할 수 없습니다.")
             return
 
-        if messagebox.askyesno("삭제 확인", f"페이지 '{key}'를 삭제하시겠습니까?"):
+        usages = self.xref.usages(("page", self.current_scene_id, key))
+        message = f"페이지 '{key}'를 삭제하시겠습니까?"
+        if usages:
+            message = f"페이지 '{key}' 로 가는 분기가 {len(usages)}곳 있습니다.\n{self.usage_warning(usages)}\n\n" + message
+        if messagebox.askyesno("삭제 확인", message):
             self.scene_data[self.current_scene_id]["pages"].pop(key)
+            self.mark_dirty("Scene", self.current_scene_id)
             self.refresh_page_list()
 
 
@@ -1450,16 +1762,13 @@ class JSONEditor(tk.Tk):
         image_preview.pack(fill='both', expand=True, pady=2)
 
         def update_preview():
-            from PIL import Image, ImageTk
             fname = image_var.get()
             if not fname:
                 image_preview.config(image='', text="이미지 미리보기")
                 return
             path = os.path.join("image", fname)
             try:
-                img = Image.open(path)
-                img.thumbnail((200, 200))
-                preview = ImageTk.PhotoImage(img)
+                preview = self.thumbnails.photo(path, (200, 200))
                 image_preview.config(image=preview, text='')
                 image_preview.image = preview
             except:
@@ -1514,6 +1823,7 @@ class JSONEditor(tk.Tk):
         def add_choice():
             def on_save(choice_data):
                 choice_elements.append(choice_data)
+                self.mark_dirty("Scene", self.current_scene_id)
                 refresh_choice_list()
             self.open_choice_editor("scene", key, element=None, index=None, callback=on_save)
 
@@ -1524,6 +1834,7 @@ class JSONEditor(tk.Tk):
             idx = selection[0]
             def on_save(choice_data):
                 choice_elements[idx] = choice_data
+                self.mark_dirty("Scene", self.current_scene_id)
                 refresh_choice_list()
             self.open_choice_editor("scene", key, element=choice_elements[idx], index=idx, callback=on_save)
 
@@ -1536,6 +1847,7 @@ class JSONEditor(tk.Tk):
             idx = selection[0]
             if messagebox.askyesno("삭제 확인", "이 선택지를 삭제하시겠습니까?"):
                 del choice_elements[idx]
+                self.mark_dirty("Scene", self.current_scene_id)
                 refresh_choice_list()
 
         btn_frame = ttk.Frame(choice_frame)
@@ -1568,6 +1880,7 @@ class JSONEditor(tk.Tk):
                 "summary": summary_widget.get("1.0", "end").strip(),
                 "elements": elements
             }
+            self.mark_dirty("Scene", self.current_scene_id)
             popup.destroy()
             self.refresh_page_list()
 
@@ -1595,6 +1908,9 @@ class JSONEditor(tk.Tk):
         ttk.Button(self.ending_btn_frame, text="➕", command=self.add_ending).pack(fill='x', pady=2)
         self.del_ending_btn = ttk.Button(self.ending_btn_frame, text="❌", command=self.delete_ending)
         self.del_ending_btn.pack(fill='x', pady=2)
+        ttk.Button(self.ending_btn_frame, text="✏", command=self.rename_ending).pack(fill='x', pady=2)
+        ttk.Button(self.ending_btn_frame, text="🔍",
+                   command=lambda: self.show_usages(("ending", self.current_ending_id), f"엔딩 {self.current_ending_id}")).pack(fill='x', pady=2)
 
         # 오른쪽은 선택 시 생성
         self.ending_fields = {}
@@ -1664,16 +1980,13 @@ class JSONEditor(tk.Tk):
 
 
     def update_ending_image_preview(self):
-        from PIL import Image, ImageTk
         fname = self.ending_fields["image"].get()
         if not fname:
             self.ending_image_preview.config(image='', text="이미지 미리보기")
             return
         path = os.path.join("image", fname)
         try:
-            img = Image.open(path)
-            img.thumbnail((300, 300))
-            self.tk_ending_preview = ImageTk.PhotoImage(img)
+            self.tk_ending_preview = self.thumbnails.photo(path, (300, 300))
             self.ending_image_preview.config(image=self.tk_ending_preview, text='')
         except:
             self.ending_image_preview.config(image='', text='불러오기 실패')
@@ -1707,6 +2020,7 @@ class JSONEditor(tk.Tk):
             updated["elements"][0]["image"] = image_val
 
         self.endings_data[key] = updated
+        self.mark_dirty("Endings", key)
 
         if should_refresh:
             self.refresh_ending_list(selected_id=key)
@@ -1732,6 +2046,7 @@ class JSONEditor(tk.Tk):
                 }
             ]
         }
+        self.mark_dirty("Endings", new_id)
         self.refresh_ending_list(selected_id=new_id)
 
 
@@ -1744,8 +2059,16 @@ class JSONEditor(tk.Tk):
             return
         idx = selection[0]
         key = self.ending_keys[idx]
-        if messagebox.askyesno("삭제 확인", "이 엔딩을 삭제하시겠습니까?"):
+        complete = self.ensure_all_scenes()
+        usages = self.xref.usages(("ending", key))
+        message = "이 엔딩을 삭제하시겠습니까?"
+        if usages:
+            message = f"엔딩 '{key}' 으로 가는 분기가 {len(usages)}곳 있습니다.\n{self.usage_warning(usages)}\n\n" + message
+        if not complete:
+            message = INCOMPLETE_USAGES + "\n\n" + message
+        if messagebox.askyesno("삭제 확인", message, icon='question' if complete else 'warning'):
             del self.endings_data[key]
+            self.mark_dirty("Endings", key)
             remaining_keys = sorted(self.endings_data.keys(), key=lambda k: -self.endings_data[k].get("priority", 0))
             next_key = remaining_keys[max(0, idx - 1)] if remaining_keys else None
             self.refresh_ending_list(selected_id=next_key)
@@ -1778,14 +2101,8 @@ class JSONEditor(tk.Tk):
         self.image_right.pack(side='right', expand=True, fill='both', padx=10, pady=10)
 
         # 리스트 및 스크롤바
-        listbox_frame = ttk.Frame(self.image_left)
-        listbox_frame.pack(fill='both', expand=True)
-
-        scrollbar = ttk.Scrollbar(listbox_frame, orient='vertical')
-        self.image_listbox = tk.Listbox(listbox_frame, yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.image_listbox.yview)
-        self.image_listbox.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
+        self.image_listbox = VirtualList(self.image_left)
+        self.image_listbox.pack(fill='both', expand=True)
 
         self.image_listbox.bind("<<ListboxSelect>>", self.on_image_select)
 
@@ -1809,23 +2126,22 @@ class JSONEditor(tk.Tk):
         if not selection:
             self.image_label.config(text="이미지를 선택하세요.", image='')
             return
-        filename = self.image_files[selection[0]]
-        image_path = os.path.join("image", filename)
-        try:
-            from PIL import Image, ImageTk
-            image = Image.open(image_path)
-            
-            self.image_label.update_idletasks()
-            max_width = self.image_label.winfo_width() or 512
-            max_height = self.image_label.winfo_height() or 512
-
-            if image.width > max_width or image.height > max_height:
-                image.thumbnail((max_width, max_height))
-
-            self.tk_preview_image = ImageTk.PhotoImage(image)
-            self.image_label.config(image=self.tk_preview_image, text='')
-        except Exception as e:
-            self.image_label.config(text=f"이미지 표시 실패: {e}", image='')
+        idx = selection[0]
+        image_path = os.path.join("image", self.image_files[idx])
+        max_width = self.image_label.winfo_width() or 512
+        max_height = self.image_label.winfo_height() or 512
+
+        def show(photo, error):
+            if error is not None:
+                self.image_label.config(text=f"이미지 표시 실패: {error}", image='')
+                return
+            self.tk_preview_image = photo
+            self.image_label.config(image=photo, text='')
+
+        self.thumbnail_loader.load("image_tab", image_path, (max_width, max_height), show)
+        neighbours = [i for i in (idx + 1, idx - 1) if 0 <= i < len(self.image_files)]
+        self.thumbnail_loader.prefetch("image_tab", [os.path.join("image", self.image_files[i]) for i in neighbours],
+                                       (max_width, max_height))
 
     def add_image(self):
         from tkinter import filedialog
@@ -1902,27 +2218,32 @@ class JSONEditor(tk.Tk):
         preview_label = ttk.Label(right_frame, text="미리보기", anchor='center')
         preview_label.pack(fill='both', expand=True)
 
+        def show_preview(photo, error):
+            if not preview_label.winfo_exists():
+                return
+            if error is not None:
+                preview_label.config(image='', text='불러오기 실패')
+                return
+            popup.tk_preview = photo
+            preview_label.config(image=photo, text='')
+
         def on_select(event=None):
+            # 그림은 작업 스레드에서 읽고, 다 읽으면 show_preview 가 불린다
             sel = listbox.curselection()
             if not sel:
                 preview_label.config(image='', text='미리보기')
                 return
-            fname = listbox.get(sel[0])
-            path = os.path.join("image", fname)
-            try:
-                from PIL import Image, ImageTk
-                img = Image.open(path)
-                preview_label.update_idletasks()
-                max_w, max_h = preview_label.winfo_width() or 400, preview_label.winfo_height() or 400
-                if img.width > max_w or img.height > max_h:
-                    img.thumbnail((max_w, max_h))
-                img.thumbnail((512, 512))
-                popup.tk_preview = ImageTk.PhotoImage(img)
-                preview_label.config(image=popup.tk_preview, text='')
-            except:
-                preview_label.config(image='', text='불러오기 실패')
+            idx = sel[0]
+            path = os.path.join("image", listbox.get(idx))
+            max_w, max_h = preview_label.winfo_width() or 400, preview_label.winfo_height() or 400
+            size = (min(max_w, 512), min(max_h, 512))
+            preview_label.config(text='불러오는 중...')
+            self.thumbnail_loader.load(popup, path, size, show_preview)
+            neighbours = [i for i in (idx + 1, idx - 1, idx + 2, idx - 2) if 0 <= i < listbox.size()]
+            self.thumbnail_loader.prefetch(popup, [os.path.join("image", listbox.get(i)) for i in neighbours], size)
 
         listbox.bind("<<ListboxSelect>>", on_select)
+        popup.bind("<Destroy>", lambda e: self.thumbnail_loader.forget(popup) if e.widget is popup else None)
 
         def confirm():
             sel = listbox.curselection()
@@ -2001,6 +2322,10 @@ class JSONEditor(tk.Tk):
         ttk.Button(event_btns, text="✏", command=self.edit_setting_event).pack(pady=2)
         ttk.Button(event_btns, text="❌", command=self.delete_setting_event).pack(pady=2)
 
+    def refresh_setting_tab(self):
+        self.refresh_setting_fields()
+        self.refresh_setting_event_list()
+
     def refresh_setting_fields(self):
         round_val = str(self.setting_data.get("maxRound", 0))
         self.setting_round_var.set(round_val)
@@ -2034,6 +2359,7 @@ class JSONEditor(tk.Tk):
         idx = sel[0]
         if messagebox.askyesno("삭제 확인", "이 이벤트를 삭제하시겠습니까?"):
             self.setting_data.get("events", []).pop(idx)
+            self.mark_dirty("Setting")
             self.refresh_setting_event_list()
 
 
@@ -2066,60 +2392,49 @@ class JSONEditor(tk.Tk):
             input_entry.config(state=state if combo.get() == "(직접 입력)" else 'disabled')
         self.after_idle(self.update_current_resource)
 
-    def load_resource_json(self):
-        path = DATA_FILES["Resource"]
+    def apply_loaded(self, loaded, errors):
+        # 작업 스레드가 읽은 값을 편집기에 넣는다. 읽지 못한 파일은 이전 값을 그대로 둔다
+        for key, value in loaded.items():
+            setattr(self, DATA_ATTRS[key], value)
+        if errors:
+            messagebox.showerror("불러오기 오류", "\n\n".join(errors.values()))
+
+    def ensure_scene(self, sid):
+        # 아직 목차만 있는 장면이면 장면 파일을 읽어 바꿔 넣는다. 읽지 못하면 None
+        scene = self.scene_data.get(sid)
+        if not isinstance(scene, SceneStub):
+            return scene
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                self.resource_data = json.load(f)
-            self.refresh_resource_list(select_index=0)
+            scene = self.scene_store.load_scene(sid)
         except Exception as e:
-            messagebox.showerror("불러오기 오류", str(e))
-
-    def load_custom_json(self):
-        path = DATA_FILES["Custom"]
+            messagebox.showerror("불러오기 오류", format_error(self.scene_store.scene_path(sid), e))
+            return None
+        self.scene_data[sid] = scene
+        self.disk_data["Scene"][sid] = snapshot(scene)
+        # 읽은 것은 편집이 아니므로 되돌리기 기록 없이 기준과 색인만 맞춘다
+        self.history.rebase("Scene", sid)
+        self.search_index.update_entry("Scene", sid, self.current_data())
+        self.xref.update_entry("Scene", sid, self.current_data())
+        return scene
+
+    def ensure_all_scenes(self):
+        # 프로젝트 전체를 봐야 하는 기능 (검색, 사용처, 검사, 커버리지) 앞에서 부른다
+        if not self.scene_store:
+            return True
+        stubs = [sid for sid, scene in self.scene_data.items() if isinstance(scene, SceneStub)]
+        if not stubs:
+            return True
+        self.config(cursor="watch")
+        self.update_idletasks()
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                self.custom_data = json.load(f)
-            self.refresh_custom_list(select_index=0)
-        except Exception as e:
-            messagebox.showerror("불러오기 오류", str(e))
-
-    def load_scene_json(self):
-        path = DATA_FILES["Scene"]
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                self.scene_data = json.load(f)
-            first_key = next(iter(self.scene_data), None)
-            self.refresh_scene_list(selected_id=first_key)
-        except Exception as e:
-            messagebox.showerror("불러오기 오류", str(e))
-
-    def load_endings_json(self):
-        path = DATA_FILES["Endings"]
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                self.endings_data = json.load(f)
-            first_key = next(iter(self.endings_data), None)
-            self.refresh_ending_list(selected_id=first_key)
-        except Exception as e:
-            messagebox.showerror("불러오기 오류", str(e))
-
-    def load_setting_json(self):
-        path = DATA_FILES["Setting"]
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                self.setting_data = json.load(f)
-            self.refresh_setting_fields()
-            self.refresh_setting_event_list()
-        except Exception as e:
-            messagebox.showerror("불러오기 오류", str(e))
+            return all([self.ensure_scene(sid) is not None for sid in stubs])
+        finally:
+            self.config(cursor="")
 
 
     def refresh_resource_list(self, select_index=None):
-        self.resource_listbox.delete(0, tk.END)
         self.resource_ids = list(self.resource_data.keys())
-        for rid in self.resource_ids:
-            self.resource_listbox.insert(tk.END, f"{rid}")
+        self.resource_listbox.set_items([(rid, f"{rid}") for rid in self.resource_ids])
 
         if self.resource_ids:
             if select_index is None:
@@ -2132,10 +2447,8 @@ class JSONEditor(tk.Tk):
             self.on_resource_select()
 
     def refresh_custom_list(self, select_index=0):
-        self.custom_listbox.delete(0, tk.END)
         self.custom_keys = list(self.custom_data.keys())
-        for key in self.custom_keys:
-            self.custom_listbox.insert(tk.END, f"{key}")
+        self.custom_listbox.set_items([(key, f"{key}") for key in self.custom_keys])
         if self.custom_keys:
             if select_index is None:
                 select_index = self.custom_listbox.curselection()
@@ -2213,11 +2526,9 @@ class JSONEditor(tk.Tk):
                 updated[key] = val
         updated["value"] = updated.get("realValue", "")
         self.resource_data[rid] = updated
+        self.mark_dirty("Resource", rid)
 
-        idx = self.resource_ids.index(rid)
-        self.resource_listbox.delete(idx)
-        self.resource_listbox.insert(idx, f"{rid}")
-        self.resource_listbox.select_set(idx)
+        self.resource_listbox.set_text(rid, f"{rid}")
 
     def add_resource(self):
         def validate_id(new_id):
@@ -2271,6 +2582,7 @@ class JSONEditor(tk.Tk):
                 "positive": True,
                 "summary": True
             }
+            self.mark_dirty("Resource", new_id)
             popup.destroy()
             self.refresh_resource_list(select_index=len(self.resource_data)-1)
 
@@ -2285,11 +2597,20 @@ class JSONEditor(tk.Tk):
         rid = self.resource_ids[idx]
         name = self.resource_data[rid].get("name", rid)
 
-        confirm = messagebox.askyesno("삭제 확인", f"[{name}] 변수를 삭제하시겠습니까?")
+        complete = self.ensure_all_scenes()
+        usages = self.xref.usages(("res", rid), exclude=("Resource", rid))
+        warning = "" if complete else INCOMPLETE_USAGES + "\n\n"
+        if usages:
+            confirm = messagebox.askyesno("삭제 확인", f"{warning}[{name}] 변수는 {len(usages)}곳에서 쓰이고 있습니다.\n"
+                                          f"{self.usage_warning(usages)}\n\n그래도 삭제하시겠습니까?", icon='warning')
+        else:
+            confirm = messagebox.askyesno("삭제 확인", f"{warning}[{name}] 변수를 삭제하시겠습니까?",
+                                          icon='question' if complete else 'warning')
         if not confirm:
             return
 
         del self.resource_data[rid]
+        self.mark_dirty("Resource", rid)
         new_index = max(0, idx - 1)
         self.refresh_resource_list(select_index=new_index)
 
@@ -2302,6 +2623,7 @@ class JSONEditor(tk.Tk):
             return
         self.resource_ids[idx], self.resource_ids[idx-1] = self.resource_ids[idx-1], self.resource_ids[idx]
         self.resource_data = {rid: self.resource_data[rid] for rid in self.resource_ids}
+        self.mark_dirty("Resource")
         self.refresh_resource_list(select_index=idx - 1)
 
     def move_resource_down(self):
@@ -2310,6 +2632,7 @@ class JSONEditor(tk.Tk):
             return
         self.resource_ids[idx], self.resource_ids[idx+1] = self.resource_ids[idx+1], self.resource_ids[idx]
         self.resource_data = {rid: self.resource_data[rid] for rid in self.resource_ids}
+        self.mark_dirty("Resource")
         self.refresh_resource_list(select_index=idx + 1)
 
     def move_custom_up(self):
@@ -2319,6 +2642,7 @@ class JSONEditor(tk.Tk):
         idx = selection[0]
         self.custom_keys[idx - 1], self.custom_keys[idx] = self.custom_keys[idx], self.custom_keys[idx - 1]
         self.custom_data = {k: self.custom_data[k] for k in self.custom_keys}
+        self.mark_dirty("Custom")
         self.refresh_custom_list(select_index=idx - 1)
 
     def move_custom_down(self):
@@ -2328,6 +2652,7 @@ class JSONEditor(tk.Tk):
         idx = selection[0]
         self.custom_keys[idx + 1], self.custom_keys[idx] = self.custom_keys[idx], self.custom_keys[idx + 1]
         self.custom_data = {k: self.custom_data[k] for k in self.custom_keys}
+        self.mark_dirty("Custom")
         self.refresh_custom_list(select_index=idx + 1)
 
     def create_tooltip(self, widget, text):
@@ -2355,36 +2680,702 @@ class JSONEditor(tk.Tk):
         widget.bind("<Leave>", on_leave)
 
 
+    def mark_dirty(self, key, entry=None):
+        # 저장할 때 바뀐 파일만 다시 쓰도록 표시하고, 고친 항목을 되돌리기 기록에 남긴다
+        # (key 는 DATA_FILES 의 키, entry 는 그 안의 항목 키. 모르면 파일 전체를 비교한다)
+        if self._loading:
+            return
+        self.dirty_data.add(key)
+        self.history.record(key, None if entry is None else [entry])
+        if self._journal_job is None:
+            self._journal_job = self.after(1000, self.sync_journal)
+
+    def sync_journal(self):
+        self._journal_job = None
+        self.journal.sync()
+
+    def mark_dirty_many(self, targets):
+        # 여러 파일을 함께 고친 편집 (이름 바꾸기) 을 되돌리기 한 단계로 남긴다. targets: {파일 키: 항목 키들}
+        if self._loading:
+            return
+        self.dirty_data.update(targets)
+        self.history.record_many(targets)
+        if self._journal_job is None:
+            self._journal_job = self.after(1000, self.sync_journal)
+
+    def reindex(self, dataset, entries):
+        # 색인을 만든 뒤에 바뀐 항목만 검색 / 참조 색인에 다시 넣는다
+        data = self.current_data()
+        for entry in list(entries):
+            self.search_index.update_entry(dataset, entry, data)
+            self.xref.update_entry(dataset, entry, data)
+
+    def update_indexes(self, step):
+        # UndoLog 의 listener. 편집, 되돌리기, 다시 실행 모두 고친 항목만 다시 색인하고, 고친 장면은 검사 대상으로 모은다
+        data = self.current_data()
+        for dataset, entry in step.targets():
+            self.search_index.update_entry(dataset, entry, data)
+            self.xref.update_entry(dataset, entry, data)
+            if dataset == "Scene":
+                self.touched_scenes.add(entry)
+        if self.search_window is not None and self.search_window.winfo_exists():
+            self.schedule_search()
+
+    def open_search_panel(self):
+        # 색인은 불러오기 스레드가 만든다. 다 불러오기 전에는 열지 않는다
+        if not self.data_loaded or self._loading:
+            self.set_status("불러오는 중입니다. 색인이 끝나면 검색할 수 있습니다.")
+            return
+        if self.search_window is not None and self.search_window.winfo_exists():
+            self.search_window.lift()
+            self.search_entry.focus_set()
+            self.search_entry.select_range(0, tk.END)
+            return
+        self.ensure_all_scenes()
+
+        window = tk.Toplevel(self)
+        window.title("전체 검색")
+        window.geometry("720x420")
+        window.transient(self)
+        self.search_window = window
+        self.search_hits = []
+
+        top = ttk.Frame(window)
+        top.pack(fill='x', padx=8, pady=(8, 4))
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(top, textvariable=self.search_var)
+        self.search_entry.pack(side='left', fill='x', expand=True)
+        self.search_count_var = tk.StringVar(value="")
+        ttk.Label(top, textvariable=self.search_count_var, width=24, anchor='e').pack(side='right', padx=(8, 0))
+        ttk.Label(window, text="장면 제목, 페이지 요약과 본문, 선택지, 커스텀 설명, 엔딩, 조건식과 이벤트 값을 찾습니다. "
+                               "초성(예: ㅁㅅㅌ)으로도 찾을 수 있습니다.",
+                  wraplength=700, foreground="#666").pack(fill='x', padx=8)
+
+        body = ttk.Frame(window)
+        body.pack(fill='both', expand=True, padx=8, pady=8)
+        scrollbar = ttk.Scrollbar(body, orient='vertical')
+        self.search_listbox = tk.Listbox(body, yscrollcommand=scrollbar.set, activestyle='none')
+        scrollbar.config(command=self.search_listbox.yview)
+        self.search_listbox.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        self.search_var.trace_add('write', lambda *args: self.schedule_search())
+        self.search_entry.bind("<Return>", lambda e: self.jump_to_search_hit(0))
+        self.search_entry.bind("<Down>", lambda e: (self.search_listbox.focus_set(), self.search_listbox.selection_set(0)))
+        self.search_listbox.bind("<Double-Button-1>", lambda e: self.jump_to_search_hit())
+        self.search_listbox.bind("<Return>", lambda e: self.jump_to_search_hit())
+        window.bind("<Escape>", lambda e: window.destroy())
+        self.search_entry.focus_set()
+
+    def schedule_search(self):
+        # 입력이 잠시 멈추면 찾는다
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(120, self.run_search)
+
+    def run_search(self):
+        self._search_job = None
+        if self.search_window is None or not self.search_window.winfo_exists():
+            return
+        query = self.search_var.get()
+        if self._loading:
+            self.search_count_var.set("색인 중...")
+            return
+        started = time.perf_counter()
+        self.search_hits = self.search_index.search(query)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.search_listbox.delete(0, tk.END)
+        if self.search_hits:
+            self.search_listbox.insert(0, *(f"{describe_path(hit['path'])}  {snippet(hit)}" for hit in self.search_hits))
+        self.search_count_var.set(f"{len(self.search_hits)}건 ({elapsed:.1f}ms)" if query.strip() else "")
+
+    def jump_to_search_hit(self, index=None):
+        if index is None:
+            selection = self.search_listbox.curselection()
+            if not selection:
+                return
+            index = selection[0]
+        if index >= len(self.search_hits):
+            return
+        self.jump_to(self.search_hits[index]["path"])
+
+    def jump_to(self, path):
+        # 검색 결과의 JSON 경로로 해당 탭의 항목을 고르고, 페이지 안이면 페이지 편집기를 연다
+        dataset, entry = path[0], path[1]
+        if dataset == "Scene" and entry in self.scene_data:
+            self.show_tab(self.scene_frame)
+            self.scene_listbox.select_set(self.scene_keys.index(entry))
+            self.on_scene_select()
+            if len(path) > 3 and path[2] == "pages":
+                pages = list(self.scene_data[entry].get("pages", {}))
+                if path[3] in pages:
+                    index = pages.index(path[3])
+                    self.page_listbox.selection_clear(0, tk.END)
+                    self.page_listbox.selection_set(index)
+                    self.page_listbox.see(index)
+                    self.open_page_editor(index=index)
+        elif dataset == "Endings" and entry in self.endings_data:
+            self.show_tab(self.endings_frame)
+            index = self.ending_keys.index(entry)
+            self.ending_listbox.selection_clear(0, tk.END)
+            self.ending_listbox.select_set(index)
+            self.ending_listbox.see(index)
+            self.on_ending_select()
+        elif dataset == "Custom" and entry in self.custom_data:
+            self.show_tab(self.custom_frame)
+            self.custom_listbox.select_set(self.custom_keys.index(entry))
+            self.on_custom_category_select()
+            if len(path) > 3 and path[2] == "elements" and path[3] < self.element_listbox.size():
+                self.element_listbox.selection_clear(0, tk.END)
+                self.element_listbox.selection_set(path[3])
+                self.element_listbox.see(path[3])
+        elif dataset == "Resource" and entry in self.resource_data:
+            self.show_tab(self.resource_frame)
+            self.resource_listbox.select_set(self.resource_ids.index(entry))
+            self.on_resource_select()
+        elif dataset == "Setting":
+            self.show_tab(self.setting_frame)
+            if entry == "events" and len(path) > 2 and path[2] < self.setting_event_listbox.size():
+                self.setting_event_listbox.selection_clear(0, tk.END)
+                self.setting_event_listbox.selection_set(path[2])
+                self.setting_event_listbox.see(path[2])
+
+    def show_usages(self, symbol, title):
+        # 참조 색인에서 바로 꺼내 보여주고, 두 번 누르면 그 자리로 간다
+        complete = self.ensure_all_scenes()
+        usages = self.xref.usages(symbol)
+        window = tk.Toplevel(self)
+        window.title(f"사용처 - {title}")
+        window.geometry("560x320")
+        window.transient(self)
+        summary = f"{title}: {len(usages)}곳에서 쓰입니다."
+        if not complete:
+            summary += "\n" + INCOMPLETE_USAGES
+        ttk.Label(window, text=summary).pack(anchor='w', padx=8, pady=(8, 4))
+        listbox = tk.Listbox(window, activestyle='none')
+        listbox.pack(fill='both', expand=True, padx=8, pady=(0, 8))
+        for path in usages:
+            listbox.insert(tk.END, describe_path(path))
+
+        def jump(event=None):
+            selection = listbox.curselection()
+            if selection:
+                self.jump_to(usages[selection[0]])
+
+        listbox.bind("<Double-Button-1>", jump)
+        listbox.bind("<Return>", jump)
+        window.bind("<Escape>", lambda e: window.destroy())
+
+    def usage_warning(self, usages, limit=8):
+        lines = [f"  - {describe_path(path)}" for path in usages[:limit]]
+        if len(usages) > limit:
+            lines.append(f"  ... 외 {len(usages) - limit}곳")
+        return "\n".join(lines)
+
+    def ask_new_name(self, title, old):
+        from tkinter.simpledialog import askstring
+        new = askstring(title, f"'{old}' 의 새 이름을 입력하세요.\n이 이름을 쓰는 조건식, 이벤트, 분기도 함께 바뀝니다.",
+                        initialvalue=old, parent=self)
+        if new is None or new.strip() == old:
+            return None
+        return new.strip()
+
+    def apply_rename(self, rename, *args):
+        try:
+            touched = rename(self.current_data(), *args)
+        except ValueError as e:
+            messagebox.showerror("이름 바꾸기 실패", str(e))
+            return None
+        self.mark_dirty_many(touched)
+        return touched
+
+    def rename_resource(self):
+        rid = getattr(self, 'current_rid', None)
+        if rid not in self.resource_data:
+            return
+        new = self.ask_new_name("변수 이름 바꾸기", rid)
+        if new is None:
+            return
+        self.update_current_resource()
+        # 변수는 어느 장면에서든 쓰일 수 있으니 모든 장면을 읽은 뒤 고친다
+        if not self.ensure_all_scenes():
+            return
+        count = len(self.xref.usages(("res", rid)))
+        touched = self.apply_rename(self.xref.rename_resource, rid, new)
+        if touched:
+            self.current_rid = new
+            self.refresh_datasets(touched)
+            self.set_status(f"변수 '{rid}' → '{new}' (참조 {count}곳을 고쳤습니다)")
+
+    def rename_ending(self):
+        key = getattr(self, 'current_ending_id', None)
+        if key not in self.endings_data:
+            return
+        new = self.ask_new_name("엔딩 이름 바꾸기", key)
+        if new is None:
+            return
+        self.update_current_ending()
+        if not self.ensure_all_scenes():
+            return
+        count = len(self.xref.usages(("ending", key)))
+        touched = self.apply_rename(self.xref.rename_ending, key, new)
+        if touched:
+            self.current_ending_id = new
+            self.refresh_datasets(touched)
+            self.set_status(f"엔딩 '{key}' → '{new}' (참조 {count}곳을 고쳤습니다)")
+
+    def selected_page_key(self):
+        selection = self.page_listbox.curselection()
+        if not selection or self.current_scene_id not in self.scene_data:
+            return None
+        return list(self.scene_data[self.current_scene_id].get("pages", {}))[selection[0]]
+
+    def rename_page(self):
+        key = self.selected_page_key()
+        if key is None:
+            return
+        new = self.ask_new_name("페이지 이름 바꾸기", key)
+        if new is None:
+            return
+        count = len(self.xref.usages(("page", self.current_scene_id, key)))
+        if self.apply_rename(self.xref.rename_page, self.current_scene_id, key, new):
+            self.refresh_page_list()
+            self.set_status(f"페이지 '{key}' → '{new}' (참조 {count}곳을 고쳤습니다)")
+
+    def show_page_usages(self):
+        key = self.selected_page_key()
+        if key is not None:
+            self.show_usages(("page", self.current_scene_id, key), f"페이지 {self.current_scene_id}/{key}")
+
+    def undo(self):
+        self.replay_history(self.history.undo, "되돌렸습니다", "되돌릴 편집이 없습니다.")
+
+    def redo(self):
+        self.replay_history(self.history.redo, "다시 실행했습니다", "다시 실행할 편집이 없습니다.")
+
+    def replay_history(self, action, message, empty_message):
+        # 팝업 편집 창이 열려 있으면 그 창이 들고 있는 데이터와 어긋나므로 무시한다
+        focus = self.focus_get()
+        if focus is not None and focus.winfo_toplevel() is not self:
+            return
+        step = action()
+        if step is None:
+            self.set_status(empty_message)
+            return
+
+        datasets = {dataset for dataset, _, _, _ in step.changes} | set(step.orders)
+        self.dirty_data.update(datasets)
+        self.refresh_datasets(datasets)
+        self.set_status(f"{message} ({len(step.changes)}개 항목)")
+
+    def refresh_datasets(self, datasets):
+        # 바뀐 파일의 목록만 다시 그리고, 보고 있던 항목이 남아 있으면 다시 선택한다 (아직 안 만든 탭은 열 때 채운다)
+        if "Scene" in datasets:
+            self.schedule_golden_check()
+        datasets = [d for d in datasets if self.tab_built(self.dataset_frame(d))]
+        if "Resource" in datasets:
+            rid = getattr(self, 'current_rid', None)
+            self.refresh_resource_list(select_index=list(self.resource_data).index(rid) if rid in self.resource_data else 0)
+        if "Custom" in datasets:
+            key = getattr(self, 'current_custom_key', None)
+            self.refresh_custom_list(select_index=list(self.custom_data).index(key) if key in self.custom_data else 0)
+        if "Scene" in datasets:
+            self.refresh_scene_list(selected_id=getattr(self, 'current_scene_id', None))
+        if "Endings" in datasets:
+            self.refresh_ending_list(selected_id=getattr(self, 'current_ending_id', None))
+        if "Setting" in datasets:
+            self.refresh_setting_fields()
+            self.refresh_setting_event_list()
+
     def save_data_json(self):
+        if not self.data_loaded or self._loading:
+            return
+        if self.tab_built(self.setting_frame):
+            max_round = int(self.setting_round_var.get()) if self.setting_round_var.get().isdigit() else 0
+            if self.setting_data.get("maxRound") != max_round:
+                self.setting_data["maxRound"] = max_round
+                self.mark_dirty("Setting")
+
+        # 여기서는 바뀐 데이터의 사본만 만들고, 파일 쓰기는 저장 스레드에 맡긴다
+        data = self.current_data()
+        jobs = {}
+        for key in data:
+            path = self.data_path(key)
+            if key in self.dirty_data or not os.path.exists(path):
+                if self.sql_store:
+                    # 바뀐 항목만 한 트랜잭션으로 쓴다
+                    jobs[key] = (self.sql_store, snapshot(self.sql_store.batch(key, data[key], self.disk_data[key])))
+                elif key == "Scene" and self.scene_store:
+                    # 나눠 저장한 장면은 바뀐 장면 파일과 목차만 쓴다
+                    jobs[key] = (self.scene_store, snapshot(self.scene_store.batch(data[key], self.disk_data[key])))
+                else:
+                    # 되돌리기 기록이 편집할 때 떠 둔 항목별 바이트를 넘긴다 (여기서는 복사하지 않는다)
+                    frozen = self.history.frozen([key]).get(key)
+                    jobs[key] = (path, snapshot(data[key]) if frozen is None else Frozen(frozen))
+                self._save_seq[key] = self.journal.seq
+        self.dirty_data.difference_update(jobs)
+
+        if not jobs:
+            self.set_status("바뀐 데이터가 없습니다.")
+        else:
+            self.save_worker.submit(jobs)
+            self.set_status("저장 중...")
+            if self._save_poll_job is None:
+                self._save_poll_job = self.after(50, self.poll_save_results)
+        self.analyze_data()
+
+    def poll_save_results(self):
+        self._save_poll_job = None
+        failures = []
+        # 결과는 작업 스레드가 쉬기 전에 큐에 들어가므로, 먼저 쉬는지 본 뒤 꺼내야 빠뜨리지 않는다
+        idle = self.save_worker.idle()
+        for saved, failed, elapsed in self.save_worker.poll():
+            for key, e in failed:
+                # 실패한 파일은 다음 저장 때 다시 쓴다
+                self.mark_dirty(key)
+                failures.append(f"{os.path.basename(self.data_path(key))}: {e}")
+            for key, data in saved:
+                self.journal.saved(key, self._save_seq.get(key, 0))
+                self._compact_pending = True
+                # 직접 쓴 파일은 외부 변경으로 보지 않는다
+                if hasattr(data, "apply_to"):
+                    data.apply_to(self.disk_data[key])
+                else:
+                    self.disk_data[key] = data
+                if self.watcher:
+                    self.watcher.acknowledge(self.data_path(key))
+                    if key == "Scene" and self.scene_store:
+                        self.watcher.acknowledge(self.scene_store.scene_dir)
+            if saved and not failed:
+                names = ", ".join(dict.fromkeys(os.path.basename(self.data_path(key)) for key, _ in saved))
+                self.set_status(f"저장됨 {time.strftime('%H:%M:%S')} ({names}, {elapsed * 1000:.0f}ms)")
+        if failures:
+            self.set_status("저장 실패: " + failures[0])
+            messagebox.showerror("저장 실패", "\n".join(failures))
+        if not idle:
+            self._save_poll_job = self.after(50, self.poll_save_results)
+        elif self._compact_pending and not failures:
+            # 파일에 다 들어간 편집은 기록에서 지운다
+            self._compact_pending = False
+            try:
+                self.journal.compact(self.data_mtimes())
+            except OSError as e:
+                print("[편집 기록 정리 오류]", e)
+        return not failures
+
+    def set_status(self, message):
+        # 검사 결과가 나중에 도착하면 같은 메시지에 다시 붙인다
+        self._status_message = message
+        findings = self.last_findings
+        if findings:
+            message += f"  |  검사 문제 {len(findings)}건 (눌러서 보기)"
+        if self._golden_last:
+            message += f"  |  골든 경로 {len(self._golden_last)}개 어긋남"
+        self.status_var.set(message)
+
+    def show_findings(self):
+        from analyzer import format_findings
+
+        if not self.last_findings:
+            return
+        lines = format_findings(self.last_findings[:15]).splitlines()
+        if len(self.last_findings) > 15:
+            lines.append(f"... 외 {len(self.last_findings) - 15}건")
+        messagebox.showwarning("검사 결과", f"문제 {len(self.last_findings)}건이 발견되었습니다.\n" + "\n".join(lines))
+
+    def flush_saves(self):
+        # 파일이 실제로 써져 있어야 하는 경우 (빌드, 종료) 밀린 저장을 기다린다
+        if self._save_poll_job:
+            self.after_cancel(self._save_poll_job)
+            self._save_poll_job = None
+        self.config(cursor="watch")
+        self.update_idletasks()
         try:
-            def full_path(key):
-                return os.path.join(self.base_path, DATA_FILES[key])
-
-            with open(full_path("Resource"), 'w', encoding='utf-8') as f:
-                json.dump(self.resource_data, f, indent=4, ensure_ascii=False)
-            with open(full_path("Custom"), 'w', encoding='utf-8') as f:
-                json.dump(self.custom_data, f, indent=4, ensure_ascii=False)
-            with open(full_path("Scene"), 'w', encoding='utf-8') as f:
-                json.dump(self.scene_data, f, indent=4, ensure_ascii=False)
-            with open(full_path("Endings"), 'w', encoding='utf-8') as f:
-                json.dump(self.endings_data, f, indent=4, ensure_ascii=False)
-            with open(full_path("Setting"), 'w', encoding='utf-8') as f:
-                self.setting_data["maxRound"] = int(self.setting_round_var.get()) if self.setting_round_var.get().isdigit() else 0
-                json.dump(self.setting_data, f, indent=4, ensure_ascii=False)
-
-            messagebox.showinfo("저장 완료", "모든 데이터가 저장되었습니다.")
+            self.save_worker.flush()
+        finally:
+            self.config(cursor="")
+        return self.poll_save_results()
+
+    def on_close(self):
+        if self.dirty_data:
+            answer = messagebox.askyesnocancel("종료", "저장하지 않은 편집이 있습니다. 저장할까요?")
+            if answer is None:
+                return
+            if answer:
+                self.save_data_json()
+        # 저장이 실패했으면 창을 닫지 않고 다시 저장할 기회를 준다
+        if not self.flush_saves():
+            return
+        if self.dirty_data:
+            # 저장하지 않기로 했으니 다음에 켤 때 되살리지 않는다
+            self.journal.clear()
+        else:
+            self.journal.close()
+        if self.watcher:
+            self.watcher.close()
+        self.destroy()
+
+    def start_watcher(self):
+        # 다시 불러올 때는 지금 디스크 상태를 새 기준으로 삼는다 (장면을 나눠 저장했는지가 바뀌었을 수 있어 새로 만든다)
+        if self.watcher is not None:
+            self.watcher.close()
+        if self.sql_store:
+            files = {self.sql_store.path: DATABASE_KEY}
+        else:
+            files = {self.data_path(key): key for key in self.current_data()}
+        dirs = {os.path.join(self.base_path, "image"): "image"}
+        if self.scene_store:
+            os.makedirs(self.scene_store.scene_dir, exist_ok=True)
+            dirs[self.scene_store.scene_dir] = "Scene"
+        self.watcher = FileWatcher(files, dirs)
+        if self._watch_job is None:
+            self._watch_job = self.after(WATCH_INTERVAL_MS, self.check_external_changes)
+
+    def check_external_changes(self):
+        self._watch_job = self.after(WATCH_INTERVAL_MS, self.check_external_changes)
+        # 저장 중이거나 (직접 쓴 파일을 아직 확인하지 않았다) 편집 창이 열려 있으면 다음에 본다
+        if self._loading or self._save_poll_job is not None or not self.save_worker.idle() or self.grab_current():
+            return
+        try:
+            keys = self.watcher.check()
+        except OSError as e:
+            print("[파일 감시 오류]", e)
+            return
+        if "image" in keys:
+            keys.discard("image")
+            self.load_image_list()
+        if DATABASE_KEY in keys:
+            # DB 는 어느 파일 키가 바뀌었는지 모르므로 모두 비교한다 (바뀐 항목이 없으면 조용히 넘어간다)
+            keys = set(DATA_ATTRS)
+        for key in keys:
+            self.apply_external_change(key)
+
+    def apply_external_change(self, key):
+        # 바뀐 파일 하나만 읽어, 항목 단위로 편집기 데이터에 반영한다
+        path = self.data_path(key)
+        name = os.path.basename(path)
+        try:
+            if self.sql_store:
+                disk = self.sql_store.load(key)
+            elif key == "Scene" and self.scene_store:
+                # 이미 읽은 장면만 파일에서 다시 읽는다. 나머지는 목차로 두었다가 고를 때 새 내용을 읽는다
+                loaded = [sid for sid, scene in self.scene_data.items() if not isinstance(scene, SceneStub)]
+                disk = self.scene_store.load_current(loaded)
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    disk = json.load(f)
+        except FileNotFoundError:
+            self.dirty_data.add(key)
+            self.set_status(f"{name} 이(가) 바깥에서 지워졌습니다. 저장하면 다시 만듭니다.")
+            return
+        except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+            self.set_status(f"바깥에서 바뀐 {name} 을(를) 읽지 못했습니다: {format_error(path, e).splitlines()[0]}")
+            return
+        if not isinstance(disk, dict):
+            self.set_status(f"바깥에서 바뀐 {name} 의 형식이 올바르지 않습니다.")
+            return
+
+        base = self.disk_data.get(key, {})
+        if disk == base and list(disk) == list(base):
+            # DB 의 다른 파일 키만 바뀌었다
+            return
+        memory = self.current_data()[key]
+        apply, conflicts = diff_entries(base, disk, memory)
+        if conflicts:
+            listing = "\n".join(f"  - {entry}" for entry in conflicts[:10])
+            if len(conflicts) > 10:
+                listing += f"\n  ... 외 {len(conflicts) - 10}개"
+            if messagebox.askyesno("외부 변경 충돌", f"{name} 이(가) 편집기 밖에서 바뀌었는데, 아래 항목은 여기서도 "
+                                   f"저장하지 않은 편집이 있습니다.\n{listing}\n\n"
+                                   "예: 파일 내용으로 바꿉니다. (여기서 한 편집은 되돌리기로 되살릴 수 있습니다)\n"
+                                   "아니요: 여기서 한 편집을 남깁니다. (저장하면 파일을 덮어씁니다)", icon='warning'):
+                apply += conflicts
+                conflicts = []
+
+        for entry in apply:
+            if entry in disk:
+                memory[entry] = snapshot(disk[entry])
+            else:
+                memory.pop(entry, None)
+        if list(disk) != list(base):
+            order = merge_order(disk, memory)
+            if order != list(memory):
+                items = {entry: memory[entry] for entry in order}
+                memory.clear()
+                memory.update(items)
+        self.disk_data[key] = disk
+
+        if apply:
+            # 바깥 변경도 되돌리기 / 색인 / 편집 기록에 한 단계로 남긴다 (저장할 필요는 없다)
+            self.history.record_many({key: apply})
+        if memory == disk and list(memory) == list(disk):
+            self.dirty_data.discard(key)
+        else:
+            self.dirty_data.add(key)
+        self.refresh_datasets({key})
+
+        message = f"바깥에서 바뀐 {name} 을(를) 반영했습니다 (항목 {len(apply)}개)"
+        if conflicts:
+            message += f", 충돌한 {len(conflicts)}개는 여기 편집을 남겼습니다"
+        self.set_status(message)
+
+    def current_data(self):
+        return {
+            "Resource": self.resource_data,
+            "Custom": self.custom_data,
+            "Scene": self.scene_data,
+            "Endings": self.endings_data,
+            "Setting": self.setting_data,
+        }
+
+    def analyze_data(self):
+        # 저장할 때마다 바뀐 장면만 작업 스레드에서 다시 검사한다. 결과는 poll_analysis 가 상태 표시줄에 붙인다
+        from analyzer import AnalyzeWorker
+
+        # 목차만 읽은 장면이 남아 있으면 검사를 미룬다 (고친 장면은 touched_scenes 에 남아 나중에 검사한다)
+        if any(isinstance(scene, SceneStub) for scene in self.scene_data.values()):
+            return
+        if self.analyze_worker is None:
+            self.analyze_worker = AnalyzeWorker()
+        frozen = self.history.frozen()
+        self.analyze_worker.submit(lambda: thaw(frozen), self.touched_scenes, reset=self._analyze_reset)
+        self._analyze_reset = False
+        self.touched_scenes = set()
+        if self._analyze_poll_job is None:
+            self._analyze_poll_job = self.after(100, self.poll_analysis)
+
+    def poll_analysis(self):
+        self._analyze_poll_job = None
+        # 결과는 작업 스레드가 쉬기 전에 큐에 들어가므로, 먼저 쉬는지 본 뒤 꺼내야 빠뜨리지 않는다
+        idle = self.analyze_worker.idle()
+        result = self.analyze_worker.poll()
+        if result is not None:
+            findings, error = result
+            if error is not None:
+                print("[검사 오류]", error)
+            self.last_findings = findings or []
+            self.set_status(self._status_message)
+        if not idle:
+            self._analyze_poll_job = self.after(100, self.poll_analysis)
+
+    def measure_coverage(self, runs=1000):
+        # 지금 편집 중인 데이터로 무작위 진행을 돌려 목록 옆에 방문 횟수를 표시한다
+        from coverage_map import from_simulation, summarize as summarize_coverage, format_coverage
+
+        if not self.ensure_all_scenes():
+            return
+        self.config(cursor="watch")
+        self.update_idletasks()
+        try:
+            project = Project(self.current_data())
+            counts, runs = from_simulation(project, runs, in_process=True)
         except Exception as e:
-            messagebox.showerror("저장 실패", str(e))
+            messagebox.showerror("커버리지 측정", str(e))
+            return
+        finally:
+            self.config(cursor="")
+        self.coverage = summarize_coverage(project, counts)
+        if self.tab_built(self.scene_frame):
+            self.refresh_scene_list(selected_id=self.current_scene_id)
+
+        popup = tk.Toplevel(self)
+        popup.title("커버리지")
+        text = tk.Text(popup, width=100, height=30)
+        text.insert("1.0", format_coverage(project, counts, runs))
+        text.config(state='disabled')
+        text.pack(fill='both', expand=True)
+
+    def schedule_golden_check(self):
+        # 장면을 고친 뒤 잠시 입력이 없으면 기록된 경로를 다시 진행해 본다
+        if self._golden_job:
+            self.after_cancel(self._golden_job)
+        self._golden_job = self.after(1000, lambda: self.check_golden_traces(quiet=True))
+
+    def check_golden_traces(self, quiet=False):
+        from replay import GOLDEN_PATH, VerifyJob
+
+        self._golden_job = None
+        path = os.path.join(self.base_path, GOLDEN_PATH)
+        if not os.path.exists(path):
+            if not quiet:
+                messagebox.showinfo("골든 경로 검사", f"{GOLDEN_PATH} 가 없습니다.\n"
+                                    "python replay.py record 로 먼저 기록하세요.")
+            return
+        if quiet and any(isinstance(scene, SceneStub) for scene in self.scene_data.values()):
+            # 저절로 돌 때는 장면 파일을 모두 읽지 않는다
+            return
+        if not self.ensure_all_scenes():
+            return
+        if self._golden_check:
+            # 돌고 있는 검사가 끝나면 지금 내용으로 한 번 더 돌린다 (메뉴에서 부른 것이 있으면 그것을 따른다)
+            self._golden_rerun = quiet if self._golden_rerun is None else self._golden_rerun and quiet
+            return
+        # 경로 진행은 작업 스레드에서 한다. 되돌리기 기록의 바이트를 넘기므로 편집기 쪽에서는 복사하지 않는다
+        frozen = self.history.frozen()
+        self._golden_check = (VerifyJob(path, lambda: thaw(frozen)).start(), quiet)
+        if not quiet:
+            self.set_status("골든 경로 검사 중...")
+        self.after(100, self.poll_golden_check)
+
+    def poll_golden_check(self):
+        from replay import format_report as format_trace_report
+
+        job, quiet = self._golden_check
+        result = job.poll()
+        if result is None:
+            self.after(100, self.poll_golden_check)
+            return
+        self._golden_check = None
+        report, error = result
+        rerun, self._golden_rerun = self._golden_rerun, None
+        if rerun is not None:
+            self.check_golden_traces(quiet=rerun)
+        if error is not None:
+            if quiet:
+                self.set_status(f"골든 경로 검사 실패: {error}")
+            else:
+                messagebox.showerror("골든 경로 검사", str(error))
+            return
+
+        diverged = [d["index"] for d in report["diverged"]]
+        previous, self._golden_last = self._golden_last, diverged
+        if quiet:
+            # 저절로 돈 검사는 창을 띄우지 않고 상태 표시줄에만 알린다 (어긋난 개수는 set_status 가 붙인다)
+            if diverged and diverged != previous:
+                self.set_status(f"골든 경로 #{diverged[0]} 부터 어긋났습니다. 파일 > 골든 경로 검사 로 자세히 보세요")
+            elif previous and not diverged:
+                self.set_status("골든 경로가 모두 다시 맞습니다.")
+            return
+        self.set_status(f"골든 경로 검사 완료 {time.strftime('%H:%M:%S')}")
+        lines = format_trace_report(report).splitlines()
+        if len(lines) > 16:
+            lines = lines[:16] + [f"... 외 {len(lines) - 16}개"]
+        show = messagebox.showwarning if diverged else messagebox.showinfo
+        show("골든 경로 검사", "\n".join(lines))
 
 
     def build_and_run(self):
         self.save_data_json()
+        self.flush_saves()
+        # script.js 는 데이터 파일을 읽으므로, DB 나 나눠 저장한 장면이면 파일을 다시 만든다
+        if self.sql_store or self.scene_store:
+            try:
+                if self.sql_store:
+                    self.sql_store.export()
+                else:
+                    self.scene_store.build()
+            except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+                messagebox.showerror("빌드 오류", str(e))
+                return
 
         if getattr(sys, 'frozen', False):
             base_path = os.path.dirname(sys.executable)
         else:
             base_path = os.path.dirname(os.path.abspath(__file__))
 
+        import webbrowser
+        from http.server import SimpleHTTPRequestHandler, HTTPServer
+
         def run_server():
             os.chdir(base_path)
             try:
@@ -2399,5 +3390,11 @@ class JSONEditor(tk.Tk):
 
 
 if __name__ == "__main__":
-    app = JSONEditor()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CYOA 데이터 편집기")
+    parser.add_argument("--profile-startup", action="store_true", help="시작할 때 단계별로 걸린 시간을 출력합니다.")
+    args = parser.parse_args()
+
+    app = JSONEditor(profile_startup=args.profile_startup)
     app.mainloop()
@@ -0,0 +1,860 @@
+import json
+import os
+import random
+import sys
+import tempfile
+from bisect import bisect_left
+
+from expression import (Compiler, js_add, js_div, js_includes, js_max, js_min, js_mul, js_sub,
+                        normalize_number, repeat_count, strict_equals, symbols, to_number)
+
+DATA_FILES = {
+    "Intro": "data/intro.json",
+    "Resource": "data/resource.json",
+    "Custom": "data/custom.json",
+    "Scene": "data/scenes.json",
+    "Endings": "data/endings.json",
+    "Setting": "data/setting.json",
+}
+
+
+def default_base_path():
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def load_data(base_path=None):
+    base_path = base_path or default_base_path()
+    # SQLite 저장소를 쓰는 프로젝트면 데이터 파일 (빌드 결과) 대신 DB 를 읽는다
+    from sqlstore import SqlStore, is_sqlite
+    if is_sqlite(base_path):
+        return SqlStore(base_path).load_all()
+    data = {}
+    for key, rel_path in DATA_FILES.items():
+        with open(os.path.join(base_path, rel_path), 'r', encoding='utf-8') as f:
+            data[key] = json.load(f)
+    # 장면을 나눠 저장한 프로젝트면 scenes.json (빌드 결과) 대신 장면 파일들을 읽는다
+    from scenestore import SceneStore, is_sharded
+    if is_sharded(base_path):
+        data["Scene"] = SceneStore(base_path).load_all()
+    return data
+
+
+def _umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def save_json(path, data):
+    # 같은 폴더의 임시 파일에 다 쓴 뒤 바꿔치기하므로, 쓰는 도중에 죽어도 원래 파일은 그대로 남는다
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 는 0600 으로 만들므로 원래 파일의 권한을 옮겨 준다
+        mode = os.stat(path).st_mode if os.path.exists(path) else 0o666 & ~_umask()
+        os.chmod(tmp_path, mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_project(base_path=None):
+    return Project(load_data(base_path))
+
+
+
+# ---------------------------------------------------------------------------
+# 가중치 추출
+#
+# script.js 는 r = random * 합계 에서 가중치를 차례로 빼다가 0 이하가 되는 곳을 고른다.
+# 누적합이 r 이상이 되는 첫 자리와 같으므로, 누적합을 유지하면 같은 난수로 같은 것이 뽑힌다.
+# ---------------------------------------------------------------------------
+
+def valid_weight(w):
+    return isinstance(w, (int, float)) and not isinstance(w, bool) and w == w and 0 <= w < float('inf')
+
+
+class WeightTree:
+    # 자리마다 가중치를 두고 부분합을 O(log n) 에 갱신 / 검색하는 Fenwick tree
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.weights = [0] * size
+        self.top_bit = 1 << max(size.bit_length() - 1, 0)
+
+    def set(self, i, weight):
+        delta = weight - self.weights[i]
+        if not delta:
+            return
+        self.weights[i] = weight
+        i += 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        result = 0
+        i = self.size
+        while i:
+            result += self.tree[i]
+            i -= i & -i
+        return result
+
+    def find(self, r):
+        # 누적합이 r 이상이 되는 첫 자리 (0 < r <= total)
+        pos = 0
+        step = self.top_bit
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] < r:
+                pos = nxt
+                r -= self.tree[nxt]
+            step >>= 1
+        return pos
+
+
+# ---------------------------------------------------------------------------
+# 프로젝트 데이터 / 게임 진행
+# ---------------------------------------------------------------------------
+
+class Project:
+    def __init__(self, data):
+        self.intro = data.get("Intro", [])
+        self.resources = data.get("Resource", {})
+        self.custom = data.get("Custom", {})
+        self.scenes = data.get("Scene", {})
+        self.endings = data.get("Endings", {})
+        self.setting = data.get("Setting", {})
+
+        self.scene_ids = list(self.scenes.keys())
+        self.setting_events = self.setting.get("events", [])
+        self.max_round = self.setting.get("maxRound")
+        self.limited_resources = [rid for rid, res in self.resources.items()
+                                  if "maxValue" in res or "minValue" in res]
+        self.compiler = Compiler(self.resources.keys())
+        # 페이지별 선택지 묶음 (choice 요소 하나 = 묶음 하나, 단독 button 도 묶음 하나)
+        self.page_groups = {}
+        for sid, scene in self.scenes.items():
+            for pid, page in scene.get("pages", {}).items():
+                groups = []
+                for el in page.get("elements", []):
+                    if el.get("type") == "choice":
+                        groups.append(el.get("elements", []))
+                    elif el.get("type") == "button":
+                        groups.append([el])
+                self.page_groups[(sid, pid)] = groups
+
+        self.build_dependency_index()
+        self._coverage = None
+        # reset() 직후의 customize() 에서 카테고리마다 가능한 조합은 앞 카테고리에서 고른 조합으로 정해지므로
+        # (앞의 선택들 -> 조합 목록) 으로 한 번만 나열한다. 커스텀 이벤트에 random 이 있으면 매번 나열한다
+        self.custom_option_cache = None if self.custom_uses_random() else {}
+
+    def build_dependency_index(self):
+        # 자원 id / tags / items / required -> 그 값을 읽는 조건식 (장면, 선택지, 분기, 엔딩)
+        # setValue 뒤에는 바뀐 값을 읽는 조건식만 다시 평가한다
+        self.scene_index = {sid: i for i, sid in enumerate(self.scene_ids)}
+        self.condition_readers = {}
+        self.cached_conditions = set()
+        self.scene_conditions = {}
+        self.volatile_scenes = []  # random 을 읽는 조건식은 매번 평가한다
+
+        # priority 가 같은 장면끼리 한 줄로 세워 두고 줄마다 가중치 트리를 쓴다
+        self.scene_tiers = {}
+        self.tier_slot = {}
+        self.scene_weight = {}
+        self.irregular_tiers = set()
+        for sid in self.scene_ids:
+            scene = self.scenes[sid]
+            tier = self.scene_tiers.setdefault(scene.get("priority", 0), [])
+            self.tier_slot[sid] = len(tier)
+            tier.append(sid)
+            weight = to_number(scene.get("weight", 1))
+            self.scene_weight[sid] = weight
+            if not valid_weight(weight):
+                # 음수 / NaN 가중치는 script.js 와 같은 순차 계산으로 처리한다
+                self.irregular_tiers.add(scene.get("priority", 0))
+        self.weight_tables = {}
+
+        def watch(expr):
+            key = self.compiler.key(expr)
+            found = symbols(self.compiler.tree(key))
+            if 'random' in found:
+                return None
+            self.cached_conditions.add(key)
+            for sym in found:
+                self.condition_readers.setdefault(sym, set()).add(key)
+            return key
+
+        for sid in self.scene_ids:
+            scene = self.scenes[sid]
+            if "condition" not in scene:
+                continue
+            key = watch(scene["condition"])
+            if key is None:
+                self.volatile_scenes.append(sid)
+            else:
+                self.scene_conditions.setdefault(key, []).append(sid)
+        for ending in self.endings.values():
+            if ending.get("condition"):
+                watch(ending["condition"])
+        for groups in self.page_groups.values():
+            for group in groups:
+                for button in group:
+                    if "condition" in button:
+                        watch(button["condition"])
+                    for b in button.get("branch") or []:
+                        if b.get("condition"):
+                            watch(b["condition"])
+
+        # maxValue / minValue 가 읽는 값이 바뀌면 제한된 자원의 value 도 바뀐다
+        clamp_reads = {}
+        self.volatile_resources = []
+        for rid in self.limited_resources:
+            res = self.resources[rid]
+            for field in ("maxValue", "minValue"):
+                if field in res:
+                    found = symbols(self.compiler.tree(res[field]))
+                    if 'random' in found:
+                        self.volatile_resources.append(rid)
+                    for sym in found:
+                        clamp_reads.setdefault(sym, set()).add(rid)
+        self.affects = {}
+        for sym in set(self.resources) | {'tags', 'items', 'required'}:
+            seen = {sym}
+            stack = [sym]
+            while stack:
+                for rid in clamp_reads.get(stack.pop(), ()):
+                    if rid not in seen:
+                        seen.add(rid)
+                        stack.append(rid)
+            self.affects[sym] = seen
+        # setValue 뒤에 제한을 다시 적용할 자원: 바뀐 값을 (거쳐서라도) 읽는 자원과 random 을 쓰는 자원, limited_resources 순서
+        volatile = set(self.volatile_resources)
+        self.reclamp = {sym: [rid for rid in self.limited_resources if rid in seen or rid in volatile]
+                        for sym, seen in self.affects.items()}
+
+    def expressions(self, events):
+        for e in events:
+            if e.get("type") == 'setValue':
+                yield e.get("value")
+                if "condition" in e:
+                    yield e["condition"]
+
+    def weight_table(self, entries):
+        # 조건 없는 분기 목록처럼 바뀌지 않는 목록의 (최고 priority 자리, 누적 가중치)
+        cached = self.weight_tables.get(id(entries))
+        if cached is not None and cached[0] is entries:
+            return cached[1]
+        max_priority = max(e.get("priority", 0) for e in entries)
+        top = [i for i, e in enumerate(entries) if e.get("priority", 0) == max_priority]
+        prefix = []
+        total = 0
+        for i in top:
+            weight = to_number(entries[i].get("weight", 1))
+            if not valid_weight(weight):
+                table = None
+                break
+            total += weight
+            prefix.append(total)
+        else:
+            table = (top, prefix)
+        self.weight_tables[id(entries)] = (entries, table)
+        return table
+
+    @property
+    def coverage(self):
+        if self._coverage is None:
+            self._coverage = CoverageIndex(self)
+        return self._coverage
+
+    def runtime_expressions(self):
+        # 커스텀이 끝난 뒤 진행 중에 평가될 수 있는 모든 식
+        for res in self.resources.values():
+            for field in ("maxValue", "minValue"):
+                if field in res:
+                    yield res[field]
+        for scene in self.scenes.values():
+            if "condition" in scene:
+                yield scene["condition"]
+        for ending in self.endings.values():
+            if ending.get("condition"):
+                yield ending["condition"]
+        for groups in self.page_groups.values():
+            for group in groups:
+                for button in group:
+                    if "condition" in button:
+                        yield button["condition"]
+                    yield from self.expressions(button.get("events", []))
+                    for b in button.get("branch") or []:
+                        if b.get("condition"):
+                            yield b["condition"]
+        yield from self.expressions(self.setting_events)
+
+    def read_symbols(self):
+        found = set()
+        for expr in self.runtime_expressions():
+            found |= symbols(self.compiler.tree(expr))
+        return found
+
+    def custom_uses_random(self):
+        for category in self.custom.values():
+            for el in category.get("elements", []):
+                exprs = list(self.expressions(el.get("events", [])))
+                if "condition" in el:
+                    exprs.append(el["condition"])
+                for expr in exprs:
+                    if 'random' in symbols(self.compiler.tree(expr)):
+                        return True
+        return False
+
+
+class CoverageIndex:
+    # 장면 / 페이지 / 선택지 / 분기 / 설정 이벤트마다 카운터 자리 하나
+    # 선택지와 분기는 데이터 객체의 id 로 찾는다 (Project 가 살아 있는 동안 바뀌지 않는다)
+    def __init__(self, project):
+        self.labels = []
+        self.scene = {}
+        self.page = {}
+        self.button = {}
+        self.branch = {}
+        self.setting = {}
+        for sid in project.scene_ids:
+            self.scene[sid] = self.add(("scene", sid))
+            for pid in project.scenes[sid].get("pages", {}):
+                self.page[(sid, pid)] = self.add(("page", sid, pid))
+                for gi, group in enumerate(project.page_groups[(sid, pid)]):
+                    for bi, button in enumerate(group):
+                        self.button[id(button)] = self.add(("button", sid, pid, gi, bi, button.get("title", "")))
+                        for k, b in enumerate(button.get("branch") or []):
+                            self.branch[id(b)] = self.add(("branch", sid, pid, gi, bi, k, b.get("type"), b.get("value")))
+        for i, e in enumerate(project.setting_events):
+            if e.get("type") == 'setValue' and "condition" in e:
+                self.setting[i] = self.add(("setting", i, e["condition"]))
+        self.setting_runs = self.add(("setting-runs",))
+        self.size = len(self.labels)
+
+    def add(self, label):
+        self.labels.append(label)
+        return len(self.labels) - 1
+
+
+class Game:
+    def __init__(self, project, rng=None, seed=None, tracing=False, counting=False):
+        self.project = project
+        self.rng = rng or random.Random(seed)
+        self.tracing = tracing
+        # 커버리지 카운터: reset() 해도 지우지 않고 여러 판에 걸쳐 쌓는다
+        self.counts = [0] * project.coverage.size if counting else None
+        self.reset()
+
+    def reset(self):
+        self.invalidate()
+        self.real = {rid: res.get("realValue", res.get("value")) for rid, res in self.project.resources.items()}
+        self.values = dict(self.real)
+        self.clamp_values()
+        self.tags = []
+        self.items = []
+        self.completed = set()
+        self.selected = {}
+        self.requirements_met = not any(c.get("required") for c in self.project.custom.values())
+        self.round = 0
+        self.phase = 'intro'
+        self.scene_id = None
+        self.page_id = None
+        self.locked = set()
+        self.ending = None
+        self.visits = []
+        self.scene_log = []
+        # 재현 검사용 진행 기록: 커스텀 선택, 장면, 페이지, 누른 선택지, 고른 분기
+        self.trace = [] if self.tracing else None
+
+    # -- 값 평가 ----------------------------------------------------------
+
+    def return_value(self, expr):
+        return self.project.compiler.value(expr)(self)
+
+    def check(self, condition):
+        key = self.project.compiler.key(condition)
+        if key not in self.project.cached_conditions:
+            return self.project.compiler.condition(key)(self)
+        if self.stale:
+            self.refresh_stale()
+        try:
+            return self.truth[key]
+        except KeyError:
+            value = self.truth[key] = self.project.compiler.condition(key)(self)
+            return value
+
+    # -- 조건식 캐시 ------------------------------------------------------
+
+    def invalidate(self):
+        self.truth = {}
+        self.stale = set()
+        self.scene_pool = None
+        self.scene_trees = {}
+        self.pool_dirty = set()
+
+    def mark(self, symbol):
+        self.stale |= self.project.affects.get(symbol, {symbol})
+
+    def refresh_stale(self):
+        project = self.project
+        stale, self.stale = self.stale, set()
+        for sym in stale:
+            for key in project.condition_readers.get(sym, ()):
+                if self.truth.pop(key, None) is not None and key in project.scene_conditions:
+                    self.pool_dirty.add(key)
+
+    def update_pool(self, sid):
+        scene = self.project.scenes[sid]
+        ok = (not (scene.get("repeatable") is False and sid in self.completed)
+              and ("condition" not in scene or self.check(scene["condition"])))
+        priority = scene.get("priority", 0)
+        bucket = self.scene_pool.setdefault(priority, set())
+        if ok:
+            bucket.add(sid)
+        else:
+            bucket.discard(sid)
+        if priority not in self.project.irregular_tiers:
+            tree = self.scene_trees.get(priority)
+            if tree is None:
+                tree = self.scene_trees[priority] = WeightTree(len(self.project.scene_tiers[priority]))
+            tree.set(self.project.tier_slot[sid], self.project.scene_weight[sid] if ok else 0)
+
+    def refresh_scene_pool(self):
+        # 바뀐 조건식의 장면만 다시 확인하고, random 을 읽는 장면은 따로 돌려준다
+        project = self.project
+        if self.scene_pool is None:
+            self.scene_pool = {}
+            self.scene_trees = {}
+            volatile = set(project.volatile_scenes)
+            for sid in project.scene_ids:
+                if sid not in volatile:
+                    self.update_pool(sid)
+        if self.stale:
+            self.refresh_stale()
+        while self.pool_dirty:
+            for sid in project.scene_conditions[self.pool_dirty.pop()]:
+                self.update_pool(sid)
+
+        extra = {}
+        for sid in project.volatile_scenes:
+            scene = project.scenes[sid]
+            if scene.get("repeatable") is False and sid in self.completed:
+                continue
+            if self.check(scene["condition"]):
+                extra.setdefault(scene.get("priority", 0), set()).add(sid)
+        return extra
+
+    def drop_from_pool(self, sid):
+        priority = self.project.scenes[sid].get("priority", 0)
+        self.scene_pool.get(priority, set()).discard(sid)
+        tree = self.scene_trees.get(priority)
+        if tree is not None:
+            tree.set(self.project.tier_slot[sid], 0)
+
+    def top_candidates(self, top, extra):
+        chosen = self.scene_pool.get(top, set()) | extra.get(top, set())
+        return sorted(chosen, key=self.project.scene_index.__getitem__)
+
+    def pick_scene(self, top, extra):
+        if top in extra or top in self.project.irregular_tiers:
+            candidates = self.top_candidates(top, extra)
+            return candidates[self.pick_weighted([self.project.scenes[c] for c in candidates])]
+        tree = self.scene_trees[top]
+        r = self.rng.random() * tree.total()
+        if r > 0:
+            i = tree.find(r)
+            if i < tree.size:
+                return self.project.scene_tiers[top][i]
+        return min(self.scene_pool[top], key=self.project.scene_index.__getitem__)
+
+    # -- setValue ---------------------------------------------------------
+
+    def clamp(self, rid, value):
+        res = self.project.resources[rid]
+        if "maxValue" in res:
+            value = js_min(value, self.return_value(res["maxValue"]))
+        if "minValue" in res:
+            value = js_max(value, self.return_value(res["minValue"]))
+        return normalize_number(value)
+
+    def clamp_values(self):
+        # updateValues: value = realValue 후 제한값 적용 (제한이 없는 자원은 value == realValue)
+        values, real = self.values, self.real
+        for rid in self.project.limited_resources:
+            values[rid] = self.clamp(rid, real[rid])
+
+    def set_value(self, event):
+        target = event.get("target")
+        operation = event.get("operation")
+        evaluated = self.return_value(event.get("value"))
+
+        if "condition" in event and not self.check(event["condition"]):
+            return False
+
+        if target == 'tags':
+            self.mark('tags')
+            if operation == 'add':
+                if not js_includes(self.tags, evaluated):
+                    self.tags.append(evaluated)
+            elif operation == 'remove':
+                self.tags = [t for t in self.tags if not strict_equals(t, evaluated)]
+            return
+
+        if target == 'items':
+            self.mark('items')
+            count = event.get("count")
+            repeat = repeat_count(1 if count is None else count)
+            if operation == 'add':
+                self.items.extend([evaluated] * repeat)
+            elif operation == 'remove':
+                # count 0 은 "전부" 로 표시되지만 script.js 에서는 제거 횟수가 0 이다
+                for _ in range(repeat):
+                    for i, x in enumerate(self.items):
+                        if strict_equals(x, evaluated):
+                            del self.items[i]
+                            break
+                    else:
+                        break
+            return
+
+        if target not in self.real:
+            return
+
+        current = self.real[target]
+        if operation == '=':
+            new = evaluated
+        elif operation == '+':
+            new = js_add(current, evaluated)
+        elif operation == '-':
+            new = js_sub(current, evaluated)
+        elif operation == '*':
+            new = js_mul(current, evaluated)
+        elif operation == '/':
+            new = js_div(current, evaluated)
+        else:
+            new = current
+
+        if target in self.project.limited_resources:
+            new = self.clamp(target, new)
+        self.real[target] = new
+        self.values[target] = new
+        values, real = self.values, self.real
+        for rid in self.project.reclamp[target]:
+            values[rid] = self.clamp(rid, real[rid])
+        self.mark(target)
+        for rid in self.project.volatile_resources:
+            self.mark(rid)
+
+    def execute_events(self, events):
+        for e in events:
+            if e.get("type") == 'setValue':
+                self.set_value(e)
+
+    def run_setting_events(self):
+        if self.counts is None:
+            self.execute_events(self.project.setting_events)
+            return
+        slots = self.project.coverage.setting
+        self.counts[self.project.coverage.setting_runs] += 1
+        for i, e in enumerate(self.project.setting_events):
+            if e.get("type") == 'setValue' and self.set_value(e) is not False and i in slots:
+                self.counts[slots[i]] += 1
+
+    # -- 커스텀 -----------------------------------------------------------
+
+    def snapshot(self):
+        return (dict(self.real), list(self.tags), list(self.items))
+
+    def restore(self, snap):
+        real, tags, items = snap
+        self.real = dict(real)
+        self.values = dict(self.real)
+        self.clamp_values()
+        self.tags = list(tags)
+        self.items = list(items)
+        self.invalidate()
+
+    def custom_options(self, category_id):
+        # 조건을 만족하며 maxSelect / required 를 지키는 모든 선택 조합 (목록 순서대로 적용)
+        category = self.project.custom[category_id]
+        elements = category.get("elements", [])
+        max_select = category.get("maxSelect") or len(elements)
+        required = category.get("required") or 0
+        options = []
+
+        def walk(i, chosen):
+            if len(chosen) >= required:
+                options.append(tuple(chosen))
+            if len(chosen) >= max_select:
+                return
+            for j in range(i, len(elements)):
+                el = elements[j]
+                if "condition" in el and not self.check(el["condition"]):
+                    continue
+                snap = self.snapshot()
+                self.execute_events(el.get("events", []))
+                walk(j + 1, chosen + [j])
+                self.restore(snap)
+
+        walk(0, [])
+        return options
+
+    def apply_picks(self, category_id, chosen):
+        elements = self.project.custom[category_id].get("elements", [])
+        for idx in chosen:
+            self.execute_events(elements[idx].get("events", []))
+        self.selected[category_id] = tuple(chosen)
+
+    def check_requirements(self):
+        for cid, category in self.project.custom.items():
+            if len(self.selected.get(cid, ())) < (category.get("required") or 0):
+                return False
+        return True
+
+    def customize(self, picks=None):
+        # play() 처럼 reset() 직후에 부른다
+        self.phase = 'custom'
+        cache = self.project.custom_option_cache
+        path = ()
+        for cid in self.project.custom:
+            if picks is not None:
+                chosen = tuple(picks.get(cid, ()))
+            else:
+                options = cache.get(path) if cache is not None else None
+                if options is None:
+                    options = self.custom_options(cid)
+                    if cache is not None:
+                        cache[path] = options
+                chosen = self.rng.choice(options) if options else ()
+                path += (chosen,)
+            self.apply_picks(cid, chosen)
+            if self.trace is not None:
+                self.trace.append(["custom", cid, list(chosen)])
+        self.requirements_met = self.check_requirements()
+        self.mark('required')
+
+    def custom_outcomes(self, limit=100000, one=1.0):
+        # customize() 의 무작위 선택이 낼 수 있는 모든 결과와 그 확률
+        # (카테고리마다 가능한 조합 중 하나를 균등하게 고르므로 확률은 곱으로 계산된다)
+        if self.project.custom_uses_random():
+            raise ValueError("커스텀 선택지에 random 이 쓰여 결과를 나열할 수 없습니다.")
+        self.phase = 'custom'
+        cids = list(self.project.custom)
+        outcomes = []
+
+        def walk(i, prob):
+            if i == len(cids):
+                outcomes.append((prob, dict(self.selected), self.snapshot(), self.check_requirements()))
+                if limit and len(outcomes) > limit:
+                    raise OverflowError(f"커스텀 결과가 {limit}개를 넘습니다.")
+                return
+            cid = cids[i]
+            options = self.custom_options(cid) or [()]
+            for option in options:
+                snap = self.snapshot()
+                self.apply_picks(cid, option)
+                walk(i + 1, prob / len(options))
+                self.restore(snap)
+            self.selected.pop(cid, None)
+
+        walk(0, one)
+        return outcomes
+
+    # -- 장면 진행 --------------------------------------------------------
+
+    def start_event(self):
+        self.phase = 'event'
+        self.new_event()
+
+    def pick_weighted(self, entries):
+        # priority 가 가장 높은 것들 중에서 weight 비율로 하나를 고른다
+        max_priority = max(e.get("priority", 0) for e in entries)
+        top = [i for i, e in enumerate(entries) if e.get("priority", 0) == max_priority]
+        total = 0
+        for i in top:
+            total += to_number(entries[i].get("weight", 1))
+        r = self.rng.random() * total
+        for i in top:
+            r -= to_number(entries[i].get("weight", 1))
+            if r <= 0:
+                return i
+        return top[0]
+
+    def pick_static(self, entries):
+        # 목록이 그대로면 미리 만든 누적 가중치에서 이분 탐색한다
+        table = self.project.weight_table(entries)
+        if table is None:
+            return self.pick_weighted(entries)
+        top, prefix = table
+        r = self.rng.random() * prefix[-1]
+        if r <= 0:
+            return top[0]
+        i = bisect_left(prefix, r)
+        return top[i] if i < len(top) else top[0]
+
+    def new_event(self):
+        self.round += 1
+        project = self.project
+        extra = self.refresh_scene_pool()
+        priorities = [p for p, bucket in self.scene_pool.items() if bucket] + list(extra)
+
+        max_round = project.max_round
+        if (max_round != 0 and max_round is not None and self.round > max_round) or not priorities:
+            self.start_ending()
+            return
+
+        sid = self.pick_scene(max(priorities), extra)
+        scene = project.scenes[sid]
+        if scene.get("repeatable") is False:
+            self.completed.add(sid)
+            self.drop_from_pool(sid)
+
+        self.scene_id = sid
+        self.scene_log.append(sid)
+        if self.counts is not None:
+            self.counts[project.coverage.scene[sid]] += 1
+        if self.trace is not None:
+            self.trace.append(["scene", sid])
+        self.goto_page(scene.get("start", "start"))
+
+    def goto_page(self, page_id):
+        scene = self.project.scenes[self.scene_id]
+        self.locked = set()
+        if self.trace is not None:
+            self.trace.append(["page", page_id])
+        if page_id not in scene.get("pages", {}):
+            # script.js 는 여기서 진행이 멈춘다
+            self.page_id = None
+            self.phase = 'stuck'
+            return
+        self.page_id = page_id
+        self.visits.append((self.scene_id, page_id))
+        if self.counts is not None:
+            self.counts[self.project.coverage.page[(self.scene_id, page_id)]] += 1
+
+    def available_choices(self):
+        if self.phase != 'event':
+            return []
+        result = []
+        groups = self.project.page_groups.get((self.scene_id, self.page_id), [])
+        for gi, group in enumerate(groups):
+            if gi in self.locked:
+                continue
+            for button in group:
+                if "condition" in button and not self.check(button["condition"]):
+                    continue
+                result.append((gi, button))
+        return result
+
+    def choose(self, choice):
+        gi, button = choice
+        if self.trace is not None:
+            group = self.project.page_groups[(self.scene_id, self.page_id)][gi]
+            self.trace.append(["choice", gi, next(i for i, b in enumerate(group) if b is button)])
+        if self.counts is not None:
+            self.counts[self.project.coverage.button[id(button)]] += 1
+        self.execute_events(button.get("events", []))
+        self.locked.add(gi)
+        if button.get("branch"):
+            self.handle_branch_to(button["branch"])
+
+    def handle_branch_to(self, branches):
+        valid = [b for b in branches if not b.get("condition") or self.check(b["condition"])]
+
+        if not valid:
+            if self.trace is not None:
+                self.trace.append(["branch", None])
+            self.run_setting_events()
+            self.new_event()
+            return
+
+        if len(valid) == len(branches):
+            selected = branches[self.pick_static(branches)]
+        else:
+            selected = valid[self.pick_weighted(valid)]
+        if self.trace is not None:
+            self.trace.append(["branch", next(i for i, b in enumerate(branches) if b is selected)])
+        if self.counts is not None:
+            self.counts[self.project.coverage.branch[id(selected)]] += 1
+        kind = selected.get("type")
+        if kind == "page":
+            self.goto_page(selected.get("value"))
+        elif kind == "ending":
+            self.start_ending(selected.get("value"))
+        else:
+            self.run_setting_events()
+            self.new_event()
+
+    def start_ending(self, ending_id=None):
+        self.phase = 'ending'
+        self.scene_id = None
+        self.page_id = None
+        endings = self.project.endings
+
+        if ending_id:
+            if ending_id not in endings:
+                self.phase = 'stuck'
+                return
+            self.ending = ending_id
+            return
+
+        candidates = [eid for eid, e in endings.items() if not e.get("condition") or self.check(e["condition"])]
+        if not candidates:
+            self.phase = 'stuck'
+            return
+        max_priority = max(endings[eid].get("priority", 0) for eid in candidates)
+        self.ending = next(eid for eid in candidates if endings[eid].get("priority", 0) == max_priority)
+
+    # -- 한 판 진행 -------------------------------------------------------
+
+    def play(self, picks=None, policy=None, max_steps=100000):
+        self.reset()
+        self.customize(picks)
+        self.start_event()
+        steps = 0
+        while self.phase == 'event':
+            choices = self.available_choices()
+            if not choices or steps >= max_steps:
+                self.phase = 'stuck'
+                break
+            self.choose(policy(self, choices) if policy else self.rng.choice(choices))
+            steps += 1
+        return self.result()
+
+    def result(self):
+        return {
+            "ending": self.ending,
+            "phase": self.phase,
+            "rounds": self.round,
+            "visits": list(self.visits),
+            "scenes": list(self.scene_log),
+            "values": dict(self.values),
+            "tags": list(self.tags),
+            "items": list(self.items),
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CYOA 데이터를 브라우저 없이 한 판 진행합니다.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    args = parser.parse_args()
+
+    game = Game(load_project(args.base), seed=args.seed)
+    result = game.play()
+    for sid, pid in result["visits"]:
+        print(f"{sid} / {pid}")
+    print(f"엔딩: {result['ending']} ({result['phase']}, {result['rounds']}일차)")
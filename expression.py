@@ -0,0 +1,608 @@
+import math
+import re
+
+# ---------------------------------------------------------------------------
+# 자바스크립트 값 규칙 (script.js 의 returnValue 와 동일한 결과를 내기 위함)
+# ---------------------------------------------------------------------------
+
+NAN = float('nan')
+
+
+def is_number(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def js_truthy(v):
+    if v is None:
+        return False
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, (int, float)):
+        return v == v and v != 0
+    if isinstance(v, str):
+        return len(v) > 0
+    return True
+
+
+def js_string(v):
+    if v is None:
+        return "undefined"
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, float):
+        if v != v:
+            return "NaN"
+        if v in (math.inf, -math.inf):
+            return "Infinity" if v > 0 else "-Infinity"
+        if v.is_integer():
+            return str(int(v))
+        return repr(v)
+    if isinstance(v, list):
+        return ",".join("" if x is None else js_string(x) for x in v)
+    return str(v)
+
+
+def to_number(v):
+    if isinstance(v, bool):
+        return int(v)
+    if isinstance(v, (int, float)):
+        return v
+    if v is None:
+        return NAN
+    if isinstance(v, list):
+        return to_number(js_string(v))
+    s = str(v).strip()
+    if not s:
+        return 0
+    if s in ("Infinity", "+Infinity", "-Infinity"):
+        return -math.inf if s[0] == '-' else math.inf
+    try:
+        return int(s)
+    except ValueError:
+        pass
+    try:
+        if s.lower().lstrip('+-') in ("inf", "infinity", "nan"):
+            return NAN
+        return float(s)
+    except ValueError:
+        return NAN
+
+
+def normalize_number(v):
+    if isinstance(v, float) and v == v and v not in (math.inf, -math.inf) and v.is_integer():
+        return int(v)
+    return v
+
+
+def js_floor(v):
+    if isinstance(v, float):
+        if v != v or v in (math.inf, -math.inf):
+            return v
+        return math.floor(v)
+    return v
+
+
+def js_add(a, b):
+    if isinstance(a, (str, list)) or isinstance(b, (str, list)):
+        return js_string(a) + js_string(b)
+    return normalize_number(to_number(a) + to_number(b))
+
+
+def js_sub(a, b):
+    return normalize_number(to_number(a) - to_number(b))
+
+
+def js_mul(a, b):
+    a, b = to_number(a), to_number(b)
+    if (a in (math.inf, -math.inf) and b == 0) or (b in (math.inf, -math.inf) and a == 0):
+        return NAN
+    return normalize_number(a * b)
+
+
+def js_div(a, b):
+    a, b = to_number(a), to_number(b)
+    if b == 0:
+        if a != a or a == 0:
+            return NAN
+        return math.inf if (a > 0) == (math.copysign(1, b) > 0) else -math.inf
+    if a in (math.inf, -math.inf) and b in (math.inf, -math.inf):
+        return NAN
+    return normalize_number(a / b)
+
+
+def js_mod(a, b):
+    a, b = to_number(a), to_number(b)
+    if b == 0 or a != a or b != b or a in (math.inf, -math.inf):
+        return NAN
+    if b in (math.inf, -math.inf):
+        return a
+    if isinstance(a, int) and isinstance(b, int):
+        r = abs(a) % abs(b)
+        return -r if a < 0 else r
+    return normalize_number(math.fmod(a, b))
+
+
+def js_min(a, b):
+    if type(a) is int and type(b) is int:
+        return a if a <= b else b
+    a, b = to_number(a), to_number(b)
+    if a != a or b != b:
+        return NAN
+    return a if a <= b else b
+
+
+def js_max(a, b):
+    if type(a) is int and type(b) is int:
+        return a if a >= b else b
+    a, b = to_number(a), to_number(b)
+    if a != a or b != b:
+        return NAN
+    return a if a >= b else b
+
+
+def strict_equals(a, b):
+    if a is None or b is None:
+        return a is b
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    if is_number(a) and is_number(b):
+        return a == b
+    if isinstance(a, str) and isinstance(b, str):
+        return a == b
+    return a is b
+
+
+def loose_equals(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    if isinstance(a, bool):
+        return loose_equals(int(a), b)
+    if isinstance(b, bool):
+        return loose_equals(a, int(b))
+    if isinstance(a, list) and isinstance(b, list):
+        return a is b
+    if isinstance(a, list):
+        return loose_equals(js_string(a), b)
+    if isinstance(b, list):
+        return loose_equals(a, js_string(b))
+    if isinstance(a, str) and isinstance(b, str):
+        return a == b
+    return to_number(a) == to_number(b)
+
+
+def js_compare(a, b, op):
+    if isinstance(a, list):
+        a = js_string(a)
+    if isinstance(b, list):
+        b = js_string(b)
+    if not (isinstance(a, str) and isinstance(b, str)):
+        a, b = to_number(a), to_number(b)
+        if a != a or b != b:
+            return False
+    if op == '>':
+        return a > b
+    if op == '<':
+        return a < b
+    if op == '>=':
+        return a >= b
+    return a <= b
+
+
+def js_includes(container, value):
+    if not isinstance(container, list):
+        return False
+    if isinstance(value, str):
+        return value in container
+    for x in container:
+        if strict_equals(x, value) or (x != x and value != value and is_number(x) and is_number(value)):
+            return True
+    return False
+
+
+# ---------------------------------------------------------------------------
+# 조건식 (tokenize → replaceTokens → toPostfix → evaluatePostfix)
+# ---------------------------------------------------------------------------
+
+TOKEN_PATTERN = re.compile(r'(==|!=|>=|<=|<<|>>|\|\||&&|\^\^|[+\-*/%()<>]|[0-9]+\.?[0-9]*|".*?"|[가-힣A-Za-z0-9_]+)')
+
+PRECEDENCE = {
+    '||': 2,
+    '^^': 3,
+    '&&': 4,
+    '<<': 5, '>>': 5,
+    '==': 6, '!=': 6, '>': 6, '<': 6, '>=': 6, '<=': 6,
+    '+': 7, '-': 7,
+    '*': 8, '/': 8, '%': 8,
+}
+
+NUMBER_TOKEN = re.compile(r'^[0-9]+\.?[0-9]*$')
+
+
+def tokenize(expr):
+    return TOKEN_PATTERN.findall(js_string(expr))
+
+
+def is_operator(token):
+    return isinstance(token, str) and (token in ('(', ')') or token in PRECEDENCE)
+
+
+def repeat_count(count):
+    # for (let i=0; i<count; i++) 의 반복 횟수
+    n = to_number(count)
+    if n != n or n <= 0:
+        return 0
+    return math.ceil(n)
+
+
+def literal_value(tok):
+    if len(tok) >= 2 and tok[0] == '"' and tok[-1] == '"':
+        return tok[1:-1]
+    if NUMBER_TOKEN.match(tok) or tok == "Infinity":
+        return normalize_number(to_number(tok))
+    return tok
+
+
+def to_postfix(tokens):
+    output = []
+    op_stack = []
+
+    for tok in tokens:
+        if not is_operator(tok):
+            output.append(tok)
+        elif tok == '(':
+            op_stack.append(tok)
+        elif tok == ')':
+            while op_stack and op_stack[-1] != '(':
+                output.append(op_stack.pop())
+            if op_stack:
+                op_stack.pop()
+        else:
+            while op_stack and is_operator(op_stack[-1]) and PRECEDENCE.get(op_stack[-1], -1) >= PRECEDENCE[tok]:
+                output.append(op_stack.pop())
+            op_stack.append(tok)
+
+    while op_stack:
+        output.append(op_stack.pop())
+
+    return output
+
+
+def apply_operator(a, b, op):
+    if op == '+':
+        return js_add(a, b)
+    if op == '-':
+        return js_sub(a, b)
+    if op == '*':
+        return js_mul(a, b)
+    if op == '/':
+        return js_floor(js_div(a, b))
+    if op == '%':
+        return js_mod(a, b)
+    if op == '==':
+        return loose_equals(a, b)
+    if op == '!=':
+        return not loose_equals(a, b)
+    if op in ('>', '<', '>=', '<='):
+        return js_compare(a, b, op)
+    if op == '<<':
+        return js_includes(a, b)
+    if op == '>>':
+        return js_includes(b, a)
+    if op == '&&':
+        return b if js_truthy(a) else a
+    if op == '||':
+        return a if js_truthy(a) else b
+    if op == '^^':
+        return js_truthy(a) != js_truthy(b)
+    raise ValueError(f"Unknown operator: {op}")
+
+
+def evaluate_postfix(postfix):
+    stack = []
+    for token in postfix:
+        if not is_operator(token):
+            stack.append(token)
+        else:
+            b = stack.pop() if stack else None
+            a = stack.pop() if stack else None
+            stack.append(apply_operator(a, b, token))
+    return stack[0] if stack else None
+
+
+
+# ---------------------------------------------------------------------------
+# 조건식 컴파일 (한 번만 파싱해 클로저로 만들어 두고 재사용)
+#
+# env 는 values(dict), tags, items, rng, requirements_met 를 가진 객체(engine.Game)
+# ---------------------------------------------------------------------------
+
+UNDEFINED = ('const', None)
+
+SPECIAL_TOKENS = ('tags', 'items', 'random', 'required')
+
+BOOLEAN_OPERATORS = ('<<', '>>', '==', '!=', '>', '<', '>=', '<=', '^^')
+
+
+def classify(tok, resource_ids):
+    if tok == 'true':
+        return ('const', True)
+    if tok == 'false':
+        return ('const', False)
+    if tok in ('(', ')'):
+        return tok
+    if tok in SPECIAL_TOKENS:
+        return (tok,)
+    if tok in resource_ids:
+        return ('res', tok)
+    value = literal_value(tok)
+    if is_operator(value):
+        # "+" 처럼 따옴표로 감싼 연산자도 script.js 에서는 연산자로 취급된다
+        return value
+    return ('const', value)
+
+
+def parse(expr, resource_ids):
+    postfix = to_postfix([classify(tok, resource_ids) for tok in tokenize(expr)])
+    stack = []
+    for tok in postfix:
+        if not is_operator(tok):
+            stack.append(tok)
+        else:
+            b = stack.pop() if stack else UNDEFINED
+            a = stack.pop() if stack else UNDEFINED
+            stack.append(fold(('op', tok, a, b)))
+    if not stack:
+        return UNDEFINED
+    if len(stack) > 1:
+        return ('seq', tuple(stack))
+    return stack[0]
+
+
+def fold(node):
+    _, op, a, b = node
+    if a[0] == 'const' and b[0] == 'const' and op in OPERATORS:
+        return ('const', OPERATORS[op](a[1], b[1]))
+    return node
+
+
+def walk(node):
+    yield node
+    if node[0] == 'op':
+        yield from walk(node[2])
+        yield from walk(node[3])
+    elif node[0] == 'seq':
+        for child in node[1]:
+            yield from walk(child)
+
+
+def symbols(node):
+    # 식이 읽는 자원 id 와 tags / items / random / required
+    result = set()
+    for n in walk(node):
+        if n[0] == 'res':
+            result.add(n[1])
+        elif n[0] in SPECIAL_TOKENS:
+            result.add(n[0])
+    return result
+
+
+def op_less_shift(a, b):
+    return js_includes(a, b)
+
+
+def op_greater_shift(a, b):
+    return js_includes(b, a)
+
+
+def op_div(a, b):
+    return js_floor(js_div(a, b))
+
+
+def op_and(a, b):
+    return b if js_truthy(a) else a
+
+
+def op_or(a, b):
+    return a if js_truthy(a) else b
+
+
+def op_xor(a, b):
+    return js_truthy(a) != js_truthy(b)
+
+
+def op_eq(a, b):
+    return loose_equals(a, b)
+
+
+def op_ne(a, b):
+    return not loose_equals(a, b)
+
+
+def op_gt(a, b):
+    if type(a) is int and type(b) is int:
+        return a > b
+    return js_compare(a, b, '>')
+
+
+def op_lt(a, b):
+    if type(a) is int and type(b) is int:
+        return a < b
+    return js_compare(a, b, '<')
+
+
+def op_ge(a, b):
+    if type(a) is int and type(b) is int:
+        return a >= b
+    return js_compare(a, b, '>=')
+
+
+def op_le(a, b):
+    if type(a) is int and type(b) is int:
+        return a <= b
+    return js_compare(a, b, '<=')
+
+
+def op_add(a, b):
+    if type(a) is int and type(b) is int:
+        return a + b
+    return js_add(a, b)
+
+
+def op_sub(a, b):
+    if type(a) is int and type(b) is int:
+        return a - b
+    return js_sub(a, b)
+
+
+OPERATORS = {
+    '+': op_add,
+    '-': op_sub,
+    '*': js_mul,
+    '/': op_div,
+    '%': js_mod,
+    '==': op_eq,
+    '!=': op_ne,
+    '>': op_gt,
+    '<': op_lt,
+    '>=': op_ge,
+    '<=': op_le,
+    '<<': op_less_shift,
+    '>>': op_greater_shift,
+    '&&': op_and,
+    '||': op_or,
+    '^^': op_xor,
+}
+
+
+def build(node):
+    kind = node[0]
+    if kind == 'const':
+        value = node[1]
+        return lambda env: value
+    if kind == 'res':
+        name = node[1]
+        return lambda env: env.values[name]
+    if kind == 'tags':
+        return lambda env: env.tags
+    if kind == 'items':
+        return lambda env: env.items
+    if kind == 'random':
+        return lambda env: env.rng.random()
+    if kind == 'required':
+        return lambda env: env.requirements_met
+    if kind == 'seq':
+        # evaluatePostfix 는 stack[0] 을 돌려주지만 나머지 토큰(random 등)도 모두 평가된다
+        parts = [build(child) for child in node[1]]
+        def run_all(env):
+            results = [part(env) for part in parts]
+            return results[0]
+        return run_all
+
+    _, op, a, b = node
+    if op not in OPERATORS:
+        def fail(env):
+            raise ValueError(f"Unknown operator: {op}")
+        return fail
+
+    func = OPERATORS[op]
+
+    # 자주 쓰이는 형태는 따로 만들어 호출 단계를 줄인다
+    if op == '<<' and a[0] in ('tags', 'items') and b[0] == 'const' and isinstance(b[1], str):
+        attr, needle = a[0], b[1]
+        if attr == 'tags':
+            return lambda env: needle in env.tags
+        return lambda env: needle in env.items
+    if a[0] == 'res' and b[0] == 'const' and type(b[1]) is int and op in ('>', '<', '>=', '<=', '==', '!='):
+        name, const = a[1], b[1]
+        return lambda env: func(env.values[name], const)
+
+    fa, fb = build(a), build(b)
+    return lambda env: func(fa(env), fb(env))
+
+
+def needs_floor(node):
+    if node[0] == 'const':
+        return isinstance(node[1], float)
+    if node[0] == 'op' and node[1] in BOOLEAN_OPERATORS:
+        return False
+    return node[0] not in ('tags', 'items', 'required')
+
+
+class Compiler:
+    def __init__(self, resource_ids):
+        self.resource_ids = frozenset(resource_ids)
+        self.trees = {}
+        self.values = {}
+        self.conditions = {}
+
+    @staticmethod
+    def key(expr):
+        return expr if type(expr) is str else js_string(expr)
+
+    def tree(self, expr):
+        key = self.key(expr)
+        node = self.trees.get(key)
+        if node is None:
+            node = self.trees[key] = parse(key, self.resource_ids)
+        return node
+
+    def value(self, expr):
+        # returnValue(expr) 와 같은 값을 돌려주는 함수
+        key = self.key(expr)
+        fn = self.values.get(key)
+        if fn is None:
+            node = self.tree(key)
+            fn = build(node)
+            if needs_floor(node):
+                inner = fn
+                fn = lambda env: js_floor(inner(env))
+            if node[0] == 'const':
+                value = js_floor(node[1])
+                fn = lambda env: value
+            self.values[key] = fn
+        return fn
+
+    def condition(self, expr):
+        # 조건식으로 쓰일 때는 참/거짓만 필요하다
+        key = self.key(expr)
+        fn = self.conditions.get(key)
+        if fn is None:
+            node = self.tree(key)
+            if node[0] == 'const':
+                value = js_truthy(js_floor(node[1]))
+                fn = lambda env: value
+            elif node[0] == 'op' and node[1] in BOOLEAN_OPERATORS:
+                fn = build(node)
+            elif needs_floor(node):
+                inner = build(node)
+                fn = lambda env: js_truthy(js_floor(inner(env)))
+            else:
+                inner = build(node)
+                fn = lambda env: js_truthy(inner(env))
+            self.conditions[key] = fn
+        return fn
+
+
+def interpret(expr, env):
+    # script.js 의 returnValue 를 그대로 옮긴 느린 구현 (컴파일 결과 검증용)
+    replaced = []
+    for tok in tokenize(expr):
+        if tok == 'true':
+            replaced.append(True)
+        elif tok == 'false':
+            replaced.append(False)
+        elif tok in ('(', ')'):
+            replaced.append(tok)
+        elif tok == 'tags':
+            replaced.append(env.tags)
+        elif tok == 'items':
+            replaced.append(env.items)
+        elif tok == 'random':
+            replaced.append(env.rng.random())
+        elif tok == 'required':
+            replaced.append(env.requirements_met)
+        elif tok in env.values:
+            replaced.append(env.values[tok])
+        else:
+            replaced.append(literal_value(tok))
+    return js_floor(evaluate_postfix(to_postfix(replaced)))
@@ -0,0 +1,166 @@
+import json
+import os
+import time
+
+# ---------------------------------------------------------------------------
+# 편집 기록 (journal)
+#
+# 편집할 때마다 고친 항목의 새 내용을 data.journal 에 한 줄씩 덧붙인다. 프로그램이 죽어도
+# 다음에 켤 때 아직 저장되지 않은 편집을 JSON 파일 위에 다시 적용해 되살린다.
+#
+#   {"q": 순번, "t": 시각(ns), "c": [[파일 키, 항목 키, 새 내용] 또는 [파일 키, 항목 키](삭제)], "o": {파일 키: 키 순서}}
+#   {"q": 순번, "saved": 파일 키}   ← 이 순번까지의 편집은 그 파일에 저장되었다
+#
+# 매 줄은 바로 OS 에 넘기고 (프로그램이 죽는 경우), fsync 는 모아서 한다 (OS 가 죽는 경우).
+# 저장에 성공하면 이미 파일에 들어간 편집을 지워 다시 쓴다.
+# ---------------------------------------------------------------------------
+
+JOURNAL_PATH = "data.journal"
+SYNC_SECONDS = 1.0
+
+
+class Journal:
+    def __init__(self, path, get_data):
+        self.path = path
+        self.get_data = get_data
+        self.seq = 0
+        self.file = None
+        self.unsynced = False
+        self.last_sync = time.monotonic()
+
+    def open(self):
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    def write(self, record):
+        self.open()
+        self.file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+        self.file.flush()
+        self.unsynced = True
+        if time.monotonic() - self.last_sync >= SYNC_SECONDS:
+            self.sync()
+
+    def sync(self):
+        if self.unsynced and self.file is not None:
+            os.fsync(self.file.fileno())
+            self.unsynced = False
+        self.last_sync = time.monotonic()
+
+    def append(self, step):
+        # UndoLog 의 listener. 기록에는 편집 후 지금 내용을 적으므로 되돌리기 / 다시 하기도 그대로 남는다
+        data = self.get_data()
+        changes = []
+        for dataset, entry in sorted(step.targets()):
+            if entry in data[dataset]:
+                changes.append([dataset, entry, data[dataset][entry]])
+            else:
+                changes.append([dataset, entry])
+        record = {"q": self.seq + 1, "t": time.time_ns(), "c": changes}
+        if step.orders:
+            record["o"] = {dataset: list(data[dataset]) for dataset in step.orders}
+        self.seq += 1
+        self.write(record)
+
+    def saved(self, dataset, seq):
+        self.write({"q": seq, "saved": dataset})
+
+    def read(self):
+        # 마지막 줄이 쓰다 만 채로 남았을 수 있으므로 읽을 수 있는 데까지만 쓴다
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return records
+
+    @staticmethod
+    def pending(records, mtimes):
+        # 저장 표시가 있으면 그 뒤의 편집만, 없으면 JSON 파일보다 나중의 편집만 살아 있다
+        saved = {}
+        for record in records:
+            if "saved" in record:
+                saved[record["saved"]] = max(saved.get(record["saved"], 0), record["q"])
+
+        def alive(dataset, record):
+            if dataset in saved:
+                return record["q"] > saved[dataset]
+            return record["t"] > mtimes.get(dataset, 0)
+
+        for record in records:
+            if "saved" in record:
+                continue
+            changes = [c for c in record["c"] if alive(c[0], record)]
+            orders = {d: o for d, o in record.get("o", {}).items() if alive(d, record)}
+            if changes or orders:
+                yield record, changes, orders
+
+    def replay(self, mtimes):
+        # mtimes: {파일 키: JSON 파일의 st_mtime_ns}. 되살린 파일 키들과 편집 수를 돌려준다
+        records = self.read()
+        self.seq = max((record["q"] for record in records), default=0)
+        data = self.get_data()
+        touched = {}
+        count = 0
+        for record, changes, orders in self.pending(records, mtimes):
+            count += 1
+            for change in changes:
+                dataset, entry = change[0], change[1]
+                if len(change) > 2:
+                    data[dataset][entry] = change[2]
+                else:
+                    data[dataset].pop(entry, None)
+                touched.setdefault(dataset, set()).add(entry)
+            for dataset, order in orders.items():
+                target = data[dataset]
+                items = {entry: target[entry] for entry in order if entry in target}
+                items.update((entry, value) for entry, value in target.items() if entry not in items)
+                target.clear()
+                target.update(items)
+                touched.setdefault(dataset, set())
+        return touched, count
+
+    def compact(self, mtimes):
+        # 이미 파일에 들어간 편집을 버리고 남은 것만 새 파일에 다시 쓴다
+        records = self.read()
+        keep = []
+        for record, changes, orders in self.pending(records, mtimes):
+            record = dict(record, c=changes)
+            if orders:
+                record["o"] = orders
+            else:
+                record.pop("o", None)
+            keep.append(record)
+        if keep:
+            last_saved = {}
+            for record in records:
+                if "saved" in record:
+                    last_saved[record["saved"]] = max(last_saved.get(record["saved"], 0), record["q"])
+            keep = [{"q": q, "saved": dataset} for dataset, q in last_saved.items()] + keep
+
+        self.close()
+        if not keep:
+            self.clear()
+            return 0
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in keep:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        return len(keep)
+
+    def clear(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,164 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+
+# ---------------------------------------------------------------------------
+# 백그라운드 불러오기
+#
+# 편집기 스레드에서 json.load 를 부르면 큰 파일을 읽는 동안 창이 멈추므로, 작업 스레드가 파일을 읽는다.
+# 최상위가 객체인 파일은 항목(장면 하나, 변수 하나 ...)을 하나씩 raw_decode 하며 진행률을 알리고,
+# 결과는 json.load 와 똑같다 (같은 디코더로 값 하나씩 읽을 뿐이다).
+# 편집기는 after() 로 progress / results 큐를 꺼내 진행 막대를 움직이고, 다 읽으면 한 번에 넘겨받는다.
+# 읽지 못한 파일은 JSONDecodeError 의 줄 / 칸과 그 줄 내용을 붙여 알려 준다.
+# 경로 대신 함수를 넘기면 그 함수가 돌려준 값을 쓴다 (SQLite 저장소: sqlstore.SqlStore.load).
+# prepare(읽은 값) 을 넘기면 다 읽은 뒤 같은 스레드에서 불러 결과를 prepared 에 둔다 (기준 사본, 검색 색인 등).
+# ---------------------------------------------------------------------------
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+PROGRESS_SECONDS = 0.05
+
+
+def parse_object(text, on_progress=None):
+    # json.loads(text) 와 같은 값을 돌려준다. on_progress(읽은 글자 수) 는 최상위 항목마다 불린다
+    decoder = json.JSONDecoder()
+    idx = WHITESPACE.match(text, 0).end()
+    if not text.startswith('{', idx):
+        return decoder.decode(text)
+    result = {}
+    idx = WHITESPACE.match(text, idx + 1).end()
+    if text.startswith('}', idx):
+        idx += 1
+    else:
+        while True:
+            if not text.startswith('"', idx):
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, idx)
+            key, idx = decoder.raw_decode(text, idx)
+            idx = WHITESPACE.match(text, idx).end()
+            if not text.startswith(':', idx):
+                raise json.JSONDecodeError("Expecting ':' delimiter", text, idx)
+            idx = WHITESPACE.match(text, idx + 1).end()
+            result[key], idx = decoder.raw_decode(text, idx)
+            idx = WHITESPACE.match(text, idx).end()
+            if on_progress:
+                on_progress(idx)
+            if text.startswith('}', idx):
+                idx += 1
+                break
+            if not text.startswith(',', idx):
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, idx)
+            idx = WHITESPACE.match(text, idx + 1).end()
+    idx = WHITESPACE.match(text, idx).end()
+    if idx != len(text):
+        raise json.JSONDecodeError("Extra data", text, idx)
+    return result
+
+
+def read_json(path, on_progress=None):
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    return parse_object(text, on_progress and (lambda done: on_progress(done, len(text))))
+
+
+def format_error(path, e):
+    # 읽기 오류를 "파일:줄:칸" 과 그 줄 내용으로 바꾼다
+    name = os.path.basename(path)
+    if isinstance(e, json.JSONDecodeError):
+        lines = e.doc.splitlines()
+        line = lines[e.lineno - 1] if e.lineno <= len(lines) else ""
+        start = max(0, e.colno - 41)
+        excerpt = line[start:start + 80]
+        return (f"{name} {e.lineno}번째 줄 {e.colno}번째 칸: {e.msg}\n"
+                f"    {excerpt}\n"
+                f"    {' ' * (e.colno - 1 - start)}^")
+    if isinstance(e, UnicodeDecodeError):
+        return f"{name} {e.start}번째 바이트: UTF-8 로 읽을 수 없습니다 ({e.reason})"
+    if isinstance(e, FileNotFoundError):
+        return f"{name}: 파일이 없습니다 ({path})"
+    return f"{name}: {e}"
+
+
+class DataLoader:
+    def __init__(self, jobs, prepare=None):
+        # jobs: [(key, 경로 또는 읽는 함수)]. 진행률은 파일 크기 비율로 합친다
+        self.jobs = list(jobs)
+        self.prepare = prepare
+        self.prepared = None
+        self.sizes = {}
+        for key, path in self.jobs:
+            try:
+                self.sizes[key] = max(1, os.path.getsize(path)) if isinstance(path, str) else 1
+            except OSError:
+                self.sizes[key] = 1
+        self.total = sum(self.sizes.values())
+        self.progress = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="data-loader", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        # 결과: ({key: 값}, {key: 오류 글}, 걸린 시간)
+        started = time.perf_counter()
+        loaded, errors = {}, {}
+        done = 0
+        last = 0.0
+        for key, path in self.jobs:
+            def on_progress(chars, length, key=key, path=path):
+                nonlocal last
+                now = time.perf_counter()
+                if now - last >= PROGRESS_SECONDS:
+                    last = now
+                    self.progress.put((os.path.basename(path), (done + self.sizes[key] * chars / length) / self.total))
+            name = os.path.basename(path) if isinstance(path, str) else key
+            self.progress.put((name, done / self.total))
+            try:
+                loaded[key] = read_json(path, on_progress) if isinstance(path, str) else path()
+            except Exception as e:
+                errors[key] = format_error(path, e) if isinstance(path, str) else f"{key}: {e}"
+            done += self.sizes[key]
+        if self.prepare:
+            self.progress.put(("색인", 1.0))
+            try:
+                self.prepared = self.prepare(loaded)
+            except Exception:
+                # prepared 가 None 이면 편집기가 직접 다시 만든다
+                self.prepared = None
+        self.results.put((loaded, errors, time.perf_counter() - started))
+
+    def poll(self):
+        # (마지막 진행 상황 또는 None, 결과 또는 None)
+        latest = None
+        while True:
+            try:
+                latest = self.progress.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            return latest, self.results.get_nowait()
+        except queue.Empty:
+            return latest, None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from engine import DATA_FILES, default_base_path
+
+    parser = argparse.ArgumentParser(description="데이터 파일을 읽어 보고, 잘못된 곳을 줄 / 칸으로 알려 줍니다.")
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    args = parser.parse_args()
+
+    base = args.base or default_base_path()
+    loader = DataLoader((key, os.path.join(base, rel)) for key, rel in DATA_FILES.items()).start()
+    loader.thread.join()
+    loaded, errors, elapsed = loader.results.get()
+    for key in loaded:
+        print(f"{DATA_FILES[key]}: 항목 {len(loaded[key])}개")
+    for key, message in errors.items():
+        print(message)
+    print(f"{elapsed * 1000:.0f}ms")
@@ -0,0 +1,190 @@
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from multiprocessing import Pool
+
+from engine import Game, Project, load_project
+
+# ---------------------------------------------------------------------------
+# 진행 기록 재현 검사
+#
+# seed 를 정해 한 판을 진행하면서 커스텀 선택, 장면, 페이지, 선택지, 분기를 기록해 둔다.
+# 데이터를 고친 뒤 같은 seed 로 다시 진행해 처음으로 달라지는 곳을 찾는다.
+# ---------------------------------------------------------------------------
+
+GOLDEN_PATH = "traces/golden.json"
+
+_project = None
+
+
+def _init_worker(base_path):
+    global _project
+    _project = load_project(base_path)
+
+
+def record_one(project, seed):
+    game = Game(project, seed=seed, tracing=True)
+    result = game.play()
+    return {
+        "seed": seed,
+        "steps": game.trace,
+        "final": {key: result[key] for key in ("ending", "phase", "rounds", "values", "tags", "items")},
+    }
+
+
+def record(project, count, seed=0):
+    return [record_one(project, seed + i) for i in range(count)]
+
+
+def save_traces(path, traces):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"version": 1, "traces": traces}, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_traces(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["traces"]
+
+
+def same(a, b):
+    # JSON 으로 저장했다 읽은 값과 비교하므로 (tuple / list, NaN) 직렬화한 결과로 비교한다
+    return json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True)
+
+
+def divergence(expected, actual):
+    steps, replayed = expected["steps"], actual["steps"]
+    for i, (a, b) in enumerate(zip(steps, replayed)):
+        if not same(a, b):
+            return {"step": i, "expected": a, "actual": b, "before": steps[max(0, i - 3):i]}
+    if len(steps) != len(replayed):
+        i = min(len(steps), len(replayed))
+        return {"step": i,
+                "expected": steps[i] if i < len(steps) else None,
+                "actual": replayed[i] if i < len(replayed) else None,
+                "before": steps[max(0, i - 3):i]}
+    for key, value in expected["final"].items():
+        if not same(value, actual["final"].get(key)):
+            return {"step": "final", "field": key, "expected": value, "actual": actual["final"].get(key)}
+    return None
+
+
+def check_one(args):
+    index, trace = args
+    actual = record_one(_project, trace["seed"])
+    return index, divergence(trace, actual)
+
+
+def verify(traces, project=None, base_path=None, workers=1):
+    # project 를 넘기면 (편집기의 메모리 데이터 등) 그 데이터로 한 프로세스에서 검사한다
+    global _project
+    started = time.perf_counter()
+    jobs = list(enumerate(traces))
+    if project is not None or workers <= 1:
+        _project = project or load_project(base_path)
+        results = list(map(check_one, jobs))
+    else:
+        with Pool(workers, initializer=_init_worker, initargs=(base_path,)) as pool:
+            results = list(pool.imap_unordered(check_one, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    diverged = sorted((i, d) for i, d in results if d is not None)
+    return {
+        "total": len(traces),
+        "elapsed": time.perf_counter() - started,
+        "diverged": [{"index": i, "seed": traces[i]["seed"], **d} for i, d in diverged],
+    }
+
+
+class VerifyJob:
+    # 편집기에서 쓴다. 작업 스레드에서 verify 를 돌리고, 편집기는 after() 로 poll() 해 결과를 꺼낸다
+    # get_data 는 작업 스레드에서 불리므로 편집기가 들고 있는 dict 가 아니라 사본을 만들어야 한다 (undo.thaw)
+    def __init__(self, path, get_data):
+        self.path = path
+        self.get_data = get_data
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="golden-check", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        try:
+            self.results.put((verify(load_traces(self.path), project=Project(self.get_data())), None))
+        except Exception as e:
+            self.results.put((None, e))
+
+    def poll(self):
+        # (보고서, 오류) 또는 아직 끝나지 않았으면 None
+        try:
+            return self.results.get_nowait()
+        except queue.Empty:
+            return None
+
+
+def format_step(step):
+    return " ".join("-" if x is None else str(x) for x in step) if isinstance(step, list) else str(step)
+
+
+def format_report(report):
+    diverged = report["diverged"]
+    lines = [f"골든 경로 {report['total']}개 중 {len(diverged)}개가 달라졌습니다. ({report['elapsed']:.2f}초)"]
+    for d in diverged:
+        if d["step"] == "final":
+            lines.append(f"  #{d['index']} (seed {d['seed']}) 최종 {d['field']}: "
+                         f"예상 {d['expected']} → 실제 {d['actual']}")
+            continue
+        before = " / ".join(format_step(s) for s in d["before"])
+        lines.append(f"  #{d['index']} (seed {d['seed']}) {d['step']}번째 단계: "
+                     f"예상 [{format_step(d['expected'])}] → 실제 [{format_step(d['actual'])}]"
+                     + (f"  (직전: {before})" if before else ""))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from engine import default_base_path
+
+    parser = argparse.ArgumentParser(description="seed 로 진행을 기록하고, 데이터를 고친 뒤 같은 진행이 나오는지 검사합니다.")
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_record = sub.add_parser("record", help="골든 경로 기록")
+    p_record.add_argument("-n", "--count", type=int, default=200)
+    p_record.add_argument("--seed", type=int, default=0)
+    p_record.add_argument("-o", "--output", default=None)
+
+    p_verify = sub.add_parser("verify", help="기록된 경로를 현재 데이터로 다시 진행해 비교")
+    p_verify.add_argument("file", nargs='?', default=None)
+    p_verify.add_argument("-j", "--workers", type=int, default=None)
+
+    p_show = sub.add_parser("replay", help="기록 하나를 다시 진행해 단계별로 보여줌")
+    p_show.add_argument("file", nargs='?', default=None)
+    p_show.add_argument("-i", "--index", type=int, default=0)
+
+    args = parser.parse_args()
+    base = args.base or default_base_path()
+
+    if args.command == "record":
+        path = args.output or os.path.join(base, GOLDEN_PATH)
+        traces = record(load_project(args.base), args.count, seed=args.seed)
+        save_traces(path, traces)
+        print(f"{len(traces)}개 경로를 {path} 에 기록했습니다.")
+    elif args.command == "verify":
+        traces = load_traces(args.file or os.path.join(base, GOLDEN_PATH))
+        report = verify(traces, base_path=args.base, workers=args.workers or os.cpu_count() or 1)
+        print(format_report(report))
+        sys.exit(1 if report["diverged"] else 0)
+    else:
+        trace = load_traces(args.file or os.path.join(base, GOLDEN_PATH))[args.index]
+        actual = record_one(load_project(args.base), trace["seed"])
+        d = divergence(trace, actual)
+        for i, step in enumerate(actual["steps"]):
+            mark = ">>" if d and d["step"] == i else "  "
+            print(f"{mark} {i:>4} {format_step(step)}")
+        print(f"엔딩: {actual['final']['ending']} ({actual['final']['phase']}, {actual['final']['rounds']}일차)")
+        if d:
+            print(format_report({"total": 1, "elapsed": 0, "diverged": [{"index": args.index, "seed": trace["seed"], **d}]}))
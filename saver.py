@@ -0,0 +1,95 @@
+import pickle
+import queue
+import threading
+import time
+
+from engine import save_json
+
+# ---------------------------------------------------------------------------
+# 백그라운드 저장
+#
+# 편집기 스레드는 저장할 데이터의 사본만 만들어 넘기고, 직렬화와 디스크 쓰기는 작업 스레드가 한다.
+# 쓰는 동안 다시 저장하면 파일별로 마지막 사본만 남겨 한 번에 쓴다.
+# 경로 대신 write(사본) 을 가진 저장소를 넘길 수도 있다 (나눠 저장한 장면: scenestore.SceneStore / SceneBatch).
+# 사본 대신 Frozen 을 넘기면 되돌리기 기록이 들고 있는 항목별 바이트를 저장 스레드에서 풀어 쓴다.
+# 결과는 results 큐에 (저장한 [(key, 사본)], 실패한 [(key, 오류)], 걸린 시간) 으로 쌓이고,
+# 편집기가 after() 로 꺼내 간다 (Tk 는 다른 스레드에서 부르면 안 된다).
+# ---------------------------------------------------------------------------
+
+
+def snapshot(data):
+    # JSON 으로 읽은 값뿐이라 pickle 왕복이 deepcopy 보다 훨씬 빠른 깊은 복사가 된다
+    return pickle.loads(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class Frozen:
+    # undo.UndoLog.frozen() 으로 모은 {항목 키: pickle 바이트}. 고친 항목은 편집할 때 이미 바이트로 떠 두었으므로
+    # 편집기 스레드에서는 참조만 모으고, 푸는 일은 저장 스레드가 한다
+    def __init__(self, entries):
+        self.entries = entries
+
+    def thaw(self):
+        return {entry: pickle.loads(raw) for entry, raw in self.entries.items()}
+
+
+class SaveWorker:
+    def __init__(self):
+        self.pending = {}
+        self.results = queue.Queue()
+        self.busy = False
+        self.lock = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="save-worker", daemon=True)
+        self.thread.start()
+
+    def submit(self, jobs):
+        # jobs: {key: (경로 또는 저장소, 사본)}
+        with self.lock:
+            for key, (path, data) in jobs.items():
+                old = self.pending.get(key)
+                # 바뀐 부분만 담은 사본은 아직 쓰지 않은 이전 사본과 합친다
+                if old is not None and hasattr(old[1], "merge"):
+                    data = old[1].merge(data)
+                self.pending[key] = (path, data)
+            self.busy = True
+            self.lock.notify()
+
+    def run(self):
+        while True:
+            with self.lock:
+                while not self.pending:
+                    self.busy = False
+                    self.lock.notify_all()
+                    self.lock.wait()
+                jobs, self.pending = self.pending, {}
+
+            started = time.perf_counter()
+            saved, failed = [], []
+            for key, (path, data) in jobs.items():
+                try:
+                    if isinstance(data, Frozen):
+                        data = data.thaw()
+                    if isinstance(path, str):
+                        save_json(path, data)
+                    else:
+                        path.write(data)
+                    saved.append((key, data))
+                except Exception as e:
+                    failed.append((key, e))
+            self.results.put((saved, failed, time.perf_counter() - started))
+
+    def idle(self):
+        with self.lock:
+            return not self.busy
+
+    def flush(self, timeout=None):
+        # 빌드하거나 창을 닫기 전에 밀린 저장이 끝날 때까지 기다린다
+        with self.lock:
+            return self.lock.wait_for(lambda: not self.busy, timeout)
+
+    def poll(self):
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
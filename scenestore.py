@@ -0,0 +1,156 @@
+import json
+import os
+import re
+
+from engine import DATA_FILES, default_base_path, save_json
+
+# ---------------------------------------------------------------------------
+# 장면 나눠 저장하기 (선택)
+#
+# data/scene_manifest.json 이 있으면 장면을 data/scenes/<장면 id>.json 에 하나씩 나눠 둔 프로젝트로 본다.
+#
+#   data/scene_manifest.json   {장면 id: {"title", "priority", "condition"}}  (장면 순서 그대로)
+#   data/scenes/<id>.json      장면 하나 전체 (scenes.json 의 값과 같은 모양)
+#
+# 편집기는 목록을 그릴 때 목차만 읽고, 장면을 고를 때 그 장면 파일을 읽는다. 저장할 때는 바뀐 장면 파일과 목차만 쓴다.
+# script.js 는 그대로 data/scenes.json 을 읽으므로, 빌드할 때 build() 로 한 파일로 다시 합친다.
+# engine.load_data 는 나눠 둔 프로젝트면 장면 파일들을 합쳐 읽으므로 다른 도구는 차이를 모른다.
+# ---------------------------------------------------------------------------
+
+MANIFEST_PATH = "data/scene_manifest.json"
+SCENE_DIR = "data/scenes"
+MANIFEST_FIELDS = ("title", "priority", "condition")
+UNSAFE_CHARS = re.compile(r'[<>:"/\\|?*%\x00-\x1f]|^\.')
+
+
+def is_sharded(base_path=None):
+    return os.path.exists(os.path.join(base_path or default_base_path(), MANIFEST_PATH))
+
+
+def scene_filename(sid):
+    # 장면 id 에 파일 이름으로 쓸 수 없는 글자가 있으면 %XX 로 바꾼다 (한글은 그대로 둔다)
+    return UNSAFE_CHARS.sub(lambda m: "".join(f"%{b:02X}" for b in m.group(0).encode('utf-8')), sid) + ".json"
+
+
+class SceneStub(dict):
+    # 아직 파일을 읽지 않은 장면. 목차의 제목 / 우선순위 / 조건만 들고 있다
+    pass
+
+
+def manifest_entry(scene):
+    return {field: scene[field] for field in MANIFEST_FIELDS if field in scene}
+
+
+class SceneBatch:
+    # 저장 스레드에 넘기는 한 번의 장면 저장: 바뀐 장면 파일, 지울 장면 파일, 새 목차
+    def __init__(self, changed, removed, manifest):
+        self.changed = changed      # {장면 id: 장면}
+        self.removed = set(removed)
+        self.manifest = manifest
+
+    def merge(self, newer):
+        # 쓰기 전에 다시 저장하면 두 번의 변경을 합쳐 한 번에 쓴다
+        changed = {sid: scene for sid, scene in self.changed.items() if sid not in newer.removed}
+        changed.update(newer.changed)
+        removed = (self.removed - set(newer.changed)) | newer.removed
+        return SceneBatch(changed, removed, newer.manifest)
+
+    def apply_to(self, scenes):
+        # 저장이 끝난 뒤, 편집기가 들고 있는 "파일에 든 내용" 을 맞춘다
+        for sid in self.removed:
+            scenes.pop(sid, None)
+        scenes.update(self.changed)
+        order = {sid: scenes.get(sid, SceneStub(entry)) for sid, entry in self.manifest.items()}
+        scenes.clear()
+        scenes.update(order)
+
+
+class SceneStore:
+    def __init__(self, base_path=None):
+        base_path = base_path or default_base_path()
+        self.manifest_path = os.path.join(base_path, MANIFEST_PATH)
+        self.scene_dir = os.path.join(base_path, SCENE_DIR)
+        self.runtime_path = os.path.join(base_path, DATA_FILES["Scene"])
+
+    def scene_path(self, sid):
+        return os.path.join(self.scene_dir, scene_filename(sid))
+
+    def read_manifest(self):
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_stubs(self):
+        return {sid: SceneStub(entry) for sid, entry in self.read_manifest().items()}
+
+    def load_scene(self, sid):
+        with open(self.scene_path(sid), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_all(self):
+        return {sid: self.load_scene(sid) for sid in self.read_manifest()}
+
+    def load_current(self, loaded):
+        # 바깥에서 바뀌었을 때: 이미 읽은 장면만 파일에서 다시 읽고 나머지는 목차로 둔다
+        return {sid: self.load_scene(sid) if sid in loaded else SceneStub(entry)
+                for sid, entry in self.read_manifest().items()}
+
+    def batch(self, scenes, disk):
+        # scenes: 편집기의 장면들 (SceneStub 포함), disk: 마지막으로 파일에 든 내용
+        changed = {sid: scene for sid, scene in scenes.items()
+                   if not isinstance(scene, SceneStub) and disk.get(sid) != scene}
+        removed = [sid for sid in disk if sid not in scenes]
+        manifest = {sid: manifest_entry(scene) for sid, scene in scenes.items()}
+        return SceneBatch(changed, removed, manifest)
+
+    def write(self, batch):
+        # 장면 파일을 먼저 쓰고 목차를 마지막에 바꾼다 (중간에 죽어도 목차가 가리키는 파일은 있다)
+        os.makedirs(self.scene_dir, exist_ok=True)
+        for sid, scene in batch.changed.items():
+            save_json(self.scene_path(sid), scene)
+        save_json(self.manifest_path, batch.manifest)
+        for sid in batch.removed:
+            if sid not in batch.manifest and os.path.exists(self.scene_path(sid)):
+                os.remove(self.scene_path(sid))
+
+    def save_all(self, scenes):
+        self.write(SceneBatch(dict(scenes), [], {sid: manifest_entry(scene) for sid, scene in scenes.items()}))
+
+    def build(self):
+        # script.js 가 읽는 data/scenes.json 을 다시 만든다
+        scenes = self.load_all()
+        save_json(self.runtime_path, scenes)
+        return len(scenes)
+
+
+def split(base_path=None):
+    # scenes.json 을 장면 파일들과 목차로 나눈다. scenes.json 은 빌드 결과로 남겨 둔다
+    store = SceneStore(base_path)
+    with open(store.runtime_path, 'r', encoding='utf-8') as f:
+        scenes = json.load(f)
+    store.save_all(scenes)
+    return len(scenes)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="장면을 파일 하나씩 나눠 저장하는 구성을 만들거나 합칩니다.")
+    parser.add_argument("command", choices=["split", "build", "check"],
+                        help="split: scenes.json 을 나눔, build: 장면 파일들을 scenes.json 으로 합침, "
+                             "check: 합친 결과가 지금 scenes.json 과 같은지 확인")
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    args = parser.parse_args()
+
+    store = SceneStore(args.base)
+    if args.command == "split":
+        count = split(args.base)
+        print(f"장면 {count}개를 {store.scene_dir} 에 나눠 저장했습니다. 목차: {store.manifest_path}")
+    elif args.command == "build":
+        count = store.build()
+        print(f"장면 {count}개를 {store.runtime_path} 로 합쳤습니다.")
+    else:
+        with open(store.runtime_path, 'r', encoding='utf-8') as f:
+            runtime = json.load(f)
+        assembled = store.load_all()
+        same = runtime == assembled and list(runtime) == list(assembled)
+        print("같습니다." if same else "다릅니다. python scenestore.py build 로 다시 합치세요.")
@@ -0,0 +1,209 @@
+import re
+import time
+import unicodedata
+
+# ---------------------------------------------------------------------------
+# 전체 글 검색
+#
+# 장면 제목, 페이지 요약과 본문, 선택지 제목과 글, 커스텀 설명, 엔딩 글, 조건식, 이벤트 값(태그 / 소지품 이름)까지
+# 글이 든 칸을 모두 문서 하나로 보고, 두 글자 조각(bigram)과 한 글자로 역색인을 만든다.
+# 한국어는 띄어쓰기 없이 조사가 붙으므로 단어가 아니라 글자 조각으로 찾고,
+# 'ㅁㅅㅌ' 처럼 초성만 입력하면 초성끼리 비교한다.
+#
+# 색인은 데이터 파일의 최상위 항목(장면 하나, 엔딩 하나 ...) 단위로 지우고 다시 넣을 수 있어서
+# 편집할 때마다 고친 항목만 갱신한다.
+# ---------------------------------------------------------------------------
+
+TEXT_FIELDS = {
+    "title": 3.0,
+    "name": 3.0,
+    "summary": 2.0,
+    "text": 1.0,
+    "description": 1.0,
+    "conditionText": 1.0,
+    "value": 1.5,
+    "condition": 1.0,
+    "target": 1.0,
+}
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+CHOSEONG_SET = set(CHOSEONG)
+INITIAL_MARK = "\x01"
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip().lower()
+
+
+def initials(text):
+    # 한글 음절은 초성으로 바꾸고 나머지 글자는 그대로 둔다
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        out.append(CHOSEONG[code // 588] if 0 <= code < 11172 else ch)
+    return "".join(out)
+
+
+def grams(text):
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def index_keys(text):
+    # 한 글자 검색어('물', 'ㅁ') 도 찾도록 두 글자 조각에 글자 하나짜리 조각을 더한다
+    return grams(text) | (set(text) - {" "})
+
+
+def doc_keys(norm):
+    return index_keys(norm) | {INITIAL_MARK + g for g in index_keys(initials(norm))}
+
+
+def walk_texts(value, path):
+    # (경로, 칸 이름, 글) 을 모두 꺼낸다
+    if isinstance(value, dict):
+        for key, child in value.items():
+            if key in TEXT_FIELDS and isinstance(child, str):
+                if child.strip():
+                    yield path + (key,), key, child
+            elif isinstance(child, (dict, list)):
+                yield from walk_texts(child, path + (key,))
+    elif isinstance(value, list):
+        for i, child in enumerate(value):
+            yield from walk_texts(child, path + (i,))
+
+
+class SearchIndex:
+    def __init__(self):
+        self.docs = {}          # 문서 번호 -> (경로, 칸 이름, 원문, 정규화한 글)
+        self.postings = {}      # 조각 -> 문서 번호 집합
+        self.entry_docs = {}    # (파일 키, 항목 키) -> [문서 번호]
+        self.next_id = 0
+
+    def build(self, data):
+        started = time.perf_counter()
+        self.docs.clear()
+        self.postings.clear()
+        self.entry_docs.clear()
+        for dataset, entries in data.items():
+            if isinstance(entries, dict):
+                for entry, value in entries.items():
+                    self.add_entry(dataset, entry, value)
+        return time.perf_counter() - started
+
+    def add_entry(self, dataset, entry, value):
+        ids = []
+        for path, field, text in walk_texts(value, (dataset, entry)):
+            doc_id = self.next_id
+            self.next_id += 1
+            norm = normalize(text)
+            self.docs[doc_id] = (path, field, text, norm)
+            for gram in doc_keys(norm):
+                self.postings.setdefault(gram, set()).add(doc_id)
+            ids.append(doc_id)
+        self.entry_docs[(dataset, entry)] = ids
+
+    def remove_entry(self, dataset, entry):
+        for doc_id in self.entry_docs.pop((dataset, entry), ()):
+            _, _, _, norm = self.docs.pop(doc_id)
+            for gram in doc_keys(norm):
+                posting = self.postings.get(gram)
+                if posting is not None:
+                    posting.discard(doc_id)
+                    if not posting:
+                        del self.postings[gram]
+
+    def update_entry(self, dataset, entry, data):
+        self.remove_entry(dataset, entry)
+        entries = data.get(dataset)
+        if isinstance(entries, dict) and entry in entries:
+            self.add_entry(dataset, entry, entries[entry])
+
+    def search(self, query, limit=200):
+        query = normalize(query)
+        if not query:
+            return []
+        by_initials = all(ch in CHOSEONG_SET or ch == " " for ch in query)
+        keys = {INITIAL_MARK + g for g in grams(query)} if by_initials else grams(query)
+
+        postings = sorted((self.postings.get(g, set()) for g in keys), key=len)
+        if not postings or not postings[0]:
+            return []
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return []
+
+        hits = []
+        for doc_id in candidates:
+            path, field, text, norm = self.docs[doc_id]
+            haystack = initials(norm) if by_initials else norm
+            count = haystack.count(query)
+            if not count:
+                continue
+            score = TEXT_FIELDS.get(field, 1.0) * (1 + 0.2 * min(count, 5))
+            if haystack == query:
+                score *= 3
+            elif haystack.startswith(query):
+                score *= 1.5
+            score /= 1 + len(haystack) / 2000
+            hits.append((-score, path, field, text, haystack.find(query), len(query)))
+        hits.sort(key=lambda h: (h[0], [str(p) for p in h[1]]))
+        return [{"path": path, "field": field, "text": text, "score": -neg, "offset": offset, "length": length}
+                for neg, path, field, text, offset, length in hits[:limit]]
+
+
+def snippet(hit, width=60):
+    text = hit["text"].replace("\n", " ")
+    start = max(0, hit["offset"] - width // 3)
+    end = min(len(text), start + width)
+    return ("…" if start else "") + text[start:end] + ("…" if end < len(text) else "")
+
+
+DATASET_NAMES = {"Intro": "인트로", "Resource": "변수", "Custom": "커스텀", "Scene": "장면", "Endings": "엔딩", "Setting": "설정"}
+LIST_NAMES = {"elements": "요소", "events": "이벤트", "branch": "분기"}
+
+
+def describe_path(path):
+    # ("Scene", "s1", "pages", "start", "elements", 1, "elements", 0, "title") → "장면 s1 / start / 요소 2 / 선택지 1 [title]"
+    parts = [f"{DATASET_NAMES.get(path[0], path[0])} {path[1]}"]
+    # 설정은 항목 자체가 목록이다 ("events", 0, ...)
+    rest = path[1:-1] if path[0] == "Setting" else path[2:-1]
+    i = 0
+    while i < len(rest):
+        name = rest[i]
+        if name == "pages" and i + 1 < len(rest):
+            parts.append(str(rest[i + 1]))
+            i += 2
+            continue
+        if name in LIST_NAMES and i + 1 < len(rest) and isinstance(rest[i + 1], int):
+            label = LIST_NAMES[name]
+            if name == "elements" and parts[-1].startswith("요소"):
+                label = "선택지"
+            parts.append(f"{label} {rest[i + 1] + 1}")
+            i += 2
+            continue
+        i += 1
+    return " / ".join(parts) + f" [{path[-1]}]"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from engine import load_data
+
+    parser = argparse.ArgumentParser(description="스토리 데이터 전체에서 글을 찾습니다.")
+    parser.add_argument("query")
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    parser.add_argument("-n", "--limit", type=int, default=30)
+    args = parser.parse_args()
+
+    index = SearchIndex()
+    elapsed = index.build(load_data(args.base))
+    started = time.perf_counter()
+    hits = index.search(args.query, limit=args.limit)
+    took = time.perf_counter() - started
+    print(f"색인 {len(index.docs)}개 칸 ({elapsed * 1000:.0f}ms), 검색 {took * 1000:.1f}ms, {len(hits)}건")
+    for hit in hits:
+        print(f"  {describe_path(hit['path'])}: {snippet(hit)}")
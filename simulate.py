@@ -0,0 +1,143 @@
+import json
+import os
+import random
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+from engine import Game, load_project
+
+CHUNK_SIZE = 1000
+
+_project = None
+
+
+def _init_worker(base_path):
+    global _project
+    _project = load_project(base_path)
+
+
+def chunk_rng(seed, chunk_index):
+    # 작업자 수와 무관하게 같은 seed 면 같은 결과가 나오도록 묶음 단위로 난수열을 나눈다
+    return random.Random(f"{seed}:{chunk_index}")
+
+
+def run_chunk(args):
+    chunk_index, count, seed, coverage = args
+    game = Game(_project, rng=chunk_rng(seed, chunk_index), counting=coverage)
+    endings = Counter()
+    rounds = Counter()
+    scene_visits = Counter()
+    scene_runs = Counter()
+    for _ in range(count):
+        result = game.play()
+        endings[result["ending"] if result["phase"] == 'ending' else None] += 1
+        rounds[result["rounds"]] += 1
+        scene_visits.update(result["scenes"])
+        scene_runs.update(set(result["scenes"]))
+    return endings, rounds, scene_visits, scene_runs, game.counts
+
+
+def simulate(runs, workers=None, seed=0, base_path=None, coverage=False, project=None):
+    # project 를 넘기면 (편집기의 메모리 데이터 등) 그 데이터로 한 프로세스에서 진행한다
+    global _project
+    workers = 1 if project is not None else workers or os.cpu_count() or 1
+    chunks = []
+    for i, start in enumerate(range(0, runs, CHUNK_SIZE)):
+        chunks.append((i, min(CHUNK_SIZE, runs - start), seed, coverage))
+
+    endings = Counter()
+    rounds = Counter()
+    scene_visits = Counter()
+    scene_runs = Counter()
+    counts = None
+
+    started = time.perf_counter()
+    if workers <= 1:
+        _project = project or load_project(base_path)
+        results = map(run_chunk, chunks)
+        pool = None
+    else:
+        pool = Pool(workers, initializer=_init_worker, initargs=(base_path,))
+        results = pool.imap_unordered(run_chunk, chunks)
+    try:
+        for e, r, sv, sr, c in results:
+            endings.update(e)
+            rounds.update(r)
+            scene_visits.update(sv)
+            scene_runs.update(sr)
+            if c is not None:
+                counts = c if counts is None else [a + b for a, b in zip(counts, c)]
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    report = {
+        "runs": runs,
+        "seed": seed,
+        "workers": workers,
+        "elapsed": time.perf_counter() - started,
+        "endings": dict(endings),
+        "rounds": dict(sorted(rounds.items())),
+        "scene_visits": dict(scene_visits),
+        "scene_runs": dict(scene_runs),
+    }
+    if coverage:
+        report["coverage"] = counts
+    return report
+
+
+def format_report(report, scene_ids=None):
+    runs = report["runs"] or 1
+    lines = [f"{report['runs']}회 진행 (seed {report['seed']}, 작업자 {report['workers']}, {report['elapsed']:.2f}초)", ""]
+
+    lines.append("[엔딩]")
+    for eid, count in sorted(report["endings"].items(), key=lambda kv: -kv[1]):
+        name = eid if eid is not None else "(진행 불가)"
+        lines.append(f"  {name:<20} {count:>9}  {count / runs * 100:6.2f}%")
+
+    lines.append("")
+    lines.append("[진행 일수]")
+    peak = max(report["rounds"].values(), default=1)
+    for day, count in report["rounds"].items():
+        bar = "#" * max(1, round(count / peak * 40))
+        lines.append(f"  {day:>3}일차 {count:>9}  {count / runs * 100:6.2f}% {bar}")
+
+    lines.append("")
+    lines.append("[장면 방문]  (등장한 판의 비율 / 판당 평균 방문)")
+    ids = scene_ids if scene_ids is not None else sorted(report["scene_visits"])
+    for sid in ids:
+        visits = report["scene_visits"].get(sid, 0)
+        seen = report["scene_runs"].get(sid, 0)
+        lines.append(f"  {sid:<20} {seen / runs * 100:6.2f}%  {visits / runs:6.3f}")
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="무작위 플레이를 여러 번 진행해 엔딩 분포를 집계합니다.")
+    parser.add_argument("-n", "--runs", type=int, default=10000)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    parser.add_argument("--json", default=None, help="결과를 JSON 파일로 저장")
+    parser.add_argument("--batch", action='store_true', help="numpy 로 여러 판을 한꺼번에 진행 (numpy 필요)")
+    args = parser.parse_args()
+
+    report = None
+    if args.batch:
+        from batch import Unsupported, simulate_batch
+        try:
+            report = simulate_batch(args.runs, seed=args.seed, base_path=args.base)
+        except Unsupported as e:
+            print(f"[묶음 모드 불가] {e} — 일반 모드로 진행합니다.")
+    if report is None:
+        report = simulate(args.runs, workers=args.workers, seed=args.seed, base_path=args.base)
+    print(format_report(report, scene_ids=load_project(args.base).scene_ids))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
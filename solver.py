@@ -0,0 +1,817 @@
+import heapq
+import math
+import sys
+import time
+from collections import defaultdict
+from fractions import Fraction
+
+from analyzer import EMPTY_ENV, INF, TOP, Env, a_floor, abstract, interval, truth, union
+from engine import Game, load_project
+from expression import is_number, js_floor, needs_floor, strict_equals, symbols, walk
+
+# ---------------------------------------------------------------------------
+# 엔딩 확률 정밀 계산
+#
+# 무작위 플레이(선택지 균등, 장면/분기 가중치, random) 가 도달할 수 있는 상태를
+# 모두 펼쳐 같은 상태끼리 확률을 합친다. 표본을 뽑지 않으므로 결과에 오차가 없다.
+# ---------------------------------------------------------------------------
+
+
+class Unsupported(Exception):
+    pass
+
+
+def linear_form(node):
+    # random 에 대한 일차식 a * random + b 이면 (a, b)
+    kind = node[0]
+    if kind == 'random':
+        return (1, 0)
+    if kind == 'const':
+        return (0, node[1]) if is_number(node[1]) else None
+    if kind != 'op':
+        return None
+    _, op, a, b = node
+    la, lb = linear_form(a), linear_form(b)
+    if la is None or lb is None:
+        return None
+    if op == '+':
+        return (la[0] + lb[0], la[1] + lb[1])
+    if op == '-':
+        return (la[0] - lb[0], la[1] - lb[1])
+    if op == '*':
+        if la[0] == 0:
+            return (la[1] * lb[0], la[1] * lb[1])
+        if lb[0] == 0:
+            return (la[0] * lb[1], la[1] * lb[1])
+    return None
+
+
+def random_outcomes(node):
+    # floor(a * random + b) 가 가질 수 있는 정수값마다 (확률, 그 값을 내는 random 대표값)
+    if sum(1 for n in walk(node) if n[0] == 'random') != 1:
+        raise Unsupported("random 이 두 번 이상 쓰인 식은 계산할 수 없습니다.")
+    form = linear_form(node)
+    if form is None:
+        raise Unsupported("random 은 'random * 숫자 + 숫자' 꼴의 식에서만 계산할 수 있습니다.")
+    a, b = Fraction(form[0]), Fraction(form[1])
+    if a == 0:
+        return [(Fraction(1), 0.5)]
+    lo, hi = min(b, a + b), max(b, a + b)
+    outcomes = []
+    for v in range(math.floor(lo), math.ceil(hi)):
+        u0, u1 = (v - b) / a, (v + 1 - b) / a
+        if a < 0:
+            u0, u1 = u1, u0
+        u0, u1 = max(u0, 0), min(u1, 1)
+        if u1 > u0:
+            outcomes.append((u1 - u0, float((u0 + u1) / 2)))
+    return outcomes
+
+
+def container_only(node, name):
+    # tags / items 가 "<<", ">>" 의 배열 쪽에만 쓰이면 순서를 무시해도 결과가 같다
+    if node[0] == 'op':
+        _, op, a, b = node
+        for child, is_container in ((a, op == '<<'), (b, op == '>>')):
+            if child == (name,) and is_container:
+                continue
+            if not container_only(child, name):
+                return False
+        return True
+    if node[0] == 'seq':
+        return all(container_only(child, name) for child in node[1])
+    return node != (name,)
+
+
+def observed_elements(node, name):
+    # tags / items 가 "배열 << '글자'" 꼴로만 읽히면 그 글자들의 집합 (그 밖의 원소는 결과에 영향이 없다)
+    found = set()
+    for n in walk(node):
+        if n[0] != 'op':
+            continue
+        _, op, a, b = n
+        container, element = (a, b) if op == '<<' else (b, a) if op == '>>' else (None, None)
+        if container == (name,):
+            if element[0] != 'const' or not isinstance(element[1], str):
+                return None
+            found.add(element[1])
+    return found if container_only(node, name) else None
+
+
+class FixedRandom:
+    def __init__(self, value):
+        self.value = value
+
+    def random(self):
+        return self.value
+
+
+class ExactGame(Game):
+    # 무작위로 고르는 곳마다 갈래를 기록해 두고, 정해진 갈래(script)대로 다시 진행한다
+
+    def __init__(self, project, one):
+        self.one = one
+        self.exact_values = {}
+        self.exact_conditions = {}
+        self.script = []
+        self.pos = 0
+        self.prob = one
+        self.forks = []
+        super().__init__(project)
+
+    def begin(self, script, forks):
+        self.script = list(script)
+        self.pos = 0
+        self.prob = self.one
+        self.forks = forks
+
+    def decide(self, probs):
+        if self.pos < len(self.script):
+            i = self.script[self.pos]
+        else:
+            options = [j for j, p in enumerate(probs) if p > 0] or [0]
+            i = options[0]
+            for j in options[1:]:
+                self.forks.append(self.script[:self.pos] + [j])
+            self.script.append(i)
+        self.pos += 1
+        self.prob *= probs[i]
+        return i
+
+    def ratio(self, part, total):
+        if isinstance(self.one, Fraction):
+            return Fraction(part) / Fraction(total)
+        return part / total
+
+    def pick_weighted(self, entries):
+        max_priority = max(e.get("priority", 0) for e in entries)
+        top = [i for i, e in enumerate(entries) if e.get("priority", 0) == max_priority]
+        weights = [to_weight(entries[i].get("weight", 1)) for i in top]
+        total = sum(weights)
+        if total <= 0:
+            # r 이 0 이 되어 첫 번째가 뽑힌다
+            return top[0]
+        return top[self.decide([self.ratio(w, total) for w in weights])]
+
+    def pick_scene(self, top, extra):
+        candidates = self.top_candidates(top, extra)
+        return candidates[self.pick_weighted([self.project.scenes[c] for c in candidates])]
+
+    def pick_static(self, entries):
+        return self.pick_weighted(entries)
+
+    def return_value(self, expr):
+        key = self.project.compiler.key(expr)
+        fn = self.exact_values.get(key)
+        if fn is None:
+            fn = self.exact_values[key] = self.compile_value(key)
+        return fn(self)
+
+    def compile_value(self, key):
+        tree = self.project.compiler.tree(key)
+        inner = self.project.compiler.value(key)
+        if 'random' not in symbols(tree):
+            return inner
+        outcomes = random_outcomes(tree)
+        if not isinstance(self.one, Fraction):
+            outcomes = [(float(p), u) for p, u in outcomes]
+        probs = [p for p, _ in outcomes]
+
+        def fn(env):
+            u = outcomes[env.decide(probs)][1]
+            rng, env.rng = env.rng, FixedRandom(u)
+            try:
+                return inner(env)
+            finally:
+                env.rng = rng
+        return fn
+
+    def check(self, condition):
+        key = self.project.compiler.key(condition)
+        uses_random = self.exact_conditions.get(key)
+        if uses_random is None:
+            uses_random = self.exact_conditions[key] = 'random' in symbols(self.project.compiler.tree(key))
+        if uses_random:
+            raise Unsupported(f"조건식에 random 이 쓰여 계산할 수 없습니다: {condition}")
+        return super().check(condition)
+
+
+def to_weight(weight):
+    if not is_number(weight) or weight < 0:
+        raise Unsupported(f"가중치가 음수가 아닌 숫자가 아닙니다: {weight!r}")
+    return weight
+
+
+def item_order(x):
+    return (type(x).__name__, repr(x))
+
+
+def contains(vocab, needle):
+    # 글자는 집합에서 바로 찾는다 (strict_equals 와 같은 결과)
+    if isinstance(needle, str):
+        return needle in vocab
+    return any(strict_equals(x, needle) for x in vocab)
+
+
+class Liveness:
+    # 상태를 합치는 기준. 남은 장면(끝내지 않은 장면 + 지금 장면), 설정 이벤트, 엔딩, 제한값만 보고
+    # 지금 값과 남은 변화량으로 자원마다 앞으로 가질 수 있는 구간을 구한다 (analyzer 의 구간 계산).
+    # 그 구간에서 항상 참 / 거짓인 조건은 읽지 않는 것으로 치고, 항상 거짓인 장면 / 선택지 / 이벤트는 없는 것으로 본다.
+    # 읽기 전에 같은 선택지 안에서 조건 없는 '=' 로 덮어쓰이는 자원(randvar 등) 도 읽는 것으로 치지 않는다
+    def __init__(self, project, filter_tags, filter_items, keep_round):
+        self.project = project
+        self.tree = project.compiler.tree
+        self.filter_tags = filter_tags
+        self.filter_items = filter_items
+        self.max_round = project.max_round if keep_round else None
+        self.cache = {}
+        self.decided = {}
+        self.elements = {}
+        self.conditions = []    # 조건식이 놓인 자리마다 (식, 읽는 값, 트리, 확인하는 글자). 결정 결과는 이 순서로 모은다
+
+        self.endings = [self.condition(e["condition"]) for e in project.endings.values() if e.get("condition")]
+        self.bounds = [(rid, field, project.resources[rid][field]) for rid in project.limited_resources
+                       for field in ("maxValue", "minValue") if field in project.resources[rid]]
+        # 설정 이벤트는 선택지 하나처럼 다룬다 (일차마다 한 번)
+        self.setting = self.button({"events": project.setting_events}, False)
+        self.scenes = {}
+        for sid, scene in project.scenes.items():
+            looping = self.looping_pages(sid, scene)
+            buttons = [self.button(button, pid in looping)
+                       for pid in scene.get("pages", {}) for group in project.page_groups.get((sid, pid), [])
+                       for button in group]
+            condition = self.condition(scene["condition"]) if "condition" in scene else None
+            self.scenes[sid] = (condition, scene.get("repeatable") is not False, buttons)
+
+        # 결정된 조건만 읽는 자원을 바꿔 넣어 볼 대표값: 조건식과 제한값의 숫자 상수 근처, 처음 값
+        constants = defaultdict(set)
+        for _, reads, tree, _ in self.conditions:
+            numbers = {n[1] for n in walk(tree) if n[0] == 'const' and is_number(n[1])}
+            for rid in reads:
+                constants[rid] |= numbers
+        for rid, _, expr in self.bounds:
+            constants[rid] |= {n[1] for n in walk(self.tree(expr)) if n[0] == 'const' and is_number(n[1])}
+            value = project.resources.get(expr, {}).get("value")
+            if is_number(value):
+                constants[rid].add(value)
+        self.candidates = {}
+        for rid, res in project.resources.items():
+            found = {k + d for k in constants[rid] for d in (-1, 0, 1)}
+            if is_number(res.get("value")):
+                found.add(res["value"])
+            self.candidates[rid] = sorted(found)
+
+    def reads(self, expr, killed=()):
+        return symbols(self.tree(expr)) - {'random'} - set(killed)
+
+    def condition(self, expr, killed=()):
+        tree = self.tree(expr)
+        needles = []
+        for n in walk(tree):
+            if n[0] == 'op' and n[1] in ('<<', '>>'):
+                container, needle = (n[2], n[3]) if n[1] == '<<' else (n[3], n[2])
+                if container[0] in ('tags', 'items') and needle[0] == 'const':
+                    needles.append((container[0], needle[1]))
+        reads = self.reads(expr, killed)
+        self.conditions.append((expr, reads, tree, (tuple(reads - {'tags', 'items', 'required'}), needles)))
+        return len(self.conditions) - 1
+
+    def looping_pages(self, sid, scene):
+        # 한 번 방문에 여러 번 지날 수 있는 페이지 (자기 자신으로 돌아올 수 있는 페이지)
+        edges = {pid: {b.get("value") for group in self.project.page_groups.get((sid, pid), []) for button in group
+                       for b in button.get("branch") or [] if b.get("type") == 'page'}
+                 for pid in scene.get("pages", {})}
+        looping = set()
+        for pid in edges:
+            seen, stack = set(), list(edges[pid])
+            while stack:
+                nxt = stack.pop()
+                if nxt == pid:
+                    looping.add(pid)
+                    break
+                if nxt in edges and nxt not in seen:
+                    seen.add(nxt)
+                    stack.extend(edges[nxt])
+        return looping
+
+    def button(self, button, looping):
+        # (조건, [이벤트], [분기 조건], 반복되는 페이지인지)
+        # 이벤트: (대상, 연산, 값 식, 조건 자리 또는 None, 값이 읽는 자원, 조건이 읽는 자원, 한 번에 바뀌는 양)
+        killed = set()
+        condition = self.condition(button["condition"]) if "condition" in button else None
+        effects = []
+        for e in button.get("events", []):
+            if e.get("type") != 'setValue':
+                continue
+            cond = self.condition(e["condition"], killed) if "condition" in e else None
+            reads = self.reads(e.get("value"), killed)
+            effects.append((e.get("target"), e.get("operation"), e.get("value"), cond, reads,
+                            self.conditions[cond][1] if cond is not None else set(), self.delta(e)))
+            if e.get("operation") == '=' and "condition" not in e and e.get("target") in self.project.resources:
+                killed.add(e.get("target"))
+        branches = [self.condition(b["condition"], killed) for b in button.get("branch") or [] if b.get("condition")]
+        return (condition, effects, branches, looping)
+
+    def delta(self, e):
+        # 한 번 실행할 때 (줄 수 있는 양, 늘 수 있는 양, '=' 로 들어갈 구간). 알 수 없으면 None
+        tree = self.tree(e.get("value"))
+        if any(n[0] in ('res', 'required', 'tags', 'items') for n in walk(tree)):
+            return None
+        v = abstract(tree, EMPTY_ENV)
+        if needs_floor(tree):
+            v = a_floor(v)
+        if v is TOP:
+            return None
+        lo, hi = v
+        operation = e.get("operation")
+        if operation == '=':
+            return (0, 0, v)
+        if operation == '+':
+            return (max(-lo, 0), max(hi, 0), None)
+        if operation == '-':
+            return (max(hi, 0), max(-lo, 0), None)
+        if operation == '*' and lo == hi == 1:
+            return (0, 0, None)
+        if operation in ('*', '/'):
+            return None
+        return (0, 0, None)
+
+    # -- 한 상태 분석 -----------------------------------------------------
+
+    def analyze(self, completed, scene_id, rnd, values, real, tags, items, required):
+        # (다시 나올 수 없는 장면, 앞으로 읽히는 값, 결정된 조건이 읽는 자원, 확인하는 tags 글자, 확인하는 items 글자,
+        #  조건마다의 결정)
+        key = (completed, scene_id, rnd, tuple(values.values()), tuple(real.values()),
+               frozenset(tags), frozenset(items), required)
+        found = self.cache.get(key)
+        if found is not None:
+            return found
+        project = self.project
+        if self.max_round is None:
+            settings_left = visits_left = INF
+        else:
+            settings_left = max(self.max_round - rnd + 1, 0)
+            visits_left = max(self.max_round - rnd, 0)
+
+        parts = [(sid, self.scenes[sid]) for sid in project.scene_ids if sid not in completed or sid == scene_id]
+        closed = set()
+        dead = set()
+        while True:
+            buttons = [(self.setting, settings_left)]
+            for sid, (_, repeatable, scene_buttons) in parts:
+                if sid not in closed:
+                    times = (visits_left + (sid == scene_id)) if repeatable else 1
+                    buttons += [(button, times) for button in scene_buttons]
+            env = self.env(buttons, dead, values, real, tags, items, required)
+
+            changed = False
+            for sid, (condition, _, _) in parts:
+                if sid != scene_id and sid not in closed and condition is not None \
+                        and self.decide(condition, env) is False:
+                    closed.add(sid)
+                    changed = True
+            for (condition, effects, _, _), _ in buttons:
+                if condition in dead:
+                    continue
+                if condition is not None and self.decide(condition, env) is False:
+                    dead.add(condition)
+                    changed = True
+                    continue
+                for effect in effects:
+                    cond = effect[3]
+                    if cond is not None and cond not in dead and self.decide(cond, env) is False:
+                        dead.add(cond)
+                        changed = True
+            if not changed:
+                break
+
+        # 흐름을 정하는 조건 중 결정되지 않은 것이 읽는 값은 살아 있고, 결정된 것이 읽는 값은 결정을 지키도록 고정한다
+        decisions = {}
+        live, pinned, exprs, effects = set(), set(), [], []
+
+        def visit(index):
+            if index not in decisions:
+                decisions[index] = self.decide(index, env)
+                expr, reads, _, _ = self.conditions[index]
+                if decisions[index] is None:
+                    exprs.append(expr)
+                else:
+                    pinned.update(reads)
+            return self.conditions[index][1] if decisions[index] is None else ()
+
+        for index in self.endings:
+            live.update(visit(index))
+        for sid, (condition, _, _) in parts:
+            if condition is not None and sid not in closed and sid not in completed:
+                live.update(visit(condition))
+        for (condition, button_effects, branches, _), _ in buttons:
+            if condition is not None:
+                live.update(visit(condition))
+                if condition in dead:
+                    continue
+            effects += [(target, value, reads, cond) for target, _, value, cond, reads, _, _ in button_effects]
+            for index in branches:
+                live.update(visit(index))
+        effects += [(rid, expr, self.reads(expr), None) for rid, _, expr in self.bounds]
+
+        # 살아 있는 값을 바꾸는 이벤트가 읽는 값도 살아 있다. 고정한 값을 바꾸는 이벤트는 일어나는지만 결정에 쓰인다
+        size, used = None, set()
+        while size != (len(live), len(pinned)):
+            size = (len(live), len(pinned))
+            for index, (target, value, reads, cond) in enumerate(effects):
+                if target in live:
+                    if cond is not None:
+                        live.update(visit(cond))
+                        if cond in dead:
+                            continue
+                    live |= reads
+                    if index not in used:
+                        used.add(index)
+                        exprs.append(value)
+                elif target in pinned and cond is not None:
+                    visit(cond)
+            for rid, _, expr in self.bounds:
+                if rid in pinned:
+                    pinned |= self.reads(expr)
+        tags_observed = self.observed(exprs, 'tags') if self.filter_tags else None
+        items_observed = self.observed(exprs, 'items') if self.filter_items else None
+        signature = (frozenset(closed), frozenset(live), tuple(sorted(decisions.items())))
+        found = self.cache[key] = (closed, live, pinned - live, tags_observed, items_observed, signature)
+        return found
+
+    def observed(self, exprs, name):
+        found = set()
+        for expr in exprs:
+            elements = self.elements.get((expr, name), False)
+            if elements is False:
+                elements = self.elements[(expr, name)] = observed_elements(self.tree(expr), name)
+            if elements is None:
+                return None
+            found |= elements
+        return found
+
+    def decide(self, index, env):
+        # 조건이 읽는 값의 구간과 확인하는 글자가 있을 수 있는지만으로 정해지므로 그것으로 기억해 둔다
+        _, _, tree, (reads, needles) = self.conditions[index]
+        key = (index, tuple(map(env.ranges.get, reads)), env.required,
+               tuple(None if env.vocab[c] is TOP else contains(env.vocab[c], needle) for c, needle in needles))
+        found = self.decided.get(key, False)
+        if found is False:
+            found = self.decided[key] = truth(abstract(tree, env))
+        return found
+
+    def env(self, buttons, dead, values, real, tags, items, required):
+        down, up, assigned, unknown = defaultdict(int), defaultdict(int), {}, set()
+        vocab = {'tags': set(tags), 'items': set(items)}
+        for (condition, effects, _, looping), times in buttons:
+            if condition in dead:
+                continue
+            if looping:
+                times = INF
+            for target, operation, value, cond, _, _, delta in effects:
+                if cond in dead:
+                    continue
+                if target in ('tags', 'items'):
+                    if operation == 'add' and vocab[target] is not TOP:
+                        tree = self.tree(value)
+                        if tree[0] == 'const':
+                            vocab[target].add(js_floor(tree[1]) if needs_floor(tree) else tree[1])
+                        else:
+                            vocab[target] = TOP
+                    continue
+                if delta is None:
+                    unknown.add(target)
+                    continue
+                lower, upper, assign = delta
+                if lower:
+                    down[target] += lower * times
+                if upper:
+                    up[target] += upper * times
+                if assign is not None:
+                    assigned[target] = union(assigned[target], assign) if target in assigned else assign
+
+        ranges = {}
+        for rid, value in values.items():
+            current = real[rid]
+            if rid in unknown or not is_number(value) or not is_number(current):
+                continue
+            lo, hi = min(value, current) - down[rid], max(value, current) + up[rid]
+            if rid in assigned:
+                lo, hi = min(lo, assigned[rid][0] - down[rid]), max(hi, assigned[rid][1] + up[rid])
+            ranges[rid] = (lo, hi)
+        # 제한값이 바뀌지 않는 자원만 구간을 제한값으로 자른다 (바뀌면 realValue 로 돌아갈 수 있어 모른다고 본다)
+        free = Env(dict(ranges), vocab, interval(required))
+        for rid, field, expr in self.bounds:
+            if rid not in ranges:
+                continue
+            bound = abstract(self.tree(expr), free)
+            if bound is TOP or bound[0] != bound[1]:
+                del ranges[rid]
+                continue
+            lo, hi = ranges[rid]
+            b = bound[0]
+            ranges[rid] = (min(lo, b), min(hi, b)) if field == "maxValue" else (max(lo, b), max(hi, b))
+        return Env(ranges, vocab, interval(required))
+
+    def canonical(self, rid, fits, completed, scene_id, rnd, values, real, tags, items, required, signature):
+        # 결정된 조건만 읽는 자원을, 모든 조건의 결정이 그대로인 대표값으로 바꾼다 (찾지 못하면 None)
+        for candidate in self.candidates[rid]:
+            if candidate == values[rid] and candidate == real[rid]:
+                return candidate
+            if not fits(rid, candidate):
+                continue
+            trial_values, trial_real = dict(values), dict(real)
+            trial_values[rid] = trial_real[rid] = candidate
+            if self.analyze(completed, scene_id, rnd, trial_values, trial_real, tags, items, required)[5] == signature:
+                return candidate
+        return None
+
+
+class Solver:
+    def __init__(self, project, max_states=1000000, time_limit=60, fractions=False, epsilon=None, progress=None):
+        self.project = project
+        self.max_states = max_states
+        self.time_limit = time_limit
+        self.one = Fraction(1) if fractions else 1.0
+        self.zero = self.one - self.one
+        self.epsilon = epsilon if epsilon is not None else (0 if fractions else 1e-15)
+        self.progress = progress
+        for rid in project.limited_resources:
+            res = project.resources[rid]
+            for field in ("maxValue", "minValue"):
+                if field in res and 'random' in symbols(project.compiler.tree(res[field])):
+                    raise Unsupported(f"{rid} 의 {field} 에 random 이 쓰여 계산할 수 없습니다.")
+        self.game = ExactGame(project, self.one)
+
+        # 읽히지 않는 자원은 상태에서 빼서 같은 상태로 합친다
+        read = project.read_symbols()
+        self.live_ids = [rid for rid in project.resources if rid in read]
+        self.limited_ids = [rid for rid in self.live_ids if rid in project.limited_resources]
+        # 일차는 maxRound 검사에만 쓰이므로, maxRound 가 없으면 상태에서 빼서 여러 일차를 합친다
+        self.keep_round = project.max_round != 0 and project.max_round is not None
+        self.initial = {rid: res.get("realValue", res.get("value")) for rid, res in project.resources.items()}
+        trees = [project.compiler.tree(expr) for expr in project.runtime_expressions()]
+        self.tags_unordered = all(container_only(t, 'tags') for t in trees)
+        self.items_unordered = all(container_only(t, 'items') for t in trees)
+        self.liveness = Liveness(project, self.observed(trees, 'tags') is not None,
+                                 self.observed(trees, 'items') is not None, self.keep_round)
+        self.transitions = {}
+
+    @staticmethod
+    def observed(trees, name):
+        found = set()
+        for tree in trees:
+            elements = observed_elements(tree, name)
+            if elements is None:
+                return None
+            found |= elements
+        return found
+
+    # -- 상태 -------------------------------------------------------------
+
+    def project_list(self, elements, observed, unordered):
+        # 어떤 식도 확인하지 않는 원소는 빼서 같은 상태로 합친다 (개수는 남긴다: 꺼내는 횟수가 결과를 바꾼다)
+        if observed is not None:
+            elements = [x for x in elements if isinstance(x, str) and x in observed]
+        return tuple(sorted(elements, key=item_order) if unordered else elements)
+
+    def key(self, game):
+        rnd = game.round if self.keep_round else None
+        if game.phase == 'ending':
+            return ('ending', game.ending, rnd)
+        if game.phase == 'stuck':
+            return ('stuck', None, rnd)
+        completed = frozenset(game.completed)
+        values = {rid: game.values[rid] for rid in self.live_ids}
+        real = {rid: game.real[rid] for rid in self.live_ids}
+        state = (completed, game.scene_id, game.round if self.keep_round else 0)
+        tail = (game.tags, game.items, game.requirements_met)
+        closed, live, pinned, tags_observed, items_observed, signature = self.liveness.analyze(*state, values, real, *tail)
+        # 앞으로 읽히지 않을 자원은 처음 값으로, 결정된 조건만 읽는 자원은 같은 결정을 내는 대표값으로 바꾼다
+        for rid in self.live_ids:
+            if rid in live:
+                continue
+            value = None
+            if rid in pinned:
+                value = self.liveness.canonical(rid, self.fits, *state, values, real, *tail, signature)
+                if value is None:
+                    continue
+            values[rid] = real[rid] = self.initial[rid] if value is None else value
+        # 조건이 항상 거짓이라 다시 나올 수 없는 장면은 끝낸 장면과 같다
+        completed = completed | {sid for sid in closed if self.project.scenes[sid].get("repeatable") is False}
+        tags = self.project_list(game.tags, tags_observed, self.tags_unordered)
+        items = self.project_list(game.items, items_observed, self.items_unordered)
+        # 식은 제한이 적용된 value 만 읽는다. realValue 는 제한에 걸려 value 와 달라진 자원만 따로 둔다
+        # (제한값이 다시 커지면 realValue 로 돌아가므로 버릴 수 없다)
+        clipped = tuple((rid, real[rid]) for rid in self.limited_ids if real[rid] != values[rid])
+        values = tuple(values[rid] for rid in self.live_ids)
+        if game.phase == 'custom':
+            return ('custom', values, clipped, tags, items, game.requirements_met)
+        return ('event', rnd, game.scene_id, game.page_id, frozenset(game.locked),
+                completed, values, clipped, tags, items, game.requirements_met)
+
+    def fits(self, rid, value):
+        # 제한값 안에 있어 value == realValue 로 둘 수 있는 값인지
+        return rid not in self.project.limited_resources or self.game.clamp(rid, value) == value
+
+    def load(self, key):
+        game = self.game
+        game.selected = {}
+        game.ending = None
+        game.visits = []
+        game.scene_log = []
+        if key[0] == 'custom':
+            _, values, clipped, tags, items, required = key
+            game.phase = 'custom'
+            game.round = 0
+            game.scene_id = game.page_id = None
+            game.locked = set()
+            game.completed = set()
+        else:
+            _, rnd, game.scene_id, game.page_id, locked, completed, values, clipped, tags, items, required = key
+            game.phase = 'event'
+            game.round = rnd or 0
+            game.locked = set(locked)
+            game.completed = set(completed)
+        game.real = dict(self.initial)
+        game.real.update(zip(self.live_ids, values))
+        game.real.update(clipped)
+        game.tags = list(tags)
+        game.items = list(items)
+        game.requirements_met = required
+        game.values = dict(game.real)
+        game.clamp_values()
+        game.invalidate()
+        return game
+
+    def expand(self, key):
+        # 한 상태에서 다음 선택 시점(또는 끝)까지의 모든 갈래: [(확률, 다음 상태, 새로 등장한 장면)]
+        if key in self.transitions:
+            return self.transitions[key]
+        game = self.load(key)
+        if key[0] == 'custom':
+            actions = [None]
+        else:
+            actions = list(range(len(game.available_choices())))
+        merged = defaultdict(lambda: self.zero)
+        if not actions:
+            merged[(('stuck', None, key[1]), None)] += self.one
+        for action in actions:
+            forks = [[]]
+            while forks:
+                script = forks.pop()
+                game = self.load(key)
+                game.begin(script, forks)
+                if action is None:
+                    game.start_event()
+                else:
+                    game.choose(game.available_choices()[action])
+                scene = game.scene_log[-1] if game.scene_log else None
+                merged[(self.key(game), scene)] += game.prob / len(actions)
+        result = [(p, nxt, scene) for (nxt, scene), p in merged.items()]
+        self.transitions[key] = result
+        return result
+
+    # -- 계산 -------------------------------------------------------------
+
+    def solve(self):
+        started = time.perf_counter()
+        try:
+            starts = Game(self.project).custom_outcomes(one=self.one)
+        except (ValueError, OverflowError) as e:
+            raise Unsupported(str(e))
+
+        endings = defaultdict(lambda: self.zero)
+        rounds = defaultdict(lambda: self.zero)
+        scene_visits = defaultdict(lambda: self.zero)
+        mass = defaultdict(lambda: self.zero)
+        queue = []
+        queued = set()
+        counter = 0
+        dropped = self.zero
+
+        def push(key, p):
+            nonlocal counter
+            if key[0] in ('ending', 'stuck'):
+                endings[key[1]] += p
+                if key[2] is not None:
+                    rounds[key[2]] += p
+                return
+            mass[key] += p
+            if key not in queued:
+                queued.add(key)
+                counter += 1
+                heapq.heappush(queue, ((key[1] or 0) if key[0] == 'event' else -1, counter, key))
+
+        game = self.game
+        for prob, _, snapshot, required in starts:
+            game.reset()
+            game.phase = 'custom'
+            game.restore(snapshot)
+            game.requirements_met = required
+            push(self.key(game), prob)
+
+        expanded = 0
+        states = 0
+        last_report = started
+        current = -1
+        while queue:
+            order, _, key = heapq.heappop(queue)
+            if self.keep_round and order > current:
+                # 일차는 줄지 않으므로 지난 일차의 상태는 다시 나오지 않는다
+                current = order
+                self.transitions.clear()
+                self.liveness.cache.clear()
+                self.liveness.decided.clear()
+            queued.discard(key)
+            p = mass.pop(key)
+            if p <= self.epsilon:
+                # 순환하며 남은 아주 작은 확률은 버린다
+                dropped += p
+                continue
+            elapsed = time.perf_counter() - started
+            if len(self.transitions) + len(queue) >= self.max_states or (self.time_limit and elapsed >= self.time_limit):
+                raise Unsupported(
+                    f"상태 공간이 너무 커서 정확히 계산할 수 없습니다 "
+                    f"({elapsed:.0f}초 동안 {expanded}번 전개, 보관 {len(self.transitions)}개 / 대기 {len(queue)}개, "
+                    f"끝난 확률 {float(sum(endings.values())) * 100:.2f}%). "
+                    f"--max-states / --time-limit 을 늘리거나 simulate.py 로 표본을 뽑아 보세요.")
+            if key not in self.transitions:
+                states += 1
+            for q, nxt, scene in self.expand(key):
+                if scene is not None:
+                    scene_visits[scene] += p * q
+                push(nxt, p * q)
+            expanded += 1
+            if self.progress and time.perf_counter() - last_report >= 1:
+                last_report = time.perf_counter()
+                self.progress(states, len(queue), float(sum(endings.values())))
+
+        return {
+            "states": states,
+            "expanded": expanded,
+            "elapsed": time.perf_counter() - started,
+            "endings": dict(endings),
+            "rounds": dict(sorted(rounds.items())),
+            "scene_visits": dict(scene_visits),
+            "unresolved": dropped,
+        }
+
+
+def solve(project=None, base_path=None, **options):
+    project = project or load_project(base_path)
+    return Solver(project, **options).solve()
+
+
+def format_report(report, scene_ids=None):
+    lines = [f"상태 {report['states']}개 펼침 ({report['expanded']}번 전개, {report['elapsed']:.2f}초)"]
+    if report["unresolved"]:
+        lines.append(f"※ 순환 때문에 확률 {float(report['unresolved']):.3g} 만큼을 버렸습니다.")
+    lines.append("")
+
+    lines.append("[엔딩]")
+    for eid, p in sorted(report["endings"].items(), key=lambda kv: -kv[1]):
+        name = eid if eid is not None else "(진행 불가)"
+        exact = f"  = {p}" if isinstance(p, Fraction) else ""
+        lines.append(f"  {name:<20} {float(p) * 100:9.4f}%{exact}")
+
+    if report["rounds"]:
+        lines.append("")
+        lines.append("[진행 일수]")
+        for day, p in report["rounds"].items():
+            lines.append(f"  {day:>3}일차 {float(p) * 100:9.4f}%")
+
+    lines.append("")
+    lines.append("[장면 방문]  (판당 평균 방문)")
+    ids = scene_ids if scene_ids is not None else sorted(report["scene_visits"])
+    for sid in ids:
+        lines.append(f"  {sid:<20} {float(report['scene_visits'].get(sid, 0)):8.4f}")
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="무작위 플레이의 엔딩 확률을 표본 없이 정확히 계산합니다.")
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    parser.add_argument("--max-states", type=int, default=1000000, help="한 번에 들고 있을 상태 수 한도")
+    parser.add_argument("--time-limit", type=float, default=60, help="계산 시간 한도 (초, 0 이면 없음)")
+    parser.add_argument("--fractions", action='store_true', help="확률을 분수로 계산 (느림)")
+    parser.add_argument("-q", "--quiet", action='store_true', help="진행 상황을 출력하지 않음")
+    args = parser.parse_args()
+
+    def progress(states, pending, done):
+        print(f"\r[계산 중] 상태 {states}개, 대기 {pending}개, 끝난 확률 {done * 100:.2f}%",
+              end='', file=sys.stderr, flush=True)
+
+    project = load_project(args.base)
+    try:
+        report = solve(project, max_states=args.max_states, time_limit=args.time_limit, fractions=args.fractions,
+                       progress=None if args.quiet else progress)
+    except Unsupported as e:
+        print(f"[계산 불가] {e}")
+        sys.exit(1)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(format_report(report, scene_ids=project.scene_ids))
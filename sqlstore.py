@@ -0,0 +1,353 @@
+import json
+import os
+import sqlite3
+from contextlib import closing
+
+from engine import DATA_FILES, default_base_path, save_json
+from xref import entry_refs
+
+# ---------------------------------------------------------------------------
+# SQLite 저장소 (선택)
+#
+# data/project.sqlite 가 있으면 데이터 파일 대신 이 DB 를 읽고 쓴다.
+# 최상위 항목(장면, 변수, 커스텀, 엔딩)은 항목마다 한 행이고, 장면은 페이지 / 선택지 / 이벤트까지 표로 나눈다.
+# 표로 뺀 자리에는 ROWS 를 남겨 두었다가 읽을 때 그 표의 행으로 채우므로, 키 순서까지 원래 JSON 과 같다.
+# 인트로와 설정은 통째로 documents 에 둔다 (인트로는 편집하지 않으므로 파일 글자 그대로).
+#
+# 저장은 바뀐 항목만 한 트랜잭션으로 지우고 다시 넣는다. 중간에 실패하면 DB 는 저장 전 그대로다.
+# refs 는 xref 와 같은 규칙으로 뽑은 (항목 → 변수) 참조라, 변수를 쓰는 곳을 색인으로 바로 찾는다.
+# script.js 는 그대로 JSON 을 읽으므로 빌드할 때 export() 로 데이터 파일을 save_json 과 같은 바이트로 다시 쓴다.
+# ---------------------------------------------------------------------------
+
+DB_PATH = "data/project.sqlite"
+SCHEMA_VERSION = 1
+ROWS = "\x00rows"   # 자식 표로 뺀 자리
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS documents (dataset TEXT PRIMARY KEY, body TEXT NOT NULL, raw INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS resources (id TEXT PRIMARY KEY, ord INTEGER NOT NULL, name TEXT, body TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS custom (id TEXT PRIMARY KEY, ord INTEGER NOT NULL, name TEXT, body TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS endings (id TEXT PRIMARY KEY, ord INTEGER NOT NULL, priority NUMERIC, title TEXT,
+                                    condition TEXT, body TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS scenes (id TEXT PRIMARY KEY, ord INTEGER NOT NULL, priority NUMERIC, title TEXT,
+                                   condition TEXT, body TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS pages (scene_id TEXT NOT NULL, key TEXT NOT NULL, ord INTEGER NOT NULL, summary TEXT,
+                                  body TEXT NOT NULL, PRIMARY KEY (scene_id, key));
+CREATE TABLE IF NOT EXISTS choices (scene_id TEXT NOT NULL, page_key TEXT NOT NULL, element INTEGER NOT NULL,
+                                    idx INTEGER NOT NULL, title TEXT, body TEXT NOT NULL,
+                                    PRIMARY KEY (scene_id, page_key, element, idx));
+CREATE TABLE IF NOT EXISTS events (scene_id TEXT NOT NULL, page_key TEXT NOT NULL, element INTEGER NOT NULL,
+                                   choice INTEGER NOT NULL, idx INTEGER NOT NULL, type TEXT, target TEXT,
+                                   body TEXT NOT NULL, PRIMARY KEY (scene_id, page_key, element, choice, idx));
+CREATE TABLE IF NOT EXISTS refs (dataset TEXT NOT NULL, entry TEXT NOT NULL, resource TEXT NOT NULL, path TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS scenes_priority ON scenes (priority);
+CREATE INDEX IF NOT EXISTS endings_priority ON endings (priority);
+CREATE INDEX IF NOT EXISTS events_target ON events (target);
+CREATE INDEX IF NOT EXISTS refs_resource ON refs (resource);
+CREATE INDEX IF NOT EXISTS refs_entry ON refs (dataset, entry);
+"""
+
+# 파일 키 -> (표, 따로 뽑아 둘 칸들)
+TABLES = {
+    "Resource": ("resources", ("name",)),
+    "Custom": ("custom", ("name",)),
+    "Endings": ("endings", ("priority", "title", "condition")),
+    "Scene": ("scenes", ("priority", "title", "condition")),
+}
+DOCUMENTS = ("Intro", "Setting")
+
+
+def is_sqlite(base_path=None):
+    return os.path.exists(os.path.join(base_path or default_base_path(), DB_PATH))
+
+
+def dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def field(value, name):
+    # 색인용 칸. 글자 / 숫자가 아니면 비워 둔다
+    if isinstance(value, dict):
+        child = value.get(name)
+        if isinstance(child, (str, int, float)) and not isinstance(child, bool):
+            return child
+    return None
+
+
+def scene_rows(sid, scene):
+    # 장면 하나를 (장면 본문, 페이지 행들, 선택지 행들, 이벤트 행들) 로 나눈다
+    pages, choices, events = [], [], []
+    if not isinstance(scene, dict) or not isinstance(scene.get("pages"), dict):
+        return scene, pages, choices, events
+    for ord, (key, page) in enumerate(scene["pages"].items()):
+        body = page
+        if isinstance(page, dict) and isinstance(page.get("elements"), list):
+            elements = []
+            for e_idx, element in enumerate(page["elements"]):
+                if isinstance(element, dict) and element.get("type") == "choice" and isinstance(element.get("elements"), list):
+                    for c_idx, choice in enumerate(element["elements"]):
+                        choice_body = choice
+                        if isinstance(choice, dict) and isinstance(choice.get("events"), list):
+                            choice_body = dict(choice, events=ROWS)
+                            for v_idx, event in enumerate(choice["events"]):
+                                events.append((sid, key, e_idx, c_idx, v_idx, field(event, "type"),
+                                               field(event, "target"), dumps(event)))
+                        choices.append((sid, key, e_idx, c_idx, field(choice, "title"), dumps(choice_body)))
+                    element = dict(element, elements=ROWS)
+                elements.append(element)
+            body = dict(page, elements=elements)
+        pages.append((sid, key, ord, field(page, "summary"), dumps(body)))
+    return dict(scene, pages=ROWS), pages, choices, events
+
+
+class EntryBatch:
+    # 저장 스레드에 넘기는 한 파일 키의 저장: 바뀐 항목, 지운 항목, 지금 키 순서
+    def __init__(self, dataset, changed, removed, keys, reorder):
+        self.dataset = dataset
+        self.changed = changed
+        self.removed = set(removed)
+        self.keys = keys
+        self.reorder = reorder
+
+    def merge(self, newer):
+        changed = {entry: value for entry, value in self.changed.items() if entry not in newer.removed}
+        changed.update(newer.changed)
+        removed = (self.removed - set(newer.changed)) | newer.removed
+        return EntryBatch(self.dataset, changed, removed, newer.keys, self.reorder or newer.reorder)
+
+    def apply_to(self, entries):
+        # 저장이 끝난 뒤, 편집기가 들고 있는 "DB 에 든 내용" 을 맞춘다
+        for entry in self.removed:
+            entries.pop(entry, None)
+        entries.update(self.changed)
+        order = {entry: entries[entry] for entry in self.keys if entry in entries}
+        entries.clear()
+        entries.update(order)
+
+
+class DocumentWrite:
+    # 설정처럼 통째로 쓰는 파일 키
+    def __init__(self, dataset, value):
+        self.dataset = dataset
+        self.value = value
+
+    def merge(self, newer):
+        return newer
+
+    def apply_to(self, target):
+        target.clear()
+        target.update(self.value)
+
+
+class SqlStore:
+    def __init__(self, base_path=None):
+        self.base_path = base_path or default_base_path()
+        self.path = os.path.join(self.base_path, DB_PATH)
+
+    def connect(self):
+        # 연결은 스레드마다 따로 열어야 하므로 쓸 때마다 연다
+        db = sqlite3.connect(self.path)
+        db.executescript(SCHEMA)
+        return db
+
+    # -- 읽기 -------------------------------------------------------------
+
+    def load(self, dataset):
+        with closing(self.connect()) as db:
+            if dataset in DOCUMENTS:
+                row = db.execute("SELECT body FROM documents WHERE dataset = ?", (dataset,)).fetchone()
+                if row is None:
+                    raise KeyError(f"{self.path} 에 {dataset} 이(가) 없습니다")
+                return json.loads(row[0])
+            if dataset == "Scene":
+                return self.load_scenes(db)
+            table = TABLES[dataset][0]
+            return {entry: json.loads(body) for entry, body in db.execute(f"SELECT id, body FROM {table} ORDER BY ord")}
+
+    def load_scenes(self, db):
+        events = {}
+        for sid, key, e_idx, c_idx, body in db.execute(
+                "SELECT scene_id, page_key, element, choice, body FROM events ORDER BY scene_id, page_key, element, choice, idx"):
+            events.setdefault((sid, key, e_idx, c_idx), []).append(json.loads(body))
+        choices = {}
+        for sid, key, e_idx, c_idx, body in db.execute(
+                "SELECT scene_id, page_key, element, idx, body FROM choices ORDER BY scene_id, page_key, element, idx"):
+            choice = json.loads(body)
+            if isinstance(choice, dict) and choice.get("events") == ROWS:
+                choice["events"] = events.get((sid, key, e_idx, c_idx), [])
+            choices.setdefault((sid, key, e_idx), []).append(choice)
+        pages = {}
+        for sid, key, body in db.execute("SELECT scene_id, key, body FROM pages ORDER BY scene_id, ord"):
+            page = json.loads(body)
+            if isinstance(page, dict) and isinstance(page.get("elements"), list):
+                for e_idx, element in enumerate(page["elements"]):
+                    if isinstance(element, dict) and element.get("elements") == ROWS:
+                        element["elements"] = choices.get((sid, key, e_idx), [])
+            pages.setdefault(sid, {})[key] = page
+        scenes = {}
+        for sid, body in db.execute("SELECT id, body FROM scenes ORDER BY ord"):
+            scene = json.loads(body)
+            if isinstance(scene, dict) and scene.get("pages") == ROWS:
+                scene["pages"] = pages.get(sid, {})
+            scenes[sid] = scene
+        return scenes
+
+    def load_all(self):
+        return {key: self.load(key) for key in DATA_FILES}
+
+    # -- 쓰기 -------------------------------------------------------------
+
+    def delete_entry(self, db, dataset, entry):
+        db.execute(f"DELETE FROM {TABLES[dataset][0]} WHERE id = ?", (entry,))
+        if dataset == "Scene":
+            for table in ("pages", "choices", "events"):
+                db.execute(f"DELETE FROM {table} WHERE scene_id = ?", (entry,))
+        db.execute("DELETE FROM refs WHERE dataset = ? AND entry = ?", (dataset, entry))
+
+    def insert_entry(self, db, dataset, entry, value, ord):
+        table, columns = TABLES[dataset]
+        body = value
+        if dataset == "Scene":
+            body, pages, choices, events = scene_rows(entry, value)
+            db.executemany("INSERT INTO pages VALUES (?, ?, ?, ?, ?)", pages)
+            db.executemany("INSERT INTO choices VALUES (?, ?, ?, ?, ?, ?)", choices)
+            db.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", events)
+        names = ", ".join(("id", "ord") + columns + ("body",))
+        marks = ", ".join("?" * (len(columns) + 3))
+        db.execute(f"INSERT INTO {table} ({names}) VALUES ({marks})",
+                   (entry, ord) + tuple(field(value, column) for column in columns) + (dumps(body),))
+        db.executemany("INSERT INTO refs VALUES (?, ?, ?, ?)",
+                       [(dataset, entry, symbol[1], dumps(path[2:])) for symbol, path in entry_refs(dataset, entry, value)
+                        if symbol[0] == "res"])
+
+    def write(self, batch):
+        # 한 번의 저장 = 한 트랜잭션
+        with closing(self.connect()) as db, db:
+            if isinstance(batch, DocumentWrite):
+                db.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, 0)", (batch.dataset, dumps(batch.value)))
+                return
+            positions = {entry: i for i, entry in enumerate(batch.keys)}
+            for entry in batch.removed:
+                self.delete_entry(db, batch.dataset, entry)
+            for entry, value in batch.changed.items():
+                self.delete_entry(db, batch.dataset, entry)
+                self.insert_entry(db, batch.dataset, entry, value, positions[entry])
+            if batch.reorder:
+                db.executemany(f"UPDATE {TABLES[batch.dataset][0]} SET ord = ? WHERE id = ?",
+                               [(i, entry) for entry, i in positions.items()])
+
+    def batch(self, dataset, data, disk):
+        # data: 편집기의 지금 값, disk: 마지막으로 DB 에 든 값
+        if dataset not in TABLES:
+            return DocumentWrite(dataset, data)
+        changed = {entry: value for entry, value in data.items() if disk.get(entry) != value}
+        removed = [entry for entry in disk if entry not in data]
+        keys = list(data)
+        return EntryBatch(dataset, changed, removed, keys, keys != list(disk))
+
+    def save_dataset(self, dataset, data):
+        # 파일 키 하나를 통째로 바꾼다 (가져오기, tuner --write)
+        if dataset not in TABLES:
+            self.write(DocumentWrite(dataset, data))
+            return
+        with closing(self.connect()) as db, db:
+            table = TABLES[dataset][0]
+            for (entry,) in db.execute(f"SELECT id FROM {table}").fetchall():
+                self.delete_entry(db, dataset, entry)
+            for ord, (entry, value) in enumerate(data.items()):
+                self.insert_entry(db, dataset, entry, value, ord)
+
+    def import_files(self):
+        # 지금 데이터 파일들로 DB 를 채운다. 인트로는 글자 그대로 둔다
+        for dataset, rel_path in DATA_FILES.items():
+            with open(os.path.join(self.base_path, rel_path), 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+            if dataset == "Intro":
+                with closing(self.connect()) as db, db:
+                    db.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, 1)", (dataset, text))
+            else:
+                self.save_dataset(dataset, json.loads(text))
+        with closing(self.connect()) as db, db:
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+
+    def export(self):
+        # script.js 가 읽는 데이터 파일들을 다시 쓴다 (편집기가 저장하는 것과 같은 바이트)
+        with closing(self.connect()) as db:
+            intro = db.execute("SELECT body, raw FROM documents WHERE dataset = 'Intro'").fetchone()
+        for dataset, rel_path in DATA_FILES.items():
+            path = os.path.join(self.base_path, rel_path)
+            if dataset == "Intro" and intro and intro[1]:
+                with open(path, 'r', encoding='utf-8', newline='') as f:
+                    if f.read() == intro[0]:
+                        continue
+                with open(path, 'w', encoding='utf-8', newline='') as f:
+                    f.write(intro[0])
+            else:
+                save_json(path, self.load(dataset))
+
+    # -- 색인으로 찾기 ----------------------------------------------------
+
+    def usages(self, resource):
+        with closing(self.connect()) as db:
+            return [(dataset, entry, tuple(json.loads(path))) for dataset, entry, path in db.execute(
+                "SELECT dataset, entry, path FROM refs WHERE resource = ? ORDER BY dataset, entry", (resource,))]
+
+    def scenes_by_priority(self, low=None, high=None):
+        query, args = "SELECT id, priority, title FROM scenes WHERE 1", []
+        if low is not None:
+            query += " AND priority >= ?"
+            args.append(low)
+        if high is not None:
+            query += " AND priority <= ?"
+            args.append(high)
+        with closing(self.connect()) as db:
+            return db.execute(query + " ORDER BY priority DESC, ord", args).fetchall()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="데이터를 SQLite DB 로 옮기거나 DB 에서 JSON 을 다시 씁니다.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("import", help="데이터 파일로 data/project.sqlite 를 만듭니다 (이후 편집기는 DB 를 씁니다)")
+    sub.add_parser("export", help="DB 내용으로 데이터 파일을 다시 씁니다")
+    sub.add_parser("check", help="DB 에서 만든 JSON 이 지금 데이터 파일과 바이트까지 같은지 확인합니다")
+    usages_parser = sub.add_parser("usages", help="변수를 쓰는 곳")
+    usages_parser.add_argument("resource")
+    priority_parser = sub.add_parser("priority", help="우선순위 범위의 장면")
+    priority_parser.add_argument("--min", type=float, default=None)
+    priority_parser.add_argument("--max", type=float, default=None)
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    args = parser.parse_args()
+
+    store = SqlStore(args.base)
+    if args.command == "import":
+        store.import_files()
+        print(f"{store.path} 를 만들었습니다.")
+    elif args.command == "export":
+        store.export()
+        print("데이터 파일을 다시 썼습니다.")
+    elif args.command == "check":
+        different = []
+        for dataset, rel_path in DATA_FILES.items():
+            with open(os.path.join(store.base_path, rel_path), 'rb') as f:
+                current = f.read()
+            if dataset == "Intro":
+                with closing(store.connect()) as db:
+                    expected = db.execute("SELECT body FROM documents WHERE dataset = 'Intro'").fetchone()[0].encode('utf-8')
+            else:
+                expected = json.dumps(store.load(dataset), indent=4, ensure_ascii=False).encode('utf-8')
+            if current != expected:
+                different.append(rel_path)
+        print("같습니다." if not different else "다릅니다: " + ", ".join(different))
+    elif args.command == "usages":
+        from search import describe_path
+
+        rows = store.usages(args.resource)
+        print(f"{args.resource}: {len(rows)}곳")
+        for dataset, entry, path in rows:
+            print(f"  {describe_path((dataset, entry) + path)}")
+    else:
+        for sid, priority, title in store.scenes_by_priority(args.min, args.max):
+            print(f"{priority}: {sid} {title or ''}")
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# ---------------------------------------------------------------------------
+# 미리보기 썸네일
+#
+# 원본 경로, 수정 시각, 크기, 목표 크기로 키를 만들어 줄인 그림을 디스크(cache/thumbnails)에 두고,
+# 만든 PhotoImage 는 바이트 한도 안에서 최근에 쓴 것부터 메모리에 남긴다.
+# image() 는 PIL 만 쓰므로 다른 스레드에서 불러도 되고, photo() 는 Tk 스레드에서만 부른다.
+#
+# ThumbnailLoader 는 image() 를 작업 스레드에서 돌리고, 끝난 그림을 after() 로 Tk 스레드에 넘겨
+# PhotoImage 로 만든다. 목록에서 화살표로 넘기는 동안 지나간 선택은 취소하고 이웃 그림을 미리 읽는다.
+# ---------------------------------------------------------------------------
+
+CACHE_DIR = "cache/thumbnails"
+MEMORY_BUDGET = 64 * 1024 * 1024
+SIZE_STEP = 32
+
+
+def fit_size(size):
+    # 창 크기가 조금씩 달라도 같은 캐시를 쓰도록 목표 크기를 32px 단위로 내린다
+    w, h = size
+    return max(SIZE_STEP, int(w) // SIZE_STEP * SIZE_STEP), max(SIZE_STEP, int(h) // SIZE_STEP * SIZE_STEP)
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir, memory_budget=MEMORY_BUDGET):
+        self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self.photos = OrderedDict()
+        self.memory_used = 0
+
+    def key(self, path, size):
+        st = os.stat(path)
+        w, h = size
+        raw = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{w}x{h}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def image(self, path, size, key=None):
+        from PIL import Image
+
+        size = fit_size(size)
+        key = key or self.key(path, size)
+        cached = os.path.join(self.cache_dir, key[:2], key + ".png")
+        if os.path.exists(cached):
+            try:
+                img = Image.open(cached)
+                img.load()
+                return img
+            except OSError:
+                pass
+
+        img = Image.open(path)
+        # JPEG 은 디코딩할 때부터 줄여 읽을 수 있다
+        img.draft('RGB', size)
+        img.load()
+        if img.width > size[0] or img.height > size[1]:
+            img.thumbnail(size)
+        if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            img = img.convert("RGBA")
+
+        try:
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            tmp_path = f"{cached}.{os.getpid()}.tmp"
+            img.save(tmp_path, "PNG")
+            os.replace(tmp_path, cached)
+        except OSError as e:
+            print("[썸네일 캐시 저장 실패]", e)
+        return img
+
+    def photo(self, path, size):
+        from PIL import ImageTk
+
+        size = fit_size(size)
+        key = self.key(path, size)
+        if key in self.photos:
+            self.photos.move_to_end(key)
+            return self.photos[key][0]
+        return self.remember(key, ImageTk.PhotoImage(self.image(path, size, key)))
+
+    def remember(self, key, photo):
+        cost = photo.width() * photo.height() * 4
+        self.photos[key] = (photo, cost)
+        self.memory_used += cost
+        while self.memory_used > self.memory_budget and len(self.photos) > 1:
+            _, (_, old_cost) = self.photos.popitem(last=False)
+            self.memory_used -= old_cost
+        return photo
+
+
+class ThumbnailLoader:
+    def __init__(self, cache, widget, workers=2, keep=16):
+        self.cache = cache
+        self.widget = widget
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="thumbnail")
+        self.results = queue.Queue()
+        self.pending = {}           # 키 -> Future
+        self.wanted = {}            # 채널 -> (키, callback)
+        self.prefetched = {}        # 채널 -> 미리 읽으라고 한 키들
+        self.ready = OrderedDict()  # 작업 스레드가 읽어 둔 PIL 그림 (미리 읽기 포함)
+        self.keep = keep
+        self._poll_job = None
+
+    def load(self, channel, path, size, callback):
+        # callback(photo, error) 는 Tk 스레드에서 불린다. 같은 채널에서 새로 부르면 앞의 요청은 버린다
+        size = fit_size(size)
+        try:
+            key = self.cache.key(path, size)
+        except OSError as e:
+            self.wanted.pop(channel, None)
+            callback(None, e)
+            return
+
+        # 아직 시작하지 않은 지난 선택과 그 이웃 미리 읽기는 취소한다
+        previous = self.wanted.get(channel)
+        stale = set(self.prefetched.pop(channel, ()))
+        if previous:
+            stale.add(previous[0])
+        stale.discard(key)
+        for old in stale:
+            future = self.pending.get(old)
+            if future and future.cancel():
+                self.pending.pop(old, None)
+
+        if key in self.cache.photos:
+            self.wanted.pop(channel, None)
+            self.cache.photos.move_to_end(key)
+            callback(self.cache.photos[key][0], None)
+            return
+        self.wanted[channel] = (key, callback)
+        if key in self.ready:
+            self.deliver(key, self.ready.pop(key), None)
+            return
+        self.submit(key, path, size)
+
+    def prefetch(self, channel, paths, size):
+        size = fit_size(size)
+        keys = self.prefetched.setdefault(channel, set())
+        for path in paths:
+            try:
+                key = self.cache.key(path, size)
+            except OSError:
+                continue
+            if key not in self.cache.photos and key not in self.ready:
+                keys.add(key)
+                self.submit(key, path, size)
+
+    def submit(self, key, path, size):
+        if key in self.pending:
+            return
+        future = self.pool.submit(self.cache.image, path, size, key)
+        self.pending[key] = future
+        future.add_done_callback(lambda f, key=key: self.results.put((key, f)))
+        if self._poll_job is None:
+            self._poll_job = self.widget.after(20, self.poll)
+
+    def poll(self):
+        self._poll_job = None
+        while True:
+            try:
+                key, future = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.pop(key, None)
+            if future.cancelled():
+                continue
+            error = future.exception()
+            self.deliver(key, None if error else future.result(), error)
+        if self.pending and self.widget.winfo_exists():
+            self._poll_job = self.widget.after(20, self.poll)
+
+    def deliver(self, key, img, error):
+        waiting = [(channel, callback) for channel, (wanted, callback) in self.wanted.items() if wanted == key]
+        if not waiting:
+            if img is not None:
+                self.ready[key] = img
+                while len(self.ready) > self.keep:
+                    self.ready.popitem(last=False)
+            return
+        photo = None
+        if img is not None:
+            from PIL import ImageTk
+            photo = self.cache.remember(key, ImageTk.PhotoImage(img))
+        for channel, callback in waiting:
+            del self.wanted[channel]
+            callback(photo, error)
+
+    def forget(self, channel):
+        # 창을 닫을 때 그 채널의 요청을 버린다
+        self.wanted.pop(channel, None)
+        for key in self.prefetched.pop(channel, ()):
+            future = self.pending.get(key)
+            if future and future.cancel():
+                self.pending.pop(key, None)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,308 @@
+import copy
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+from engine import DATA_FILES, Game, Project, load_data, save_json
+
+# ---------------------------------------------------------------------------
+# 가중치 / 우선순위 자동 조정
+#
+# 원하는 엔딩 비율을 주면 장면과 분기의 weight / priority 를 바꿔 가며 시뮬레이션해
+# 비율이 가장 가까운 값을 찾는다. 후보는 작업자 프로세스에 나눠 평가하고,
+# 같은 값은 해시로 캐시해 다시 돌리지 않는다.
+#
+# 매개변수 표기
+#   scene:<장면>.weight            scene:<장면>.priority
+#   branch:<장면>/<페이지>/<묶음>.<버튼>/<분기>.weight   (coverage_map 의 [묶음.버튼] 과 같은 번호)
+#   뒤에 =최소:최대 를 붙여 범위를 정한다 (기본 weight 0:20, priority 0:10)
+# ---------------------------------------------------------------------------
+
+DEFAULT_RANGES = {"weight": (0, 20), "priority": (0, 10)}
+
+_data = None
+_outcomes = None
+
+
+class Param:
+    def __init__(self, spec):
+        spec, _, bounds = spec.partition('=')
+        kind, _, path = spec.partition(':')
+        path, _, field = path.rpartition('.')
+        if kind not in ("scene", "branch") or field not in DEFAULT_RANGES or not path:
+            raise ValueError(f"매개변수 표기를 알 수 없습니다: {spec}")
+        self.spec = spec
+        self.kind = kind
+        self.path = path
+        self.field = field
+        if bounds:
+            lo, _, hi = bounds.partition(':')
+            self.lo, self.hi = int(lo), int(hi)
+        else:
+            self.lo, self.hi = DEFAULT_RANGES[field]
+
+    def target(self, data):
+        # 값을 읽고 쓸 dict (장면 또는 분기 항목)
+        scenes = data["Scene"]
+        if self.kind == "scene":
+            if self.path not in scenes:
+                raise KeyError(f"장면 '{self.path}' 가 없습니다.")
+            return scenes[self.path]
+        sid, pid, button, k = self.path.split('/')
+        gi, bi = (int(x) for x in button.split('.'))
+        page = scenes[sid]["pages"][pid]
+        groups = [el.get("elements", []) if el.get("type") == "choice" else [el]
+                  for el in page.get("elements", []) if el.get("type") in ("choice", "button")]
+        return groups[gi][bi]["branch"][int(k)]
+
+    def get(self, data):
+        default = 1 if self.field == "weight" else 0
+        return self.target(data).get(self.field, default)
+
+
+def all_scene_weights(data):
+    return [Param(f"scene:{sid}.weight") for sid in data["Scene"]]
+
+
+def apply_params(data, params, values):
+    # save_data_json 이 저장하는 것과 같은 딕셔너리를 그대로 고친다
+    for param, value in zip(params, values):
+        param.target(data)[param.field] = int(value)
+    return data
+
+
+def data_hash(data):
+    # 캐시 파일을 다른 데이터에 다시 쓰면 예전 결과가 섞이므로 키에 데이터 전체의 해시를 넣는다
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def params_key(data_key, params, values, runs, seed):
+    payload = json.dumps([data_key, [p.spec for p in params], [int(v) for v in values], runs, seed])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+# -- 평가 -----------------------------------------------------------------
+
+def _init_worker(data):
+    global _data, _outcomes
+    _data = data
+    # 커스텀은 조정 대상이 아니므로 시작 상태는 한 번만 구해 둔다
+    try:
+        _outcomes = Game(Project(data)).custom_outcomes()
+    except (ValueError, OverflowError):
+        _outcomes = None
+
+
+def ending_shares(project, runs, seed):
+    report = None
+    if _outcomes is not None:
+        try:
+            from batch import Unsupported, simulate_batch
+            try:
+                report = simulate_batch(runs, seed=seed, project=project, outcomes=_outcomes)
+            except Unsupported:
+                pass
+        except ImportError:
+            pass
+    if report is None:
+        game = Game(project, seed=seed)
+        endings = {}
+        for _ in range(runs):
+            result = game.play()
+            key = result["ending"] if result["phase"] == 'ending' else None
+            endings[key] = endings.get(key, 0) + 1
+        report = {"endings": endings}
+    return {eid: count / runs for eid, count in report["endings"].items()}
+
+
+def evaluate(args):
+    params, values, runs, seed = args
+    data = dict(_data)
+    data["Scene"] = copy.deepcopy(_data["Scene"])
+    apply_params(data, params, values)
+    return values, ending_shares(Project(data), runs, seed)
+
+
+def loss(shares, targets):
+    return sum((shares.get(eid, 0) - share) ** 2 for eid, share in targets.items())
+
+
+# -- 탐색 -----------------------------------------------------------------
+
+class Tuner:
+    def __init__(self, data, params, targets, runs=2000, seed=0, workers=None, population=8,
+                 generations=15, cache=None, progress=None, rng_seed=0):
+        self.data = data
+        self.data_key = data_hash(data)
+        self.params = params
+        self.targets = targets
+        self.runs = runs
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.population = population
+        self.generations = generations
+        self.cache = cache if cache is not None else {}
+        self.progress = progress
+        self.rng = random.Random(rng_seed)
+
+    def decode(self, x):
+        return tuple(round(p.lo + min(max(v, 0), 1) * (p.hi - p.lo)) for p, v in zip(self.params, x))
+
+    def encode(self, values):
+        return [(v - p.lo) / (p.hi - p.lo) if p.hi > p.lo else 0 for p, v in zip(self.params, values)]
+
+    def run(self):
+        started = time.perf_counter()
+        pool = Pool(self.workers, initializer=_init_worker, initargs=(self.data,)) if self.workers > 1 else None
+        if pool is None:
+            _init_worker(self.data)
+
+        def evaluate_all(candidates):
+            jobs = []
+            for values in dict.fromkeys(candidates):
+                if params_key(self.data_key, self.params, values, self.runs, self.seed) not in self.cache:
+                    jobs.append((self.params, values, self.runs, self.seed))
+            results = pool.imap_unordered(evaluate, jobs) if pool else map(evaluate, jobs)
+            for values, shares in results:
+                self.cache[params_key(self.data_key, self.params, values, self.runs, self.seed)] = shares
+            return [(loss(self.cache[params_key(self.data_key, self.params, v, self.runs, self.seed)],
+                          self.targets), v)
+                    for v in candidates]
+
+        # 대각 공분산만 쓰는 단순한 진화 전략 (CMA 의 평균 / 보폭 갱신만 흉내)
+        dim = len(self.params)
+        current = tuple(int(p.get(self.data)) for p in self.params)
+        mean = self.encode(current)
+        sigma = 0.25
+        mu = max(1, self.population // 2)
+        weights = [math.log(mu + 0.5) - math.log(i + 1) for i in range(mu)]
+        weights = [w / sum(weights) for w in weights]
+
+        try:
+            best = min(evaluate_all([current]))
+            history = [best[0]]
+            for generation in range(self.generations):
+                candidates = [self.decode([m + sigma * self.rng.gauss(0, 1) for m in mean])
+                              for _ in range(self.population)]
+                ranked = sorted(evaluate_all(candidates))
+                elite = [self.encode(v) for _, v in ranked[:mu]]
+                mean = [sum(w * x[d] for w, x in zip(weights, elite)) for d in range(dim)]
+                if ranked[0][0] < best[0]:
+                    best = ranked[0]
+                    sigma = min(sigma * 1.2, 0.5)
+                else:
+                    sigma = max(sigma * 0.8, 0.5 / max(p.hi - p.lo for p in self.params))
+                history.append(best[0])
+                if self.progress:
+                    self.progress(generation + 1, best[0], sigma)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        best_loss, best_values = best
+        return {
+            "params": [p.spec for p in self.params],
+            "initial": list(current),
+            "values": list(best_values),
+            "loss": best_loss,
+            "initial_loss": history[0],
+            "shares": self.cache[params_key(self.data_key, self.params, best_values, self.runs, self.seed)],
+            "initial_shares": self.cache[params_key(self.data_key, self.params, current, self.runs, self.seed)],
+            "evaluations": len(self.cache),
+            "elapsed": time.perf_counter() - started,
+        }
+
+
+def format_result(result, targets):
+    lines = [f"손실 {result['initial_loss']:.5f} → {result['loss']:.5f} "
+             f"(평가 {result['evaluations']}회, {result['elapsed']:.1f}초)", "", "[엔딩]  목표 / 처음 / 조정 후"]
+    for eid in sorted(set(targets) | set(result["shares"]), key=lambda e: (e is None, str(e))):
+        name = eid if eid is not None else "(진행 불가)"
+        target = f"{targets[eid] * 100:6.2f}%" if eid in targets else "     -"
+        lines.append(f"  {name:<20} {target}  {result['initial_shares'].get(eid, 0) * 100:6.2f}%  "
+                     f"{result['shares'].get(eid, 0) * 100:6.2f}%")
+    lines.append("")
+    lines.append("[값]")
+    for spec, before, after in zip(result["params"], result["initial"], result["values"]):
+        mark = "" if before == after else "  *"
+        lines.append(f"  {spec:<40} {before:>4} → {after:<4}{mark}")
+    return "\n".join(lines)
+
+
+def load_cache(path):
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return {k: {(None if eid == "null" else eid): v for eid, v in shares.items()}
+                    for k, shares in json.load(f).items()}
+    return {}
+
+
+def save_cache(path, cache):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({k: {("null" if eid is None else eid): v for eid, v in shares.items()} for k, shares in cache.items()},
+                  f, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from engine import default_base_path
+
+    parser = argparse.ArgumentParser(description="원하는 엔딩 비율에 맞도록 weight / priority 를 자동으로 조정합니다.")
+    parser.add_argument("--target", action='append', required=True, metavar="엔딩=비율",
+                        help="예: --target gameover_hp=0.3 (여러 번 지정)")
+    parser.add_argument("--param", action='append', default=[], metavar="표기",
+                        help="예: scene:monster0_1.weight=0:10 (생략하면 모든 장면 weight)")
+    parser.add_argument("-n", "--runs", type=int, default=2000, help="후보 하나당 진행 횟수")
+    parser.add_argument("-g", "--generations", type=int, default=15)
+    parser.add_argument("-p", "--population", type=int, default=8)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    parser.add_argument("--cache", default=None, help="평가 결과 캐시 파일")
+    parser.add_argument("--write", action='store_true', help="찾은 값을 scenes.json 에 저장")
+    args = parser.parse_args()
+
+    targets = {}
+    for item in args.target:
+        eid, _, share = item.partition('=')
+        targets[eid] = float(share.rstrip('%')) / (100 if share.endswith('%') else 1)
+
+    data = load_data(args.base)
+    params = [Param(spec) for spec in args.param] or all_scene_weights(data)
+    cache = load_cache(args.cache)
+
+    def progress(generation, best, sigma):
+        print(f"\r[조정 중] {generation}세대, 손실 {best:.5f}, 보폭 {sigma:.3f}", end='', file=sys.stderr, flush=True)
+
+    tuner = Tuner(data, params, targets, runs=args.runs, seed=args.seed, workers=args.workers,
+                  population=args.population, generations=args.generations, cache=cache, progress=progress)
+    result = tuner.run()
+    print(file=sys.stderr)
+    print(format_result(result, targets))
+
+    if args.cache:
+        save_cache(args.cache, cache)
+    if args.write:
+        apply_params(data, params, result["values"])
+        from scenestore import SceneStore, is_sharded
+        from sqlstore import SqlStore, is_sqlite
+        if is_sqlite(args.base):
+            store = SqlStore(args.base)
+            store.save_dataset("Scene", data["Scene"])
+            path = store.path
+        elif is_sharded(args.base):
+            store = SceneStore(args.base)
+            store.save_all(data["Scene"])
+            path = store.scene_dir
+        else:
+            path = os.path.join(args.base or default_base_path(), DATA_FILES["Scene"])
+            save_json(path, data["Scene"])
+        print(f"\n{path} 에 저장했습니다.")
@@ -0,0 +1,176 @@
+import pickle
+import time
+
+# ---------------------------------------------------------------------------
+# 되돌리기 / 다시 하기
+#
+# 데이터 파일(Resource, Custom, Scene, Endings, Setting)의 최상위 항목(장면 하나, 변수 하나 ...)마다
+# 마지막으로 알고 있는 내용을 pickle 바이트로 들고 있다가, 편집기가 항목을 고쳤다고 알려 주면
+# 그 항목만 비교해 (이전 바이트, 이후 바이트) 한 쌍을 기록한다.
+# 고치지 않은 항목의 바이트는 모든 기록이 함께 쓰므로, 메모리는 프로젝트 크기 한 벌 + 고친 만큼만 는다.
+# ---------------------------------------------------------------------------
+
+MERGE_SECONDS = 1.0
+
+
+def dumps(value):
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def thaw(frozen):
+    # UndoLog.frozen() 의 바이트를 다시 데이터로 (작업 스레드에서 부른다)
+    return {dataset: {entry: pickle.loads(raw) for entry, raw in entries.items()}
+            for dataset, entries in frozen.items()}
+
+
+class Step:
+    def __init__(self, changes, orders):
+        self.changes = changes      # [(파일 키, 항목 키, 이전 바이트 또는 None, 이후 바이트 또는 None)]
+        self.orders = orders        # {파일 키: (이전 키 순서, 이후 키 순서)}
+        self.time = time.monotonic()
+
+    def targets(self):
+        return {(dataset, entry) for dataset, entry, _, _ in self.changes}
+
+
+class UndoLog:
+    def __init__(self, get_data, limit=500):
+        # get_data() 는 {파일 키: dict} 를 돌려준다 (편집기가 dict 를 새로 만들어 바꿔 끼울 수 있으므로 매번 묻는다)
+        self.get_data = get_data
+        self.limit = limit
+        self.listeners = []
+        self.undo_stack = []
+        self.redo_stack = []
+        self.shadow = {}
+        self.order = {}
+
+    def reset(self):
+        # 데이터를 새로 불러온 뒤 부른다. 지금 내용이 기준이 되고 이전 기록은 버린다
+        self.undo_stack = []
+        self.redo_stack = []
+        self.shadow = {}
+        self.order = {}
+        for dataset, data in self.get_data().items():
+            if isinstance(data, dict):
+                self.shadow[dataset] = {entry: dumps(value) for entry, value in data.items()}
+                self.order[dataset] = tuple(data)
+
+    def frozen(self, datasets=None):
+        # 마지막으로 기록한 내용의 바이트를 데이터 순서대로 모은다. 바이트는 바뀌지 않으므로
+        # 항목 수만큼 참조만 옮기면 다른 스레드에 넘길 수 있는 사본이 된다
+        return {dataset: {entry: shadow[entry] for entry in self.order.get(dataset, ()) if entry in shadow}
+                for dataset, shadow in self.shadow.items() if datasets is None or dataset in datasets}
+
+    def rebase(self, dataset, entry):
+        # 기록 없이 기준만 바꾼다 (나눠 저장한 장면을 처음 읽어 목차 대신 전체 내용이 들어왔을 때)
+        value = self.get_data()[dataset].get(entry)
+        if value is not None:
+            self.shadow.setdefault(dataset, {})[entry] = dumps(value)
+
+    def record(self, dataset, entries=None):
+        # entries 를 모르면 그 파일 전체를 비교한다 (순서 바꾸기, 설정처럼 작은 파일)
+        return self.record_many({dataset: entries})
+
+    def record_many(self, targets):
+        # targets: {파일 키: 항목 키들 또는 None}. 여러 파일을 함께 고친 편집(이름 바꾸기 등)을 한 단계로 남긴다
+        changes = []
+        orders = {}
+        for dataset, entries in targets.items():
+            self.diff(dataset, entries, changes, orders)
+        if not changes and not orders:
+            return None
+        return self.push(Step(changes, orders))
+
+    def diff(self, dataset, entries, changes, orders):
+        data = self.get_data()[dataset]
+        shadow = self.shadow.setdefault(dataset, {})
+        old_order = self.order.get(dataset, ())
+        new_order = tuple(data)
+
+        if entries is None:
+            candidates = set(new_order) | set(shadow)
+        else:
+            candidates = set(entries)
+        if new_order != old_order:
+            candidates |= set(old_order).symmetric_difference(new_order)
+
+        for entry in candidates:
+            after = dumps(data[entry]) if entry in data else None
+            before = shadow.get(entry)
+            if after == before:
+                continue
+            changes.append((dataset, entry, before, after))
+            if after is None:
+                shadow.pop(entry, None)
+            else:
+                shadow[entry] = after
+
+        if new_order != old_order:
+            orders[dataset] = (old_order, new_order)
+        self.order[dataset] = new_order
+
+    def push(self, step):
+        self.redo_stack.clear()
+        last = self.undo_stack[-1] if self.undo_stack else None
+        if (last and not step.orders and not last.orders and last.targets() == step.targets()
+                and step.time - last.time < MERGE_SECONDS):
+            # 같은 항목을 연달아 고치면 (글자 입력 등) 한 단계로 합친다
+            last.changes = [(d, e, before, after) for (d, e, before, _), (_, _, _, after)
+                            in zip(sorted(last.changes), sorted(step.changes))]
+            last.time = step.time
+        else:
+            self.undo_stack.append(step)
+            if len(self.undo_stack) > self.limit:
+                del self.undo_stack[0]
+        for listener in self.listeners:
+            listener(step)
+        return step
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        if not self.undo_stack:
+            return None
+        step = self.undo_stack.pop()
+        self.apply(step, forward=False)
+        self.redo_stack.append(step)
+        return step
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        step = self.redo_stack.pop()
+        self.apply(step, forward=True)
+        self.undo_stack.append(step)
+        return step
+
+    def apply(self, step, forward):
+        all_data = self.get_data()
+        changes = step.changes if forward else reversed(step.changes)
+        for dataset, entry, before, after in changes:
+            value = after if forward else before
+            data = all_data[dataset]
+            shadow = self.shadow[dataset]
+            if value is None:
+                data.pop(entry, None)
+                shadow.pop(entry, None)
+            else:
+                data[entry] = pickle.loads(value)
+                shadow[entry] = value
+        for dataset in {dataset for dataset, _, _, _ in step.changes} | set(step.orders):
+            data = all_data[dataset]
+            if dataset in step.orders:
+                before, after = step.orders[dataset]
+                order = after if forward else before
+                if tuple(data) != order:
+                    # 편집기가 들고 있는 dict 를 그대로 두고 순서만 맞춘다
+                    items = {entry: data[entry] for entry in order if entry in data}
+                    data.clear()
+                    data.update(items)
+            self.order[dataset] = tuple(data)
+        for listener in self.listeners:
+            listener(step)
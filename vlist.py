@@ -0,0 +1,264 @@
+import tkinter as tk
+from tkinter import ttk, font as tkfont
+
+# ---------------------------------------------------------------------------
+# 가상 목록
+#
+# 항목 전체는 (키, 글) 목록으로 메모리에만 두고, 안쪽 tk.Listbox 에는 화면에 보이는 줄만 넣는다.
+# 목록을 다시 넣어도 바뀐 줄만 고쳐 그리고, 위의 검색 칸에 입력하면 바로 걸러진다.
+#
+# 편집기가 쓰던 tk.Listbox 의 curselection / select_set / size / get 과 <<ListboxSelect>> 를
+# 그대로 흉내 내며, 번호는 걸러진 화면이 아니라 전체 목록 기준이다.
+# ---------------------------------------------------------------------------
+
+
+class NgramIndex:
+    # 두 글자 조각마다 그 조각이 든 항목 번호를 모아 두고, 검색어의 조각들이 모두 든 항목만 확인한다
+    def __init__(self):
+        self.postings = {}
+        self.texts = []
+
+    def build(self, texts):
+        self.texts = [t.lower() for t in texts]
+        self.postings = {}
+        for i, text in enumerate(self.texts):
+            for gram in {text[j:j + 2] for j in range(len(text) - 1)}:
+                self.postings.setdefault(gram, []).append(i)
+
+    def search(self, query):
+        query = query.lower()
+        if len(query) < 2:
+            candidates = range(len(self.texts))
+        else:
+            grams = sorted({query[j:j + 2] for j in range(len(query) - 1)},
+                           key=lambda g: len(self.postings.get(g, ())))
+            candidates = set(self.postings.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(self.postings.get(gram, ()))
+            candidates = sorted(candidates)
+        hits = [i for i in candidates if query in self.texts[i]]
+        # 앞부분이 맞는 항목을 먼저 보여준다 (그 안에서는 원래 순서)
+        return [i for i in hits if self.texts[i].startswith(query)] + \
+               [i for i in hits if not self.texts[i].startswith(query)]
+
+
+class VirtualList(ttk.Frame):
+    def __init__(self, parent, filterable=True, height=10, **listbox_options):
+        super().__init__(parent)
+        self.keys = []
+        self.texts = []
+        self.positions = {}
+        self.view = []
+        self.view_positions = None
+        self.top = 0
+        self.rows = height
+        self.selected = None
+        self.index = NgramIndex()
+        self.index_dirty = True
+
+        self.filter_var = tk.StringVar()
+        if filterable:
+            entry = ttk.Entry(self, textvariable=self.filter_var)
+            entry.pack(side='top', fill='x', pady=(0, 2))
+            entry.bind("<Escape>", lambda e: self.filter_var.set(""))
+            entry.bind("<Down>", lambda e: (self.listbox.focus_set(), self.move(1)))
+            self.filter_entry = entry
+        self.filter_var.trace_add('write', lambda *args: self.apply_filter())
+
+        body = ttk.Frame(self)
+        body.pack(side='top', fill='both', expand=True)
+        self.scrollbar = ttk.Scrollbar(body, orient='vertical', command=self.yview)
+        self.listbox = tk.Listbox(body, height=height, exportselection=False, activestyle='none', **listbox_options)
+        self.listbox.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.listbox.bind("<<ListboxSelect>>", self.on_click)
+        self.listbox.bind("<Configure>", self.on_resize)
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, 'units', 3))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-1, 'units', 3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(1, 'units', 3))
+        self.listbox.bind("<Up>", lambda e: self.move(-1))
+        self.listbox.bind("<Down>", lambda e: self.move(1))
+        self.listbox.bind("<Prior>", lambda e: self.move(-self.rows))
+        self.listbox.bind("<Next>", lambda e: self.move(self.rows))
+        self.listbox.bind("<Home>", lambda e: self.move(-len(self.view)))
+        self.listbox.bind("<End>", lambda e: self.move(len(self.view)))
+
+    # -- 모델 ---------------------------------------------------------------
+
+    def set_items(self, items):
+        # items: [(키, 글)]. 키 순서가 같으면 글이 바뀐 줄만 다시 그린다
+        keys = [key for key, _ in items]
+        texts = [text for _, text in items]
+        if keys == self.keys:
+            changed = [i for i, (old, new) in enumerate(zip(self.texts, texts)) if old != new]
+            self.texts = texts
+            if changed:
+                self.index_dirty = True
+                if self.filter_var.get():
+                    self.apply_filter()
+                else:
+                    for i in changed:
+                        self.redraw_row(i)
+            return
+        self.keys = keys
+        self.texts = texts
+        self.positions = {key: i for i, key in enumerate(keys)}
+        self.index_dirty = True
+        if self.selected not in self.positions:
+            self.selected = None
+        self.apply_filter(keep_top=True)
+
+    def set_text(self, key, text):
+        i = self.positions.get(key)
+        if i is None or self.texts[i] == text:
+            return
+        self.texts[i] = text
+        self.index_dirty = True
+        if self.filter_var.get():
+            self.apply_filter(keep_top=True)
+        else:
+            self.redraw_row(i)
+
+    def apply_filter(self, keep_top=False):
+        query = self.filter_var.get().strip()
+        if query:
+            if self.index_dirty:
+                self.index.build(self.texts)
+                self.index_dirty = False
+            self.view = self.index.search(query)
+        else:
+            self.view = list(range(len(self.keys)))
+        self.view_positions = None
+        if not keep_top:
+            self.top = 0
+        self.top = max(0, min(self.top, len(self.view) - self.rows))
+        self.render()
+
+    def view_position(self, i):
+        if self.view_positions is None:
+            self.view_positions = {model: pos for pos, model in enumerate(self.view)}
+        return self.view_positions.get(i)
+
+    # -- 그리기 -------------------------------------------------------------
+
+    def render(self):
+        window = self.view[self.top:self.top + self.rows + 1]
+        self.listbox.delete(0, tk.END)
+        if window:
+            self.listbox.insert(0, *(self.texts[i] for i in window))
+        self.show_selection()
+        self.update_scrollbar()
+
+    def redraw_row(self, i):
+        pos = self.view_position(i)
+        if pos is None or not (self.top <= pos <= self.top + self.rows):
+            return
+        row = pos - self.top
+        self.listbox.delete(row)
+        self.listbox.insert(row, self.texts[i])
+        self.show_selection()
+
+    def show_selection(self):
+        self.listbox.selection_clear(0, tk.END)
+        if self.selected is None:
+            return
+        pos = self.view_position(self.positions[self.selected])
+        if pos is not None and self.top <= pos <= self.top + self.rows:
+            self.listbox.selection_set(pos - self.top)
+
+    def update_scrollbar(self):
+        total = len(self.view)
+        if total <= self.rows:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / total, min(1, (self.top + self.rows) / total))
+
+    def on_resize(self, event):
+        linespace = tkfont.Font(font=self.listbox.cget('font')).metrics('linespace')
+        line = linespace + 1 + 2 * int(self.listbox.cget('selectborderwidth'))
+        rows = max(1, event.height // line)
+        if rows != self.rows:
+            self.rows = rows
+            self.top = max(0, min(self.top, len(self.view) - self.rows))
+            self.render()
+
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.view))
+            self.top = max(0, min(self.top, len(self.view) - self.rows))
+            self.render()
+        elif args[0] == 'scroll':
+            self.scroll(int(args[1]), args[2])
+
+    def scroll(self, amount, what='units', step=1):
+        delta = amount * (self.rows if what == 'pages' else step)
+        top = max(0, min(self.top + delta, len(self.view) - self.rows))
+        if top != self.top:
+            self.top = top
+            self.render()
+        return "break"
+
+    def see(self, i):
+        pos = self.view_position(i)
+        if pos is None:
+            return
+        if pos < self.top:
+            self.top = pos
+        elif pos >= self.top + self.rows:
+            self.top = pos - self.rows + 1
+        else:
+            return
+        self.render()
+
+    # -- 선택 (tk.Listbox 와 같은 이름) --------------------------------------
+
+    def on_click(self, event=None):
+        sel = self.listbox.curselection()
+        if not sel or self.top + sel[0] >= len(self.view):
+            return
+        self.selected = self.keys[self.view[self.top + sel[0]]]
+        self.event_generate("<<ListboxSelect>>")
+
+    def move(self, delta):
+        if not self.view:
+            return "break"
+        pos = self.view_position(self.positions[self.selected]) if self.selected is not None else None
+        pos = 0 if pos is None else max(0, min(pos + delta, len(self.view) - 1))
+        self.selected = self.keys[self.view[pos]]
+        self.see(self.view[pos])
+        self.show_selection()
+        self.event_generate("<<ListboxSelect>>")
+        return "break"
+
+    def curselection(self):
+        if self.selected is None:
+            return ()
+        return (self.positions[self.selected],)
+
+    def select_set(self, i, last=None):
+        if not 0 <= i < len(self.keys):
+            return
+        self.selected = self.keys[i]
+        if self.view_position(i) is None:
+            # 걸러져 안 보이는 항목을 고르면 검색어를 지운다
+            self.filter_var.set("")
+        self.see(i)
+        self.show_selection()
+
+    selection_set = select_set
+
+    def selection_clear(self, first=0, last=None):
+        self.selected = None
+        self.show_selection()
+
+    def size(self):
+        return len(self.keys)
+
+    def get(self, i):
+        return self.texts[i]
+
+    def key(self, i):
+        return self.keys[i]
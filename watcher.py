@@ -0,0 +1,222 @@
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import struct
+import sys
+
+# ---------------------------------------------------------------------------
+# 외부 변경 감시
+#
+# 편집기가 켜진 동안 스크립트나 git 이 데이터 파일(DATA_FILES)이나 image/ 를 바꾸면 알려준다.
+# 리눅스에서는 inotify 로 폴더를 감시하고 (저장은 임시 파일 + 이름 바꾸기라 파일이 아니라 폴더를 본다),
+# inotify 를 쓸 수 없으면 check() 를 부를 때마다 수정 시각과 크기를 비교한다.
+# 어느 쪽이든 마지막으로 본 내용의 해시와 같으면 (git checkout 으로 시각만 바뀐 경우 등) 바뀐 것으로 치지 않는다.
+# 편집기가 직접 저장한 파일은 acknowledge() 로 알려 주어 외부 변경으로 보지 않게 한다.
+# ---------------------------------------------------------------------------
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_state(path):
+    # (수정 시각, 크기, 해시). 파일이 없으면 None
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size, file_digest(path)
+    except OSError:
+        return None
+
+
+def dir_state(path):
+    # 폴더는 (이름, 수정 시각, 크기) 목록의 해시로 본다. 그림 내용은 썸네일 캐시가 수정 시각으로 따로 구분한다
+    try:
+        entries = sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                         for entry in os.scandir(path) if entry.is_file())
+    except OSError:
+        return None
+    return hashlib.sha1(repr(entries).encode('utf-8')).hexdigest()
+
+
+class Inotify:
+    def __init__(self, dirs):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify 는 리눅스에서만 쓸 수 있습니다")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.dirs = {}
+        for path in dirs:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch {path}")
+            self.dirs[wd] = path
+
+    def read(self):
+        # 쌓인 이벤트의 경로들. 큐가 넘쳤으면 None (전부 다시 확인해야 한다)
+        paths = set()
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return paths
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(buf, offset)
+                offset += EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if wd in self.dirs:
+                    paths.add(os.path.join(self.dirs[wd], os.fsdecode(name)) if name else self.dirs[wd])
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    def __init__(self, files, dirs, use_inotify=True):
+        # files: {파일 경로: 키}, dirs: {폴더 경로: 키}
+        self.files = {os.path.abspath(path): key for path, key in files.items()}
+        self.dirs = {os.path.abspath(path): key for path, key in dirs.items()}
+        self.states = {}
+        self.inotify = None
+        if use_inotify:
+            parents = {os.path.dirname(path) for path in self.files} | set(self.dirs)
+            try:
+                self.inotify = Inotify(sorted(p for p in parents if os.path.isdir(p)))
+            except (OSError, AttributeError) as e:
+                print("[파일 감시] inotify 를 쓸 수 없어 주기적으로 확인합니다:", e)
+        self.reset()
+
+    @property
+    def mode(self):
+        return "inotify" if self.inotify else "polling"
+
+    def reset(self):
+        # 지금 디스크 상태를 기준으로 삼는다 (다시 불러온 뒤)
+        if self.inotify:
+            self.inotify.read()
+        self.states = {path: file_state(path) for path in self.files}
+        self.states.update((path, dir_state(path)) for path in self.dirs)
+
+    def acknowledge(self, path):
+        # 편집기가 직접 쓴 파일
+        path = os.path.abspath(path)
+        if path in self.files:
+            self.states[path] = file_state(path)
+        elif path in self.dirs:
+            self.states[path] = dir_state(path)
+
+    def candidates(self):
+        if self.inotify is None:
+            # 수정 시각과 크기가 그대로면 해시는 보지 않는다
+            changed = set()
+            for path in self.files:
+                old = self.states.get(path)
+                try:
+                    st = os.stat(path)
+                    if old is None or (st.st_mtime_ns, st.st_size) != old[:2]:
+                        changed.add(path)
+                except OSError:
+                    if old is not None:
+                        changed.add(path)
+            return changed | set(self.dirs)
+        events = self.inotify.read()
+        if events is None:
+            return set(self.files) | set(self.dirs)
+        changed = {path for path in events if path in self.files}
+        changed.update(path for path in self.dirs if any(os.path.dirname(e) == path or e == path for e in events))
+        return changed
+
+    def check(self):
+        # 내용이 실제로 바뀐 키들
+        keys = set()
+        for path in self.candidates():
+            if path in self.files:
+                state = file_state(path)
+                old = self.states.get(path)
+                if (state and state[2]) != (old and old[2]):
+                    keys.add(self.files[path])
+            else:
+                state = dir_state(path)
+                if state != self.states.get(path):
+                    keys.add(self.dirs[path])
+            self.states[path] = state
+        return keys
+
+    def close(self):
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None
+
+
+def diff_entries(base, disk, memory):
+    # 최상위 항목 단위의 3방향 비교.
+    #   base: 마지막으로 읽거나 저장한 파일 내용, disk: 지금 파일 내용, memory: 편집기의 지금 데이터
+    # 파일에서 바뀐 항목 중 편집기에서 손대지 않은 것은 apply 로, 양쪽이 다르게 바꾼 것은 conflicts 로 돌려준다
+    apply, conflicts = [], []
+    for entry in dict.fromkeys(list(base) + list(disk)):
+        in_base, in_disk = entry in base, entry in disk
+        if in_base and in_disk and base[entry] == disk[entry]:
+            continue
+        if not in_base and not in_disk:
+            continue
+        local_changed = (entry in memory) != in_base or (in_base and memory[entry] != base[entry])
+        same_as_disk = (entry in memory) == in_disk and (not in_disk or memory[entry] == disk[entry])
+        if same_as_disk:
+            continue
+        if local_changed:
+            conflicts.append(entry)
+        else:
+            apply.append(entry)
+    return apply, conflicts
+
+
+def merge_order(disk, memory):
+    # 파일의 키 순서를 따르고, 편집기에서만 새로 만든 항목은 뒤에 붙인다
+    order = [entry for entry in disk if entry in memory]
+    order += [entry for entry in memory if entry not in disk]
+    return order
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from engine import DATA_FILES, default_base_path
+
+    parser = argparse.ArgumentParser(description="데이터 파일과 image/ 의 변경을 지켜봅니다.")
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    parser.add_argument("--poll", action="store_true", help="inotify 대신 주기적으로 확인합니다.")
+    parser.add_argument("--interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    base = args.base or default_base_path()
+    watcher = FileWatcher({os.path.join(base, rel): key for key, rel in DATA_FILES.items()},
+                          {os.path.join(base, "image"): "image"}, use_inotify=not args.poll)
+    print(f"[파일 감시] {watcher.mode} 로 지켜봅니다. Ctrl+C 로 끝냅니다.")
+    try:
+        while True:
+            for key in sorted(watcher.check()):
+                print(f"{time.strftime('%H:%M:%S')} 바뀜: {key}")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        watcher.close()
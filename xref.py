@@ -0,0 +1,214 @@
+import re
+
+from expression import NUMBER_TOKEN, SPECIAL_TOKENS, TOKEN_PATTERN
+
+# ---------------------------------------------------------------------------
+# 참조 색인
+#
+# 데이터 안에서 다른 것을 가리키는 자리를 모두 모아 (기호 → JSON 경로들) 로 들고 있다.
+#
+#   ("res", 변수 id)           조건식 / setValue 의 value 식에 나온 이름, setValue 의 target, maxValue / minValue
+#   ("page", 장면 id, 페이지 키) 분기 {"type": "page", "value": ...}, 장면의 "start"
+#   ("ending", 엔딩 키)          분기 {"type": "ending", "value": ...}
+#
+# 조건식은 expression.tokenize 와 같은 규칙으로 잘라, 따옴표 없는 이름 조각을 모두 ("res", 이름) 으로 넣는다.
+# 아직 없는 변수 이름도 들어가므로 변수를 새로 만들어도 색인을 다시 만들 필요가 없다.
+# 최상위 항목 단위로 갱신하므로, 사용처 찾기 / 이름 바꾸기 / 삭제 경고는 참조 수만큼만 일한다.
+# ---------------------------------------------------------------------------
+
+EXPRESSION_FIELDS = ("condition", "value", "maxValue", "minValue")
+NAME_PATTERN = re.compile(r'^[가-힣A-Za-z0-9_]+$')
+NOT_NAMES = {'true', 'false', 'Infinity'} | set(SPECIAL_TOKENS)
+
+
+def expression_names(expr):
+    # 식에서 변수 이름일 수 있는 조각들 (숫자, 따옴표 문자열, 연산자, tags / items 등은 뺀다)
+    names = []
+    for match in TOKEN_PATTERN.finditer(expr):
+        tok = match.group(0)
+        if NAME_PATTERN.match(tok) and not NUMBER_TOKEN.match(tok) and tok not in NOT_NAMES:
+            names.append(tok)
+    return names
+
+
+def replace_name(expr, old, new):
+    # 식 안에서 old 조각만 new 로 바꾼다 (poison 을 바꿀 때 poisonMax 나 "poison" 은 그대로 둔다)
+    out = []
+    last = 0
+    for match in TOKEN_PATTERN.finditer(expr):
+        if match.group(0) == old:
+            out.append(expr[last:match.start()])
+            out.append(new)
+            last = match.end()
+    out.append(expr[last:])
+    return "".join(out)
+
+
+def walk_refs(value, path, scene=None):
+    # (기호, 경로) 를 모두 꺼낸다. scene 은 페이지 분기가 가리키는 장면 id
+    if isinstance(value, dict):
+        kind = value.get("type")
+        is_link = kind in ("page", "ending") and len(path) >= 2 and path[-2] == "branch"
+        for key, child in value.items():
+            if isinstance(child, str):
+                if is_link and key == "value":
+                    if kind == "ending":
+                        yield ("ending", child), path + (key,)
+                    elif scene is not None:
+                        yield ("page", scene, child), path + (key,)
+                elif key == "target" and kind == "setValue":
+                    if child not in NOT_NAMES:
+                        yield ("res", child), path + (key,)
+                elif key in EXPRESSION_FIELDS:
+                    for name in dict.fromkeys(expression_names(child)):
+                        yield ("res", name), path + (key,)
+            elif isinstance(child, (dict, list)):
+                yield from walk_refs(child, path + (key,), scene)
+    elif isinstance(value, list):
+        for i, child in enumerate(value):
+            yield from walk_refs(child, path + (i,), scene)
+
+
+def entry_refs(dataset, entry, value):
+    scene = entry if dataset == "Scene" else None
+    refs = list(walk_refs(value, (dataset, entry), scene))
+    if scene is not None and isinstance(value, dict) and isinstance(value.get("start"), str):
+        refs.append((("page", scene, value["start"]), (dataset, entry, "start")))
+    return refs
+
+
+def get_path(data, path):
+    node = data
+    for key in path:
+        node = node[key]
+    return node
+
+
+def set_path(data, path, value):
+    get_path(data, path[:-1])[path[-1]] = value
+
+
+def rekey(mapping, old, new):
+    # dict 를 새로 만들지 않고 순서를 지킨 채 키 이름만 바꾼다 (편집기가 같은 dict 를 들고 있다)
+    items = [(new if key == old else key, value) for key, value in mapping.items()]
+    mapping.clear()
+    mapping.update(items)
+
+
+class CrossReferences:
+    def __init__(self):
+        self.refs = {}          # 기호 -> {경로: None} (순서 있는 집합)
+        self.entry_refs = {}    # (파일 키, 항목 키) -> [(기호, 경로)]
+
+    def build(self, data):
+        self.refs.clear()
+        self.entry_refs.clear()
+        for dataset, entries in data.items():
+            if isinstance(entries, dict):
+                for entry, value in entries.items():
+                    self.add_entry(dataset, entry, value)
+
+    def add_entry(self, dataset, entry, value):
+        refs = entry_refs(dataset, entry, value)
+        for symbol, path in refs:
+            self.refs.setdefault(symbol, {})[path] = None
+        self.entry_refs[(dataset, entry)] = refs
+
+    def remove_entry(self, dataset, entry):
+        for symbol, path in self.entry_refs.pop((dataset, entry), ()):
+            paths = self.refs.get(symbol)
+            if paths is not None:
+                paths.pop(path, None)
+                if not paths:
+                    del self.refs[symbol]
+
+    def update_entry(self, dataset, entry, data):
+        self.remove_entry(dataset, entry)
+        entries = data.get(dataset)
+        if isinstance(entries, dict) and entry in entries:
+            self.add_entry(dataset, entry, entries[entry])
+
+    def usages(self, symbol, exclude=None):
+        # exclude: 빼고 볼 (파일 키, 항목 키). 자기 자신 안의 참조 (maxValue 가 자기를 가리키는 등) 를 뺄 때 쓴다
+        return [path for path in self.refs.get(symbol, ()) if exclude is None or path[:2] != exclude]
+
+    # -- 삭제 경고 --------------------------------------------------------
+
+    def orphaned_endings(self, sid):
+        # 장면을 지우면 더 이상 어떤 분기도 가리키지 않게 되는 엔딩들
+        endings = dict.fromkeys(symbol[1] for symbol, _ in self.entry_refs.get(("Scene", sid), ())
+                                if symbol[0] == "ending")
+        return [eid for eid in endings if not self.usages(("ending", eid), exclude=("Scene", sid))]
+
+    # -- 이름 바꾸기 ------------------------------------------------------
+    #
+    # 정의(키)와 참조를 모두 고치고, 고친 항목을 {파일 키: {항목 키}} 로 돌려준다.
+    # 색인 자체는 고친 항목을 update_entry 로 다시 넣어 맞춘다 (편집기는 UndoLog listener 로 한다).
+
+    def rename_resource(self, data, old, new):
+        resources = data["Resource"]
+        check_new_name(new, resources)
+        # 변수 자기 안의 참조 (maxValue 등) 는 키가 바뀐 뒤의 경로로 고친다
+        paths = [("Resource", new) + path[2:] if path[:2] == ("Resource", old) else path
+                 for path in self.usages(("res", old))]
+        rekey(resources, old, new)
+        touched = {"Resource": {old, new}}
+        for path in paths:
+            value = get_path(data, path)
+            set_path(data, path, new if path[-1] == "target" else replace_name(value, old, new))
+            touched.setdefault(path[0], set()).add(path[1])
+        return touched
+
+    def rename_page(self, data, sid, old, new):
+        scene = data["Scene"][sid]
+        pages = scene.get("pages", {})
+        if old == scene.get("start", "start") and "start" not in scene:
+            raise ValueError("시작 페이지는 이름을 바꿀 수 없습니다.")
+        check_new_name(new, pages)
+        for path in self.usages(("page", sid, old)):
+            set_path(data, path, new)
+        rekey(pages, old, new)
+        return {"Scene": {sid}}
+
+    def rename_ending(self, data, old, new):
+        endings = data["Endings"]
+        check_new_name(new, endings)
+        touched = {"Endings": {old, new}}
+        for path in self.usages(("ending", old)):
+            set_path(data, path, new)
+            touched.setdefault(path[0], set()).add(path[1])
+        rekey(endings, old, new)
+        return touched
+
+
+def check_new_name(new, existing):
+    if not new or not NAME_PATTERN.match(new) or NUMBER_TOKEN.match(new) or new in NOT_NAMES:
+        raise ValueError(f"'{new}' 은(는) 쓸 수 없는 이름입니다. 한글, 영문, 숫자, _ 만 쓸 수 있고 숫자로만 된 이름은 안 됩니다.")
+    if new in existing:
+        raise ValueError(f"'{new}' 은(는) 이미 있는 이름입니다.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from engine import load_data
+    from search import describe_path
+
+    parser = argparse.ArgumentParser(description="변수 / 페이지 / 엔딩이 쓰인 곳을 찾습니다.")
+    parser.add_argument("symbol", help="변수 id, 엔딩 키, 또는 장면id/페이지키")
+    parser.add_argument("--base", default=None, help="data/ 폴더가 있는 경로")
+    args = parser.parse_args()
+
+    data = load_data(args.base)
+    index = CrossReferences()
+    index.build(data)
+    if "/" in args.symbol:
+        symbol = ("page",) + tuple(args.symbol.split("/", 1))
+    elif args.symbol in data["Endings"]:
+        symbol = ("ending", args.symbol)
+    else:
+        symbol = ("res", args.symbol)
+    usages = index.usages(symbol)
+    print(f"{symbol}: {len(usages)}곳")
+    for path in usages:
+        print(f"  {describe_path(path)}")